@@ -0,0 +1,763 @@
+''' Offline benchmarks for the parsing and scraping stages in
+    `download.py`, run against synthetic PDFs and registration
+    detail pages shaped like the ones on the Secretary of State's site
+
+    usage: python benchmark.py --sizes 100 500 1000
+
+    add `--memory` to compare the in-memory footprint of the private
+    dataset as plain dicts and as `Registration` records
+
+    results are saved to `benchmark-results/` and compared
+    with the previous run, if there is one
+'''
+
+from pathlib import Path
+from datetime import datetime, date, timedelta
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+REPO_DIR = Path(__file__).resolve().parent
+DIR_RESULTS = REPO_DIR / 'benchmark-results'
+
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792
+GRAY = '0.86275'
+
+# x-coordinates for the start of each column, just
+# inside the breaks in `config[...]['pdf_vertical_lines']`
+COLUMNS_PRIVATE = {
+    'year': 41,
+    'expense_report_lobbyist': 73,
+    'expense_report_employer': 124,
+    'lobbyist_name': 181,
+    'employer': 345,
+    'status': 504
+}
+
+COLUMNS_PUBLIC = {
+    'year': 41,
+    'lobbyist_name': 77,
+    'agency': 307
+}
+
+FIRST_NAMES = [
+    'ANN', 'BRYAN', 'CHARLES', 'DANA', 'ELLEN', 'FRANK', 'GRACE', 'HANK',
+    'IRENE', 'JAMES', 'KAREN', 'LARRY', 'MARY', 'NATHAN', 'OLIVIA', 'PAUL',
+    'QUINN', 'ROSE', 'STEVEN', 'TINA', 'ULYSSES', 'VERA', 'WALT', 'YVONNE'
+]
+
+LAST_NAMES = [
+    'AAKER', 'BERG', 'CHRISTENSEN', 'DOYLE', 'ERICKSON', 'FISCHER', 'GORTMAKER',
+    'HANSEN', 'IVERSON', 'JOHNSON', 'KNUTSON', 'LARSON', 'MCGUIGAN', 'NELSON',
+    'OLSON', 'PETERSON', 'QUALE', 'RASMUSSEN', 'SCHMIDT', 'THOMPSON', 'ULRICH',
+    'VOGEL', 'WEBER', 'YOUNG', 'ZUBKE'
+]
+
+EMPLOYERS = [
+    'SOUTH DAKOTA STATE MEDICAL ASSOCIATION', 'GRAIN AND FEED ASSOCIATION, SD',
+    'LAND TITLE ASSN, SD', 'ALLIANCE OF AUTOMOBILE MANUFACTURERS',
+    'ROSEBUD SIOUX TRIBE', 'SD RETAILERS ASSOCIATION', 'BLACK HILLS POWER INC',
+    'SIOUX FALLS AREA CHAMBER', 'SD BANKERS ASSOCIATION', 'PAUL NELSON FARM, INC'
+]
+
+AGENCIES = [
+    'ATTORNEY GENERAL', 'BOARD OF REGENTS', 'DEPARTMENT OF HEALTH',
+    'DEPARTMENT OF REVENUE', 'LAKE AREA TECHNICAL COLLEGE', 'PUBLIC UTILITIES COMMISSION'
+]
+
+STREETS = [
+    '1302 EAST HIGHWAY 14', '124 W DAKOTA', '2000 S. SYCAMORE AVE.',
+    '320 EAST CAPITOL AVENUE', '612 SOUTH EXENE STREET', '1401 EYE STREET NW'
+]
+
+CITIES = [
+    ('PIERRE', 'SD', '57501'), ('SIOUX FALLS', 'SD', '57104'),
+    ('RAPID CITY', 'SD', '57701'), ('ABERDEEN', 'SD', '57401'),
+    ('WASHINGTON', 'DC', '20005')
+]
+
+FILING_TYPES = [
+    'Lobbyist Expense Report', 'Employer Expense Report',
+    'Lobbyist Termination', 'Amended Lobbyist Expense Report'
+]
+
+
+def pdf_escape(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def pdf_text(x, top, text, font='F1', size=10):
+    ''' a line of text with its top at `top`, in pdfplumber's coordinates '''
+    baseline = PAGE_HEIGHT - top - size * 0.8
+    return f'BT /{font} {size} Tf {x} {baseline:.2f} Td ({pdf_escape(text)}) Tj ET\n'
+
+
+def pdf_rect(top, bottom):
+    ''' a gray row background spanning the table '''
+    return f'{GRAY} g 36 {PAGE_HEIGHT - bottom:.2f} 540 {bottom - top:.2f} re f 0 g\n'
+
+
+def pdf_line(x0, x1, top):
+    return f'0.5 w {x0} {PAGE_HEIGHT - top:.2f} m {x1} {PAGE_HEIGHT - top:.2f} l S\n'
+
+
+def write_pdf(filepath, page_streams=[]):
+    ''' write a bare-bones PDF, one content stream per page,
+        using the built-in Helvetica fonts
+    '''
+
+    page_count = len(page_streams)
+
+    # 1: catalog, 2: page tree, 3-4: fonts, then a page
+    # object and a content stream object for each page
+    page_ids = [5 + i * 2 for i in range(page_count)]
+
+    objects = {
+        1: '<< /Type /Catalog /Pages 2 0 R >>',
+        2: f"<< /Type /Pages /Kids [{' '.join(f'{x} 0 R' for x in page_ids)}] /Count {page_count} >>",
+        3: '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+        4: '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>'
+    }
+
+    for page_id, stream in zip(page_ids, page_streams):
+        objects[page_id] = (
+            f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] '
+            f'/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents {page_id + 1} 0 R >>'
+        )
+
+        stream = stream.encode('latin-1')
+        objects[page_id + 1] = (stream, len(stream))
+
+    offsets = {}
+
+    with open(filepath, 'wb') as outfile:
+        outfile.write(b'%PDF-1.4\n')
+
+        for obj_id in sorted(objects):
+            offsets[obj_id] = outfile.tell()
+            obj = objects[obj_id]
+
+            outfile.write(f'{obj_id} 0 obj\n'.encode('latin-1'))
+
+            if isinstance(obj, tuple):
+                stream, length = obj
+                outfile.write(f'<< /Length {length} >>\nstream\n'.encode('latin-1'))
+                outfile.write(stream)
+                outfile.write(b'\nendstream')
+            else:
+                outfile.write(obj.encode('latin-1'))
+
+            outfile.write(b'\nendobj\n')
+
+        xref_offset = outfile.tell()
+        size = max(objects) + 1
+
+        outfile.write(f'xref\n0 {size}\n0000000000 65535 f \n'.encode('latin-1'))
+
+        for obj_id in range(1, size):
+            outfile.write(f'{offsets[obj_id]:010d} 00000 n \n'.encode('latin-1'))
+
+        outfile.write(
+            f'trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n'.encode('latin-1')
+        )
+
+    return filepath
+
+
+def paginate(rows, title, headers, row_height, build_row):
+    ''' lay out table rows across pages the way the exported
+        PDFs do: a title block and underlined headers on the first
+        page, gray backgrounds behind every other row
+    '''
+
+    streams = []
+    stream = ''
+
+    # title block
+    stream += pdf_text(197, 183, title, font='F2', size=14)
+    stream += pdf_text(191, 199, 'Based on Provided Search Criteria', font='F2')
+    stream += pdf_text(195, 217, f'Printed on {datetime.now():%-m/%-d/%Y %-I:%M:%S %p}', font='F2')
+
+    for x, label in headers:
+        stream += pdf_text(x, 248, label, font='F2')
+
+    stream += pdf_line(40.54, 571.46, 262)
+
+    top = 270
+
+    for i, row in enumerate(rows):
+        if top + row_height > PAGE_HEIGHT - 36:
+            streams.append(stream)
+            stream = ''
+            top = 36
+
+        if i % 2 == 0:
+            stream += pdf_rect(top, top + row_height)
+
+        stream += build_row(row, top)
+        top += row_height
+
+    streams.append(stream)
+
+    return streams
+
+
+def make_registrations(count, seed=0):
+    ''' a list of synthetic private lobbyist registrations '''
+
+    rng = random.Random(seed)
+    registrations = []
+
+    for i in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        city, state, zip_code = rng.choice(CITIES)
+        employer_city, employer_state, employer_zip = rng.choice(CITIES)
+        year = 2012 + i % 15
+        registration_date = date(year, 1, 2) + timedelta(days=rng.randint(0, 60))
+
+        filings = []
+
+        for _ in range(rng.randint(0, 4)):
+            filing_date = registration_date + timedelta(days=rng.randint(30, 300))
+
+            filings.append({
+                'filing_type': rng.choice(FILING_TYPES),
+                'filing_date': filing_date,
+                'filing_number': f'LE{rng.randint(100000, 999999)}',
+                'filing_guid': ''.join(str(rng.randint(0, 9)) for _ in range(48))
+            })
+
+        registrations.append({
+            'registration_guid': ''.join(str(rng.randint(0, 9)) for _ in range(48)),
+            'registration_number': f'L{i + 1:05d}',
+            'year': year,
+            'name_first': first,
+            'name_last': last,
+            'name_full': f'{first} {last}',
+            'address': f'{rng.choice(STREETS)}',
+            'city': f'{city}, {state} {zip_code}',
+            'phone': f'(605) {rng.randint(200, 999)}-{rng.randint(1000, 9999)}',
+            'email': f'{first}.{last}@example.com'.lower(),
+            'employer': rng.choice(EMPLOYERS),
+            'employer_address': rng.choice(STREETS),
+            'employer_city': f'{employer_city}, {employer_state} {employer_zip}',
+            'expense_report_lobbyist': rng.choice(['Yes', 'No']),
+            'expense_report_employer': rng.choice(['Yes', 'No']),
+            'registration_date': registration_date,
+            'filings': filings
+        })
+
+    return registrations
+
+
+def write_pdf_private(filepath, registrations):
+    col = COLUMNS_PRIVATE
+
+    headers = [
+        (col['year'], 'Year'),
+        (col['expense_report_lobbyist'], 'Expense'),
+        (col['expense_report_employer'], 'Expense'),
+        (col['lobbyist_name'], 'Lobbyist'),
+        (col['employer'], 'Employer'),
+        (col['status'], 'Status')
+    ]
+
+    def build_row(reg, top):
+        stream = ''
+        stream += pdf_text(col['lobbyist_name'], top + 6, reg['name_full'])
+        stream += pdf_text(col['employer'], top + 6, reg['employer'])
+        stream += pdf_text(col['year'], top + 31, str(reg['year']))
+        stream += pdf_text(col['expense_report_lobbyist'], top + 31, reg['expense_report_lobbyist'])
+        stream += pdf_text(col['expense_report_employer'], top + 31, reg['expense_report_employer'])
+        stream += pdf_text(col['lobbyist_name'], top + 31, reg['city'])
+        stream += pdf_text(col['employer'], top + 31, reg['employer_address'])
+        stream += pdf_text(col['status'], top + 31, 'Active -')
+        stream += pdf_text(col['status'], top + 42, 'Authorized')
+        stream += pdf_text(col['lobbyist_name'], top + 56, reg['phone'])
+        stream += pdf_text(col['employer'], top + 56, reg['employer_city'])
+        stream += pdf_text(col['lobbyist_name'], top + 70, reg['email'])
+        return stream
+
+    streams = paginate(
+        registrations,
+        'Private Lobbyist Registration List',
+        headers,
+        86,
+        build_row
+    )
+
+    return write_pdf(filepath, streams)
+
+
+def write_pdf_public(filepath, registrations):
+    col = COLUMNS_PUBLIC
+
+    headers = [
+        (col['year'], 'Year'),
+        (col['lobbyist_name'], 'Lobbyist'),
+        (col['agency'], 'State Agency')
+    ]
+
+    def build_row(reg, top):
+        stream = ''
+        stream += pdf_text(col['agency'], top + 4, reg['agency'])
+        stream += pdf_text(col['year'], top + 18, str(reg['year']))
+        stream += pdf_text(col['lobbyist_name'], top + 18, reg['name_full'])
+        stream += pdf_text(col['agency'], top + 18, reg['address'])
+        stream += pdf_text(col['agency'], top + 33, reg['city'])
+        return stream
+
+    rng = random.Random(1)
+
+    rows = [{**x, 'agency': rng.choice(AGENCIES)} for x in registrations]
+
+    streams = paginate(
+        rows,
+        'Public Lobbyist Registration List',
+        headers,
+        55,
+        build_row
+    )
+
+    return write_pdf(filepath, streams)
+
+
+def detail_page_html(reg):
+    ''' a `LobbyistRegistrationDetail.aspx` page for a registration '''
+
+    def span(span_id, text):
+        return f'<span id="ctl00_MainContent_{span_id}">{text}</span>'
+
+    registration_date = f"{reg['registration_date']:%m/%d/%Y}"
+
+    spans = [
+        span('lblRegistrationNo', f"{reg['year']} - Registration Number: {reg['registration_number']}"),
+        span('txtLobbyistName', reg['name_full'].title()),
+        span('txtStatus', 'Active'),
+        span('txtEmploymentDate', registration_date),
+        span('txtPhone', reg['phone']),
+        span('txtEmail', reg['email']),
+        span('txtResidenceAddress', f"{reg['address']}<br>{reg['city']}"),
+        span('txtOccupation', 'Attorney'),
+        span('txtType', 'Private'),
+        span('txtEmployerName', reg['employer']),
+        span('txtAgentName', 'Jane Agent'),
+        span('txtRegistrationDate', registration_date),
+        span('txtAuthorizationDate', registration_date),
+        span('txtSubject', 'Health care; agriculture; taxes &amp; revenue'),
+        span('txtRegistrationStatus', 'Active - Authorized'),
+        span('txtEmployerAddress', f"{reg['employer_address']}<br>{reg['employer_city']}")
+    ]
+
+    rows = ''
+
+    for filing in reg['filings']:
+        rows += f'''
+        <tr>
+            <td>{filing['filing_type']}</td>
+            <td>{filing['filing_date']:%m/%d/%Y}</td>
+            <td><a href="../Business/DocumentImage.aspx?id={filing['filing_guid']}">{filing['filing_number']}</a></td>
+            <td></td>
+        </tr>'''
+
+    return f'''<!DOCTYPE html>
+<html>
+<head><title>Lobbyist Registration Detail</title></head>
+<body>
+<form id="aspnetForm">
+<div class="content">
+{'<br>'.join(spans)}
+</div>
+<table class="grid">
+    <tr><th>Filing Type</th><th>Filing Date</th><th>Document Number</th><th>Filing Detail</th></tr>{rows}
+</table>
+</form>
+</body>
+</html>
+'''
+
+
+def write_detail_pages(download, registrations):
+    ''' write a detail page for each registration, plus a stand-in
+        PDF for each filing, cataloged so nothing gets downloaded
+    '''
+
+    store = download.get_page_store()
+    dir_forms = download.config['private']['dir_forms']
+
+    for reg in registrations:
+        store.write(reg['registration_guid'], detail_page_html(reg))
+
+        for filing in reg['filings']:
+            write_pdf(
+                dir_forms / f"{filing['filing_guid']}.pdf",
+                [pdf_text(72, 72, filing['filing_number'])]
+            )
+
+    store.flush()
+
+    # picks up every stand-in PDF in the folder
+    download.FormCatalog().write()
+
+
+# everything a run reads or writes, other than the templates and fixes
+DERIVED_DIRS = ['private', 'public']
+
+
+def setup_workdir():
+    ''' a scratch directory laid out like the repo, with a
+        parsed-names cache covering every synthetic name
+    '''
+
+    workdir = Path(tempfile.mkdtemp(prefix='sd-lobbyists-bench-'))
+
+    for filename in ['fixes.json', 'readme.template', 'rss.template']:
+        shutil.copy(REPO_DIR / filename, workdir / filename)
+
+    init_derived(workdir)
+
+    return workdir
+
+
+def init_derived(workdir):
+    ''' empty `private/` and `public/` folders, plus the parsed-names cache '''
+
+    for folder in ['public', 'private/detail-pages', 'private/last-names', 'private/disclosure-forms']:
+        (workdir / folder).mkdir(parents=True, exist_ok=True)
+
+    parsed_names = {}
+
+    for first in FIRST_NAMES:
+        for last in LAST_NAMES:
+            parsed_names[f'{first} {last}'] = {
+                'name_first': first,
+                'name_last': last
+            }
+
+    with open(workdir / 'private' / 'parsed-names.json', 'w') as outfile:
+        json.dump(parsed_names, outfile)
+
+
+def clear_derived(download):
+    ''' remove everything a run reads or writes -- pages, forms, the
+        change log, aggregates, entities, shards, RSS state and so on --
+        along with the page store `download` keeps open
+    '''
+
+    for folder in DERIVED_DIRS:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    download.page_store = None
+
+
+def reset_workdir(download):
+    ''' back to the state `setup_workdir` left it in '''
+
+    clear_derived(download)
+    init_derived(Path.cwd())
+
+
+@contextmanager
+def snapshot_workdir(download):
+    ''' yields a function that puts `private/` and `public/`
+        back the way they were when the snapshot was taken
+    '''
+
+    snapshot = Path(tempfile.mkdtemp(prefix='sd-lobbyists-snapshot-'))
+
+    for folder in DERIVED_DIRS:
+        shutil.copytree(folder, snapshot / folder)
+
+    def restore():
+        clear_derived(download)
+
+        for folder in DERIVED_DIRS:
+            shutil.copytree(snapshot / folder, folder)
+
+    try:
+        yield restore
+    finally:
+        shutil.rmtree(snapshot)
+
+
+def timeit(download, func, repeat=1):
+    ''' best wall time of `repeat` calls, plus the last return value;
+        each call starts from the same `private/` and `public/` state
+    '''
+
+    best = None
+    result = None
+
+    with snapshot_workdir(download) as restore:
+        for i in range(repeat):
+            if i:
+                restore()
+
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+
+            if best is None or elapsed < best:
+                best = elapsed
+
+    return best, result
+
+
+def run_benchmarks(download, size, repeat=1):
+    registrations = make_registrations(size, seed=size)
+
+    reset_workdir(download)
+
+    write_pdf_private(download.config['private']['filepath_pdf'], registrations)
+    write_pdf_public(download.config['public']['filepath_pdf'], registrations)
+    write_detail_pages(download, registrations)
+
+    results = {}
+
+    results['ResultsPDF (private)'], pdf_private = timeit(
+        download,
+        lambda: download.ResultsPDF(download.config['private']['filepath_pdf']),
+        repeat=repeat
+    )
+
+    results['ResultsPDF (public)'], pdf_public = timeit(
+        download,
+        lambda: download.ResultsPDF(download.config['public']['filepath_pdf']).write_data(),
+        repeat=repeat
+    )
+
+    assert len(pdf_private.data) == size, f'Parsed {len(pdf_private.data)} of {size} private rows'
+
+    guids = download.get_page_store().guids()
+
+    seconds, _ = timeit(
+        download,
+        lambda: [download.scrape_registration_page(x) for x in guids],
+        repeat=repeat
+    )
+
+    results['scrape_registration_page (per page)'] = seconds / len(guids)
+
+    results['scrape_private_data'], scraped = timeit(
+        download,
+        download.scrape_private_data,
+        repeat=repeat
+    )
+
+    results['build_readme'], _ = timeit(
+        download,
+        download.build_readme,
+        repeat=repeat
+    )
+
+    results['vet_results_private'], _ = timeit(
+        download,
+        lambda: download.vet_results_private(
+            scraped_data=scraped.get('scraped_data'),
+            pdf_data=pdf_private.data
+        ),
+        repeat=repeat
+    )
+
+    return results
+
+
+def measure_memory(load):
+    ''' bytes still allocated after calling `load`, plus its return value '''
+
+    gc.collect()
+    tracemalloc.start()
+
+    result = load()
+
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return current, result
+
+
+def run_memory_benchmark(download, filepath):
+    ''' footprint of the private dataset as nested dicts
+        straight from `json.load` vs. slotted records
+    '''
+
+    def load_dicts():
+        with open(filepath, 'r') as infile:
+            return json.load(infile)
+
+    bytes_dicts, data = measure_memory(load_dicts)
+    del data
+
+    bytes_records, data = measure_memory(
+        lambda: download.load_registrations(filepath)
+    )
+
+    results = {
+        'filepath': str(filepath),
+        'registrations': len(data),
+        'bytes_dicts': bytes_dicts,
+        'bytes_records': bytes_records
+    }
+
+    print(f'\nMemory footprint of {len(data):,} registrations in {filepath}')
+    print(f'- dicts:   {bytes_dicts / 1024 / 1024:>8.2f} MB')
+    print(f'- records: {bytes_records / 1024 / 1024:>8.2f} MB ({bytes_records / bytes_dicts:.0%})')
+
+    return results
+
+
+def load_previous_results():
+    if not DIR_RESULTS.exists():
+        return {}
+
+    filepaths = sorted(DIR_RESULTS.glob('*.json'))
+
+    if not filepaths:
+        return {}
+
+    with open(filepaths[-1], 'r') as infile:
+        return json.load(infile)
+
+
+def print_results(results, previous={}):
+    previous_lookup = {
+        (x['size'], x['benchmark']): x['seconds'] for x in previous.get('results', [])
+    }
+
+    print(f"\n{'benchmark':<40} {'size':>6} {'seconds':>10} {'previous':>10} {'change':>8}")
+
+    for result in results:
+        key = (result['size'], result['benchmark'])
+        line = f"{result['benchmark']:<40} {result['size']:>6,} {result['seconds']:>10.4f}"
+
+        if previous_lookup.get(key):
+            change = (result['seconds'] - previous_lookup[key]) / previous_lookup[key]
+            line += f' {previous_lookup[key]:>10.4f} {change:>+8.1%}'
+
+        print(line)
+
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+
+    parser.add_argument(
+        '--sizes',
+        nargs='+',
+        type=int,
+        default=[100, 500],
+        help='number of synthetic registrations to benchmark against'
+    )
+
+    parser.add_argument(
+        '--repeat',
+        type=int,
+        default=1,
+        help='run each benchmark this many times and keep the best'
+    )
+
+    parser.add_argument(
+        '--memory',
+        nargs='?',
+        const='',
+        help=(
+            'measure the memory footprint of a private lobbyist JSON file '
+            '(defaults to the one in the repo, or else the largest synthetic set)'
+        )
+    )
+
+    parser.add_argument(
+        '--no-save',
+        action='store_true',
+        help="don't save the results"
+    )
+
+    args = parser.parse_args()
+
+    previous = load_previous_results()
+
+    workdir = setup_workdir()
+    cwd = os.getcwd()
+
+    # `download` reads its config and caches relative
+    # to the working directory when it's imported
+    os.chdir(workdir)
+    sys.path.insert(0, str(REPO_DIR))
+
+    import download
+
+    results = []
+    memory = None
+
+    try:
+        for size in args.sizes:
+            print(f'\nBenchmarking {size:,} registrations ...')
+
+            timings = run_benchmarks(download, size, repeat=args.repeat)
+
+            for benchmark in timings:
+                results.append({
+                    'size': size,
+                    'benchmark': benchmark,
+                    'seconds': timings[benchmark]
+                })
+
+        if args.memory is not None:
+            filepath = Path(args.memory) if args.memory else REPO_DIR / download.config['private']['filepath_data']
+
+            # otherwise the largest synthetic set, gathered from its shards
+            if not args.memory and not filepath.exists():
+                filepath = workdir / download.config['private']['filepath_data']
+
+                with open(filepath, 'w') as outfile:
+                    json.dump(download.load_private_data(), outfile, indent=4)
+
+            memory = run_memory_benchmark(download, filepath)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir)
+
+    print_results(results, previous=previous)
+
+    if args.no_save:
+        return results
+
+    DIR_RESULTS.mkdir(exist_ok=True)
+
+    run_at = datetime.now()
+    filepath = DIR_RESULTS / f'{run_at:%Y-%m-%dT%H-%M-%S}.json'
+
+    with open(filepath, 'w') as outfile:
+        json.dump(
+            {
+                'run_at': run_at.isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'sizes': args.sizes,
+                'repeat': args.repeat,
+                'results': results,
+                'memory': memory
+            },
+            outfile,
+            indent=4
+        )
+
+    print(f'Wrote {filepath}')
+
+    return results
+
+
+if __name__ == '__main__':
+    main()
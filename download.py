@@ -1,18 +1,42 @@
 from pathlib import Path
-from datetime import datetime
+import os
+from datetime import datetime, timedelta
 import time
 import csv
 import json
 import itertools
 import random
+import functools
+import hashlib
+import re
+import sqlite3
+import argparse
+import bisect
+import sys
+import gzip
+import mmap
+import threading
+import traceback
+import unicodedata
+import shutil
+import tempfile
+from difflib import SequenceMatcher
+from contextlib import contextmanager, ExitStack
+from concurrent.futures import ProcessPoolExecutor
 from urllib.parse import urljoin, urlparse, parse_qs
 from urllib3.util import Retry
 from email import utils
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from xml.sax.saxutils import XMLGenerator
+import xml.etree.ElementTree as ET
 
+import numpy as np
 from requests import Session
 from requests.adapters import HTTPAdapter
 from playwright.sync_api import sync_playwright
 import pdfplumber
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdftypes import resolve1
 import probablepeople as pp
 from bs4 import BeautifulSoup
 from scourgify import normalize_address_record
@@ -23,9 +47,13 @@ from scourgify.exceptions import (
 
 
 
-BASE_URL = 'https://sosenterprise.sd.gov/BusinessServices/Lobbyist'
+# point this at a local stand-in server to test without the live site
+SITE_URL = os.environ.get('SD_LOBBYISTS_SITE_URL', 'https://sosenterprise.sd.gov')
+
+BASE_URL = f'{SITE_URL}/BusinessServices/Lobbyist'
 SEARCH_URL = f'{BASE_URL}/LobbyistSearch.aspx'
 REGISTRATION_URL = f'{BASE_URL}/LobbyistRegistrationDetail.aspx'
+FILING_BASE_URL = f'{SITE_URL}/BusinessServices/Business/'
 
 SELECTOR_BUTTON_SEARCH = '#ctl00_MainContent_SearchButton'
 SELECTOR_BUTTON_PRINT = '#ctl00_MainContent_PrintButton'
@@ -48,6 +76,20 @@ FIRST_YEAR_DOWNLOAD = THIS_YEAR - 1
 if NOW.month < 6:
     FIRST_YEAR_DOWNLOAD = THIS_YEAR - 1
 
+
+def refresh_clock():
+    ''' move `NOW` and the years that hang off it up to the
+        current time, for processes that outlive a day
+    '''
+    global NOW, THIS_YEAR, FIRST_YEAR_DOWNLOAD
+
+    NOW = datetime.now()
+    THIS_YEAR = NOW.year
+    FIRST_YEAR_DOWNLOAD = THIS_YEAR - 1
+
+    return NOW
+
+
 config = {
     'private': {
         'pdf_vertical_lines': {
@@ -78,11 +120,43 @@ for lobbyist_type in config.keys():
     config[lobbyist_type]['filepath_pdf'] = folder / f'search-results-{lobbyist_type}.pdf'
     config[lobbyist_type]['filepath_data'] = folder / f'south-dakota-lobbyists-{lobbyist_type}.{filetype}'
 
+    if lobbyist_type == 'public':
+        # rows added to or removed from the public data, one JSON object per line
+        config[lobbyist_type]['filepath_changes'] = folder / 'south-dakota-lobbyists-public-changes.jsonl'
+
     if lobbyist_type == 'private':
         config[lobbyist_type]['dir_pages'] = folder / 'detail-pages'
+
+        # 'archive' packs detail pages into one compressed file,
+        # 'directory' keeps one HTML file per page in `dir_pages`
+        config[lobbyist_type]['page_storage'] = 'archive'
+        config[lobbyist_type]['filepath_pages_archive'] = folder / 'detail-pages.pack'
+
+        # one JSON file of registrations per year, plus a manifest
+        # of their hashes so unchanged years aren't rewritten
+        config[lobbyist_type]['dir_shards'] = folder / 'shards'
+        config[lobbyist_type]['filepath_shards_manifest'] = folder / 'shards' / 'manifest.json'
+
+        # set to also write every year out to `filepath_data`, which
+        # gets rewritten in full whenever any one shard changes
+        config[lobbyist_type]['write_combined'] = False
+
+        # most detail pages `refresh` will re-download in one run
+        config[lobbyist_type]['refresh_budget'] = 500
         config[lobbyist_type]['dir_last_names'] = folder / 'last-names'
         config[lobbyist_type]['dir_forms'] = folder / 'disclosure-forms'
 
+        # every downloaded form's size, hash and source registration
+        config[lobbyist_type]['filepath_forms_catalog'] = folder / 'disclosure-forms-catalog.json'
+
+        # parsed disclosure forms, cached by the hash of each PDF
+        config[lobbyist_type]['dir_forms_parsed'] = folder / 'disclosure-forms-parsed'
+        config[lobbyist_type]['filepath_forms_data'] = folder / 'south-dakota-lobbyist-disclosures.jsonl'
+
+        # parsed PDF data from the previous run, used
+        # to figure out what changed since then
+        config[lobbyist_type]['filepath_pdf_snapshot'] = folder / f'search-results-{lobbyist_type}.json'
+
 FILEPATH_PARSED_NAMES = Path('private') / 'parsed-names.json'
 
 with open(FILEPATH_PARSED_NAMES, 'r') as infile:
@@ -95,6 +169,7 @@ name_key_map = {
     'MiddleInitial': 'name_middle',
     'MiddleName': 'name_middle',
     'Nickname': 'name_nickname',
+    'PrefixMarital': 'name_prefix',
     'PrefixOther': 'name_prefix',
     'SuffixGenerational': 'name_suffix',
     'SuffixOther': 'name_suffix',
@@ -119,1060 +194,5374 @@ public_but_private = fixes.get('public_but_private')
 
 FILEPATH_RSS = Path('south-dakota-lobbyists.xml')
 
+# every item published to the feed so far, newest first
+FILEPATH_RSS_ITEMS = Path('private') / 'rss-items.json'
 
-class ResultsPDF:
-    ''' A PDF exported from the S.D. Secretary
-        of State's webite containing a table of data
-        on state lobbyists
-    '''
-    def __init__(self, filepath):
-        if not isinstance(filepath, Path):
-            filepath = Path(filepath)
+# how many of the most recent items to keep in the feed
+RSS_MAX_ITEMS = 250
 
-        self.filepath = filepath
-        is_private = 'private' in str(filepath)
+FILEPATH_REGISTRATION_INDEX = Path('private') / 'registration-index.json'
 
-        self.report_type = 'private' if is_private else 'public'
-        self.config = config[self.report_type]
+# stable lobbyist and employer IDs, and every name variant matched to them
+FILEPATH_ENTITIES = Path('private') / 'entities.json'
 
-        self.pdf = pdfplumber.open(self.filepath)
+# full-text index over registrations and disclosure forms
+FILEPATH_SEARCH_INDEX = Path('private') / 'search-index.db'
 
-        self.gather_crops()
+# responses from the SoS site, stored by the hash of their content,
+# so scrapers can be rerun offline -- see `HTTPCache`
+DIR_HTTP_CACHE = Path('private') / 'http-cache'
 
-        self.data = []
-        self.collect_data()
+# set SD_LOBBYISTS_HEADED=1 to watch the browser work
+BROWSER_HEADLESS = not os.environ.get('SD_LOBBYISTS_HEADED')
 
-        self.pdf.close()
+# resource types the search page doesn't need to work
+BROWSER_BLOCKED_RESOURCES = ('image', 'stylesheet', 'font', 'media')
 
-    def get_page_crops(self, page):
-        ''' given a page, get cropped sections representing each record'''
+# 'off', 'record' or 'replay'
+HTTP_CACHE_MODE = os.environ.get('SD_LOBBYISTS_HTTP_CACHE', 'off')
 
-        breaks = [
-            # page top
-            page.bbox[1],
+# a replay runs in a scratch copy of these, so it
+# doesn't write over the live data and state files
+REPLAY_FILES = ['fixes.json', 'readme.template', 'rss.template', 'README.md', FILEPATH_RSS]
+REPLAY_FOLDERS = ['public', 'private']
 
-            # page bottom
-            page.bbox[3]
-        ]
+# `watch` mode: seconds between checks, give or take a random
+# fraction of that, and how many pages to refresh per check
+WATCH_INTERVAL = 15 * 60
+WATCH_JITTER = 0.2
+WATCH_REFRESH_BUDGET = 50
 
-        # add the tops/bottoms of gray rectangles
-        for rect in page.rects:
-            breaks.append(rect['top'])
-            breaks.append(rect['bottom'])
+# local port for the /health and /metrics endpoints
+WATCH_PORT = 8787
 
-        # and sort
-        breaks.sort()
+# timings and counters for each run, one JSON object per line
+FILEPATH_RUN_LOG = Path('private') / 'run-log.jsonl'
 
-        # get a list of overlapping pairs
-        a, b = itertools.tee(breaks)
-        next(b, None)
+# once the run log gets this big, it's moved to `run-log.jsonl.1`
+# (replacing the one before) and a new one is started
+RUN_LOG_MAX_BYTES = 10 * 1024 * 1024
 
-        # and build the coordinates
-        coords = [(0, x[0], page.width, x[1]) for x in zip(a, b)]
+# field-level changes to each registration between scrapes,
+# one JSON object per line, appended to and never rewritten
+FILEPATH_CHANGE_LOG = Path('private') / 'change-log.jsonl'
 
-        # list to gather crops
-        crops = []
+# the column layout inferred from the latest PDF of each report type
+FILEPATH_PDF_LAYOUTS = Path('private') / 'pdf-layouts.json'
 
-        for c in coords:
-            crop = page.crop(c)
-            if crop.extract_text():
-                crops.append(crop)
+# pages to sample when inferring a PDF's column layout
+LAYOUT_SAMPLE_PAGES = 8
 
-        return {page.page_number: crops}
+# how far (in points) an inferred column break can be
+# from the configured one and still count as the same
+LAYOUT_TOLERANCE = 6
 
-    def gather_crops(self):
-        ''' process the PDF to gather a list of cropped sections, each representing a single record
-         '''
+# fingerprints of the exported PDFs from the last complete run
+FILEPATH_PROBE = Path('private') / 'probe.json'
 
-        data_crops = {}
+# the export stamps the time it was printed on the first page
+RE_PDF_PRINTED_ON = re.compile(rb'\(Printed on [^)]*\)')
 
-        for page in self.pdf.pages:
+# running counts behind the summary tables, updated
+# from just the registrations that changed each run
+FILEPATH_AGGREGATES = Path('private') / 'aggregates.json'
 
-            if page.page_number == 1:
+# small CSV summaries of the private data, for the README and dashboards
+DIR_SUMMARY = Path('private') / 'summary'
 
-                # crop out top material on first page
-                # by targeting the lines above the table
-                bottom = page.lines[0].get('bottom') + 1
+# when each detail page was last downloaded and when it's next due
+FILEPATH_REFRESH_SCHEDULE = Path('private') / 'refresh-schedule.json'
 
-                page = page.crop(
-                    (0, bottom, page.width, page.height)
-                )
+# days between refreshes for each tier, from most to least
+# urgent -- `None` means the page is never refreshed again
+REFRESH_TIERS = {
+    'daily': 1,
+    'weekly': 7,
+    'monthly': 30,
+    'yearly': 365,
+    'never': None
+}
 
-            crops = self.get_page_crops(page)
-            data_crops = {**data_crops, **crops}
+# a registration that changed this recently is refreshed at least weekly
+REFRESH_RECENT_CHANGE_DAYS = 30
 
-            page.close()
+# registration statuses that mean a registration is closed
+CLOSED_STATUSES = (
+    'WITHDRAWN',
+    'TERMINATED',
+    'UNREGISTERED',
+    'INACTIVE',
+    'EXPIRED'
+)
 
-        self.data_crops = data_crops
 
-        return self
+class RunStats:
+    ''' Timers and counters for one run of the pipeline, written
+        out as JSON lines with a summary table at the end
+    '''
+    def __init__(self):
+        self.run_id = datetime.now().isoformat(timespec='seconds')
 
-    def parse_data_public(self):
-        if self.report_type != 'public':
-            return
+        # name -> {'calls', 'seconds', 'max'}
+        self.timers = {}
 
-        line_breaks = self.config['pdf_vertical_lines']
+        # name -> count
+        self.counters = {}
 
-        for page_num in self.data_crops:
-            for crop in self.data_crops[page_num]:
+        # one-off facts about the run
+        self.events = []
 
-                d = {}
+    def record(self, name, seconds):
+        if not self.timers.get(name):
+            self.timers[name] = {
+                'calls': 0,
+                'seconds': 0.0,
+                'max': 0.0
+            }
 
-                for key in line_breaks:
-                    breaks = line_breaks[key]
+        timer = self.timers[name]
+        timer['calls'] += 1
+        timer['seconds'] += seconds
+        timer['max'] = max(timer['max'], seconds)
 
-                    vertical_break_start = breaks[0]
+        return self
 
-                    if key == 'agency':
-                        vertical_break_end = crop.width
-                    else:
-                        vertical_break_end = breaks[1]
+    @contextmanager
+    def timer(self, name):
+        ''' time the body of a `with` block '''
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def timed(self, name):
+        ''' decorator to time every call to a function '''
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+        return self
 
-                    section_crop = crop.crop(
-                        (
-                            vertical_break_start,
-                            crop.bbox[1],
-                            vertical_break_end,
-                            crop.bbox[3]
-                        )
-                    )
+    def log(self, event, **fields):
+        self.events.append({
+            'event': event,
+            'time': datetime.now().isoformat(timespec='seconds'),
+            **fields
+        })
+        return self
 
-                    section_text = section_crop.extract_text(layout=True).upper()
+    def write_report(self, filepath=FILEPATH_RUN_LOG, max_bytes=RUN_LOG_MAX_BYTES):
+        ''' append this run's timers, counters and events to the
+            run log, rotating it first if it's grown too big
+        '''
 
-                    section_lines = [x.strip() for x in section_text.splitlines() if x.strip()]
+        filepath = Path(filepath)
 
-                    section_text = ' '.join(
-                        section_text.split()
-                    )
+        if filepath.exists() and filepath.stat().st_size >= max_bytes:
+            filepath.replace(filepath.with_name(f'{filepath.name}.1'))
 
-                    if key == 'agency':
+        with open(filepath, 'a') as outfile:
+            for name in self.timers:
+                outfile.write(json.dumps({
+                    'run_id': self.run_id,
+                    'type': 'timer',
+                    'name': name,
+                    **self.timers[name]
+                }) + '\n')
 
-                        d['agency'] = ' '.join(section_lines[0].split())
+            for name in self.counters:
+                outfile.write(json.dumps({
+                    'run_id': self.run_id,
+                    'type': 'counter',
+                    'name': name,
+                    'count': self.counters[name]
+                }) + '\n')
 
-                        agency_address = ' '.join(section_lines[1:])
+            for event in self.events:
+                outfile.write(json.dumps({
+                    'run_id': self.run_id,
+                    'type': 'event',
+                    **event
+                }) + '\n')
 
-                        agency_address = ' '.join(agency_address.split())
+        print(f'- Wrote {str(filepath)}')
 
-                        d['agency_address'] = agency_address
-                        continue
+        return filepath
 
-                    d[key] = section_text
+    def print_summary(self):
+        width = max([len(x) for x in [*self.timers, *self.counters]] + [10])
 
-                self.data.append(d)
+        print(f"\n{'timer':<{width}} {'calls':>8} {'total s':>10} {'mean ms':>10} {'max ms':>10}")
 
-        # add public records mistakenly categorized as private
-        self.data.extend(
-            list(public_but_private.values())
+        timers = sorted(
+            self.timers.items(),
+            key=lambda x: x[1]['seconds'],
+            reverse=True
         )
 
-        self.data.sort(
-            key=lambda x: (x['agency'], x['year'])
-        )
+        for name, timer in timers:
+            mean = timer['seconds'] / timer['calls'] * 1000
+            print(f"{name:<{width}} {timer['calls']:>8,} {timer['seconds']:>10.2f} {mean:>10.1f} {timer['max'] * 1000:>10.1f}")
 
-        return self
+        if self.counters:
+            print(f"\n{'counter':<{width}} {'count':>8}")
 
-    def parse_data_private(self):
-        if self.report_type != 'private':
-            return
+        for name in sorted(self.counters):
+            print(f'{name:<{width}} {self.counters[name]:>8,}')
 
-        line_breaks = self.config['pdf_vertical_lines']
-        data = []
+        print()
 
-        for page_num in self.data_crops:
+        return self
 
-            crops = self.data_crops[page_num]
-            for crop in crops:
+    def finish(self):
+        self.write_report()
+        self.print_summary()
+        return self
 
-                d = {}
+    def reset(self):
+        ''' start over for the next run in the same process '''
+        self.__init__()
+        return self
 
-                for key in line_breaks:
-                    breaks = line_breaks[key]
 
-                    vertical_break_start = breaks[0]
+stats = RunStats()
 
-                    if key == 'status':
-                        vertical_break_end = crop.width
-                    else:
-                        vertical_break_end = breaks[1]
 
-                    section_crop = crop.crop(
-                        (
-                            vertical_break_start,
-                            crop.bbox[1],
-                            vertical_break_end,
-                            crop.bbox[3]
-                        )
-                    )
+class HTTPCache:
+    ''' Record/replay for everything fetched from the SoS site.
 
-                    section_text = section_crop.extract_text(layout=True).upper()
+        In 'record' mode, responses are saved as they come in:
+        each body is stored once under its sha256 in `objects/`,
+        and `index.jsonl` maps a request key to that hash. In
+        'replay' mode, requests are served from the cache without
+        touching the network (or a browser) and sleeps are skipped.
+    '''
 
-                    section_lines = [x.strip() for x in section_text.splitlines() if x.strip()]
+    def __init__(self, folder=DIR_HTTP_CACHE, mode=HTTP_CACHE_MODE):
+        self.folder = Path(folder)
+        self.filepath_index = self.folder / 'index.jsonl'
+        self.mode = mode
 
-                    section_text = ' '.join(
-                        section_text.split()
-                    )
+        # request key -> sha256 of the response body
+        self.index = None
 
-                    if key == 'lobbyist_name':
-                        name = ' '.join(section_lines[0].split())
+    @staticmethod
+    def request_key(method, url):
+        return f'{method} {url}'
 
-                        name = name_fixes.get(name, name)
+    def load(self):
+        if self.index is not None:
+            return self
 
-                        address_lobbyist = ' '.join(
-                            section_lines[1:]
-                        )
+        self.index = {}
 
-                        d['address_lobbyist'] = ' '.join(
-                            address_lobbyist.split()
-                        )
+        if self.filepath_index.exists():
+            with open(self.filepath_index, 'r') as infile:
+                for line in infile:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.index[entry['key']] = entry['sha256']
 
-                        parsed_name = parsed_names.get(name)
+        return self
 
-                        if parsed_name:
-                            parsed_name['name_full'] = name
-                            d['lobbyist_name'] =parsed_name
-                            continue
+    def object_path(self, sha):
+        return self.folder / 'objects' / sha[:2] / sha
 
-                        if 'TEST ' in name:
-                            d['skip'] = True
-                            continue
+    def get(self, key):
+        ''' the cached body for a request key, or None '''
 
-                        try:
-                            results = pp.tag(name)
+        self.load()
 
-                            if results[1] != 'Person':
-                                raise Exception(f'Unparsed name: {name}')
+        sha = self.index.get(key)
 
-                            data_out = {name_key_map.get(x): results[0].get(x) for x in results[0].keys()}
+        if not sha:
+            stats.count('cache.misses')
+            return None
 
-                            parsed_names[name] = data_out
+        stats.count('cache.hits')
 
-                            data_out['name_full'] = name
+        return self.object_path(sha).read_bytes()
 
-                            d['lobbyist_name'] = data_out
+    def put(self, key, body):
+        self.load()
 
-                            continue
+        sha = hashlib.sha256(body).hexdigest()
+        filepath = self.object_path(sha)
 
-                        except pp.RepeatedLabelError:
-                            raise Exception(f'Unparsed name: {name}')
+        if not filepath.exists():
+            filepath.parent.mkdir(parents=True, exist_ok=True)
+            filepath.write_bytes(body)
 
-                    d[key] = section_text
+        if self.index.get(key) != sha:
+            self.index[key] = sha
 
-                if d.get('skip'):
-                    continue
+            with open(self.filepath_index, 'a') as outfile:
+                outfile.write(json.dumps({
+                    'key': key,
+                    'sha256': sha,
+                    'recorded': datetime.now().isoformat(timespec='seconds')
+                }) + '\n')
 
-                self.data.append(d)
+        stats.count('cache.recorded')
 
-        self.data.sort(
-            key=lambda x: (
-                x.get('lobbyist_name').get('name_last'),
-                x.get('lobbyist_name').get('name_first')
-            )
-        )
+        return sha
 
-        with open(FILEPATH_PARSED_NAMES, 'w') as outfile:
-            json.dump(
-                parsed_names,
-                outfile,
-                indent=4
-            )
+    def replay(self, key):
+        ''' the cached body for a request key in replay mode -- raises
+            if it was never recorded, since there's no network to fall back on
+        '''
 
-        print(f'Wrote {str(FILEPATH_PARSED_NAMES.resolve())}')
+        body = self.get(key)
 
-        return self
+        if body is None:
+            raise LookupError(f'Not in the HTTP cache: {key}')
 
-    def collect_data(self):
-        if not self.data_crops:
-            self.gather_crops()
+        return body
 
-        if self.report_type == 'public':
-            self.parse_data_public()
+    def record(self, key, body):
+        if self.mode == 'record':
+            self.put(key, body)
 
-        if self.report_type == 'private':
-            self.parse_data_private()
+        return body
 
-        return self
 
-    def write_data(self):
-        ''' only writing out public data at this stage '''
-        if self.report_type != 'public':
-            return
+http_cache = HTTPCache()
 
-        if not self.data:
-            self.collect_data()
 
-        filepath_out = self.config['filepath_data'].resolve()
+def replay_workdir():
+    ''' copy the working files to a scratch directory for a replay,
+        leaving the HTTP cache where it is, and return its path --
+        change to it before running anything that writes
+    '''
 
-        with open(filepath_out, 'w', encoding='utf=8', newline='') as outfile:
-            writer = csv.DictWriter(
-                outfile,
-                fieldnames=list(self.data[0].keys())
-            )
-            writer.writeheader()
-            writer.writerows(self.data)
+    workdir = Path(tempfile.mkdtemp(prefix='sd-lobbyists-replay-'))
 
-        print(f'- Wrote {len(self.data):,} records to {filepath_out}')
+    http_cache.folder = http_cache.folder.resolve()
+    http_cache.filepath_index = http_cache.filepath_index.resolve()
 
-        return self
+    for filepath in REPLAY_FILES:
+        if Path(filepath).exists():
+            shutil.copy(filepath, workdir / filepath)
 
-    def __str__(self):
-        return self.filepath
+    for folder in REPLAY_FOLDERS:
+        if Path(folder).exists():
+            shutil.copytree(
+                folder,
+                workdir / folder,
+                ignore=shutil.ignore_patterns(DIR_HTTP_CACHE.name)
+            )
 
+    print(f'Replaying into {workdir}\n')
 
-def download_pdfs():
-    ''' Downloads PDFs with lists of public and private lobbyists '''
+    return workdir
 
-    targets = [(config[x]['selector_radio'], config[x]['filepath_pdf']) for x in config]
 
-    with sync_playwright() as p:
-        browser = p.firefox.launch(headless=False)
-        page = browser.new_page()
-        page.goto(SEARCH_URL, timeout=0)
+def http_get(url, backoff_factor=0.5):
+    ''' GET a URL from the SoS site and return the body as bytes,
+        going through `http_cache` when recording or replaying
+    '''
 
-        for pair in targets:
-            page.locator(pair[0]).click()
-            time.sleep(1)
+    key = HTTPCache.request_key('GET', url)
 
-            page.locator(SELECTOR_YEARS).select_option('0')
+    if http_cache.mode == 'replay':
+        return http_cache.replay(key)
 
-            page.locator(SELECTOR_BUTTON_SEARCH).click()
-            time.sleep(1)
+    s = Session()
 
-            with page.expect_download(timeout=0) as download_info:
-                page.locator(SELECTOR_BUTTON_PRINT).click(timeout=0)
+    retries = Retry(
+        total=5,
+        backoff_factor=backoff_factor
+    )
 
-                download = download_info.value
-                download.save_as(pair[1])
+    s.mount('https://', HTTPAdapter(max_retries=retries))
+    s.mount('http://', HTTPAdapter(max_retries=retries))
 
-                print(f'Downloaded {pair[1]}')
+    r = s.get(
+        url,
+        headers=REQ_HEADERS
+    )
 
-        browser.close()
+    r.raise_for_status()
 
-    return [x[1] for x in targets]
+    return http_cache.record(key, r.content)
 
 
-def get_detail_urls_private(last_names=[]):
-    ''' loop over a list of last names to plug into
-        the search page and scrape the data into an intermediate file in `last_names`
+def sleep(seconds):
+    ''' `time.sleep`, but keep track of how long we spend
+        sleeping -- and don't bother when replaying from the cache
     '''
+    if http_cache.mode == 'replay':
+        return
 
-    random.shuffle(last_names)
+    stats.record('sleep', seconds)
+    time.sleep(seconds)
 
-    dir_last_names = config['private']['dir_last_names']
-    plural = 'name' if len(last_names) == 1 else 'names'
 
-    print(f'Searching {len(last_names):,} {plural} ...')
+def extract_text(crop, **kwargs):
+    with stats.timer('pdf.extract_text'):
+        return crop.extract_text(**kwargs)
 
-    finished = {}
 
+def parse_address(address):
+    ''' try to parse an address into its parts with scourgify '''
     try:
-        with sync_playwright() as p:
-            browser = p.firefox.launch(headless=False)
-            page = browser.new_page()
-            page.goto(SEARCH_URL, timeout=0)
+        with stats.timer('address.normalize'):
+            parsed_address = normalize_address_record(address)
 
-            for lname in last_names:
-                print(f'Searching {lname} ...')
+        return {
+            'address_full': address,
+            **parsed_address
+        }
+    except (
+        UnParseableAddressError,
+        AddressNormalizationError
+    ):
+        stats.count('address.unparseable')
 
-                page.locator(SELECTOR_LAST_NAME).fill(lname)
-                page.locator(SELECTOR_YEARS).select_option('0')
+        return {
+            'address_full': address
+        }
 
-                page.locator(SELECTOR_BUTTON_SEARCH).click()
-                time.sleep(1)
 
-                page.locator(SELECTOR_TABLE_ROWS).select_option('1000')
+class Record:
+    ''' Base for compact, slotted record types that convert to
+        and from the dicts in the JSON/CSV output. Keys missing
+        from the source dict stay unset, so they round-trip.
 
-                table = page.locator(SELECTOR_TABLE)
-                html = table.inner_html()
+        Subclasses list their fields in `__slots__`, any fields
+        with a small set of repeated values in `interned` and any
+        nested records in `nested`
+    '''
+    __slots__ = ()
+    interned = ()
+    nested = {}
 
-                soup = BeautifulSoup(html, 'html.parser')
-                rows = soup.find_all('tr')[1:]
-
-                if not rows:
-                    raise Exception(f'No results for {lname}')
-
-                plural = 'records' if len(rows) > 1 else 'record'
-
-                print(f'- Found {len(rows):,} {plural}')
-
-                registrations = []
-
-                for row in rows:
-                    (
-                        year,
-                        reg_no,
-                        reg_status,
-                        lobbyist_name,
-                        lobbyist_city_state_zip,
-                        lobbyist_phone_email,
-                        employer,
-                        employer_address,
-                        employer_city_state_zip
-                    ) = row.find_all('td')
-
-                    link = reg_no.find('a').get('href')
-                    url = urljoin(SEARCH_URL, link)
-
-                    detail_page_deets = {
-                        'year': int(year.text),
-                        'registration_number': reg_no.text,
-                        'url': url,
-                        'registration_status': reg_status.text,
-                        'lobbyist_name': lobbyist_name.text,
-                        'lobbyist_city_state_zip': lobbyist_city_state_zip.text,
-                        'lobbyist_phone_email': lobbyist_phone_email.text,
-                        'employer': employer.text,
-                        'employer_address': employer_address.text,
-                        'employer_city_state_zip': employer_city_state_zip.text
-                    }
-
-                    registrations.append(detail_page_deets)
-
-                urls_collected = {lname: registrations}
-
-                finished = {
-                    **finished,
-                    **urls_collected
+    def __init__(self, **kwargs):
+        for key in self.__slots__:
+            if key not in kwargs:
+                continue
+
+            val = kwargs[key]
+
+            if key in self.nested and isinstance(val, dict):
+                val = self.nested[key].from_dict(val)
+            elif key in self.interned and isinstance(val, str):
+                val = sys.intern(val)
+
+            setattr(self, key, val)
+
+    @classmethod
+    def from_dict(cls, d):
+        ''' keys that aren't fields are dropped, so stray
+            keys in the source dict don't break anything
+        '''
+        return cls(**{k: v for k, v in d.items() if k in cls.__slots__})
+
+    def to_dict(self):
+        d = {}
+
+        for key in self.__slots__:
+            if not hasattr(self, key):
+                continue
+
+            val = getattr(self, key)
+
+            if isinstance(val, Record):
+                val = val.to_dict()
+
+            d[key] = val
+
+        return d
+
+    def get(self, key, default=None):
+        ''' dict-style access, so records can stand in for the dicts '''
+        return getattr(self, key, default)
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __eq__(self, other):
+        if not isinstance(other, Record):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.to_dict()})'
+
+
+class LobbyistName(Record):
+    __slots__ = (
+        'name_full',
+        'name_prefix',
+        'name_first',
+        'name_middle',
+        'name_nickname',
+        'name_last',
+        'name_suffix'
+    )
+    interned = __slots__
+
+
+class Address(Record):
+    __slots__ = (
+        'address_full',
+        'address_line_1',
+        'address_line_2',
+        'city',
+        'state',
+        'postal_code'
+    )
+    interned = ('city', 'state', 'postal_code')
+
+
+class Filing(Record):
+    __slots__ = (
+        'filing_type',
+        'filing_date',
+        'filing_number',
+        'filing_url',
+        'filing_guid'
+    )
+    interned = ('filing_type', 'filing_date')
+
+
+class Registration(Record):
+    __slots__ = (
+        'url',
+        'registration_guid',
+        'year',
+        'registration_number',
+        'lobbyist_name',
+        'lobbyist_status',
+        'lobbyist_employment_date',
+        'lobbyist_phone',
+        'lobbyist_email',
+        'lobbyist_address',
+        'lobbyist_occupation',
+        'lobbyist_type',
+        'employer_name',
+        'employer_agent_name',
+        'employer_registration_date',
+        'employer_authorization_date',
+        'employer_lobbying_subjects',
+        'employer_registration_status',
+        'employer_address',
+        'filings',
+        'lobbyist_id',
+        'employer_id'
+    )
+    interned = (
+        'lobbyist_status',
+        'lobbyist_type',
+        'lobbyist_occupation',
+        'lobbyist_employment_date',
+        'employer_name',
+        'employer_registration_date',
+        'employer_authorization_date',
+        'employer_registration_status',
+        'lobbyist_id',
+        'employer_id'
+    )
+    nested = {
+        'lobbyist_name': LobbyistName,
+        'lobbyist_address': Address,
+        'employer_address': Address
+    }
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+        if 'filings' in kwargs:
+            self.filings = tuple(
+                x if isinstance(x, Filing) else Filing.from_dict(x)
+                for x in kwargs['filings']
+            )
+
+    def to_dict(self):
+        d = super().to_dict()
+
+        if 'filings' in d:
+            d['filings'] = [x.to_dict() for x in d['filings']]
+
+        return d
+
+
+class PDFRowPrivate(Record):
+    ''' a row from the private lobbyist PDF '''
+    __slots__ = (
+        'year',
+        'expense_report_lobbyist',
+        'expense_report_employer',
+        'address_lobbyist',
+        'lobbyist_name',
+        'employer',
+        'status'
+    )
+    interned = (
+        'year',
+        'expense_report_lobbyist',
+        'expense_report_employer',
+        'employer',
+        'status'
+    )
+    nested = {
+        'lobbyist_name': LobbyistName
+    }
+
+
+class PDFRowPublic(Record):
+    ''' a row from the public lobbyist PDF or CSV '''
+    __slots__ = (
+        'year',
+        'lobbyist_name',
+        'agency',
+        'agency_address',
+        'lobbyist_id',
+        'agency_id'
+    )
+    interned = __slots__
+
+
+def load_shards_manifest():
+    filepath = config['private']['filepath_shards_manifest']
+
+    if not filepath.exists():
+        return {}
+
+    with open(filepath, 'r') as infile:
+        return json.load(infile)
+
+
+def load_private_data(years=None):
+    ''' read the scraped private lobbyist data, only loading the
+        shards for `years` if given -- falls back to the combined
+        file if nothing has been sharded yet
+    '''
+
+    manifest = load_shards_manifest()
+
+    if not manifest:
+        with open(config['private']['filepath_data'], 'r') as infile:
+            data = json.load(infile)
+
+        if years is not None:
+            years = set([int(x) for x in years])
+            data = [x for x in data if int(x.get('year')) in years]
+
+        return data
+
+    if years is None:
+        years = manifest.keys()
+
+    data = []
+
+    # newest years first, like the combined file
+    for year in sorted([str(x) for x in years], reverse=True):
+        if year not in manifest:
+            continue
+
+        with open(config['private']['dir_shards'] / manifest[year]['filename'], 'r') as infile:
+            data.extend(json.load(infile))
+
+    return data
+
+
+def load_registrations(filepath=None, years=None):
+    ''' read the private lobbyist data into `Registration` records '''
+
+    if filepath is None:
+        return [Registration.from_dict(x) for x in load_private_data(years=years)]
+
+    with open(filepath, 'r') as infile:
+        return [Registration.from_dict(x) for x in json.load(infile)]
+
+
+class ResultsPDF:
+    ''' A PDF exported from the S.D. Secretary
+        of State's webite containing a table of data
+        on state lobbyists
+    '''
+    def __init__(self, filepath):
+        if not isinstance(filepath, Path):
+            filepath = Path(filepath)
+
+        self.filepath = filepath
+        is_private = 'private' in str(filepath)
+
+        self.report_type = 'private' if is_private else 'public'
+        self.config = config[self.report_type]
+
+        self.pdf = pdfplumber.open(self.filepath)
+
+        # column name -> (start, end) x-coordinates
+        self.line_breaks = self.detect_layout()
+
+        self.gather_crops()
+
+        self.data = []
+        self.collect_data()
+
+        # public rows added and removed since the last CSV, set by `write_data`
+        self.delta = {}
+
+        self.pdf.close()
+
+    def infer_column_breaks(self):
+        ''' find the x-coordinate where each column starts, from the
+            gaps between columns across a sample of pages: count how
+            many words cover each point across the page, then look
+            for runs of (nearly) empty points between the text
+        '''
+
+        pages = self.pdf.pages
+        first = 1 if len(pages) > 1 else 0
+
+        # evenly spaced pages, skipping the title block on the first page
+        sample = np.unique(
+            np.linspace(first, len(pages) - 1, LAYOUT_SAMPLE_PAGES).astype(int)
+        )
+
+        x0, x1 = [], []
+
+        for i in sample:
+            words = pages[i].extract_words()
+            x0.extend([x['x0'] for x in words])
+            x1.extend([x['x1'] for x in words])
+
+        if not x0:
+            return []
+
+        width = int(np.ceil(pages[first].width))
+
+        starts = np.clip(np.floor(x0).astype(int), 0, width)
+        ends = np.clip(np.ceil(x1).astype(int), 0, width)
+
+        # +1 where each word starts, -1 where it ends, so a running
+        # sum gives how many words cover each point
+        coverage = np.bincount(starts, minlength=width + 1) - np.bincount(ends, minlength=width + 1)
+        coverage = np.cumsum(coverage)[:width]
+
+        # allow for the odd stray word crossing a gap
+        empty = np.concatenate((
+            [False],
+            coverage <= max(1, len(x0) // 500),
+            [False]
+        ))
+
+        # where runs of empty points start and stop
+        edges = np.diff(empty.astype(np.int8))
+        gaps_start = np.flatnonzero(edges == 1)
+        gaps_end = np.flatnonzero(edges == -1)
+
+        # leave out the page margins, plus gaps too narrow
+        # to be anything but space between words
+        keep = (gaps_start > 0) & (gaps_end < width) & (gaps_end - gaps_start >= 4)
+
+        # columns are left aligned, so each break goes
+        # right before the text of the next column
+        return [int(x) - 1 for x in gaps_end[keep]]
+
+    def detect_layout(self):
+        ''' check the configured column breaks against the ones inferred
+            from the PDF, caching the result for the latest PDF of each
+            report type by its content hash (which, unlike the file's
+            hash, survives the "Printed on" stamp changing)
+
+            if the PDF's columns moved, parse with the inferred breaks;
+            if the number of columns changed, fall back to the configured
+            breaks -- either way, say so
+        '''
+
+        configured = self.config['pdf_vertical_lines']
+        columns = list(configured)
+        configured_breaks = [configured[x][0] for x in columns[1:]]
+
+        layouts = {}
+
+        if FILEPATH_PDF_LAYOUTS.exists():
+            with open(FILEPATH_PDF_LAYOUTS, 'r') as infile:
+                layouts = json.load(infile)
+
+        pdf_hash = pdf_content_hash(self.pdf)
+        layout = layouts.get(self.report_type)
+
+        if not layout or layout.get('sha256') != pdf_hash:
+            with stats.timer('pdf.infer_layout'):
+                inferred = self.infer_column_breaks()
+
+            if len(inferred) != len(configured_breaks):
+                status = 'unrecognized'
+                breaks = configured_breaks
+            elif all(abs(a - b) <= LAYOUT_TOLERANCE for a, b in zip(inferred, configured_breaks)):
+                status = 'ok'
+                breaks = configured_breaks
+            else:
+                status = 'moved'
+                breaks = inferred
+
+            layout = {
+                'sha256': pdf_hash,
+                'status': status,
+                'configured': configured_breaks,
+                'inferred': inferred,
+                'breaks': breaks
+            }
+
+            # only the latest PDF of each type is worth keeping
+            layouts = {
+                x: layouts[x] for x in layouts
+                if x in ('private', 'public')
+            }
+
+            layouts[self.report_type] = layout
+
+            with open(FILEPATH_PDF_LAYOUTS, 'w') as outfile:
+                json.dump(
+                    layouts,
+                    outfile,
+                    indent=4
+                )
+
+        if layout['status'] != 'ok':
+            print(f"- Column layout of {self.filepath} is {layout['status']}: configured breaks {layout['configured']}, inferred {layout['inferred']}")
+
+            stats.log(
+                'pdf.layout',
+                filepath=str(self.filepath),
+                report_type=self.report_type,
+                **layout
+            )
+
+        breaks = layout['breaks']
+
+        return {
+            column: (0 if i == 0 else breaks[i - 1],) + ((breaks[i],) if i < len(breaks) else ())
+            for i, column in enumerate(columns)
+        }
+
+    @stats.timed('pdf.get_page_crops')
+    def get_page_crops(self, page):
+        ''' given a page, get cropped sections representing each record'''
+
+        breaks = [
+            # page top
+            page.bbox[1],
+
+            # page bottom
+            page.bbox[3]
+        ]
+
+        # add the tops/bottoms of gray rectangles
+        for rect in page.rects:
+            breaks.append(rect['top'])
+            breaks.append(rect['bottom'])
+
+        # and sort
+        breaks.sort()
+
+        # get a list of overlapping pairs
+        a, b = itertools.tee(breaks)
+        next(b, None)
+
+        # and build the coordinates
+        coords = [(0, x[0], page.width, x[1]) for x in zip(a, b)]
+
+        # list to gather crops
+        crops = []
+
+        for c in coords:
+            crop = page.crop(c)
+            if extract_text(crop):
+                crops.append(crop)
+
+        return {page.page_number: crops}
+
+    def gather_crops(self):
+        ''' process the PDF to gather a list of cropped sections, each representing a single record
+         '''
+
+        data_crops = {}
+
+        for page in self.pdf.pages:
+
+            if page.page_number == 1:
+
+                # crop out top material on first page
+                # by targeting the lines above the table
+                bottom = page.lines[0].get('bottom') + 1
+
+                page = page.crop(
+                    (0, bottom, page.width, page.height)
+                )
+
+            crops = self.get_page_crops(page)
+            data_crops = {**data_crops, **crops}
+
+            page.close()
+
+        self.data_crops = data_crops
+
+        return self
+
+    def parse_data_public(self):
+        if self.report_type != 'public':
+            return
+
+        line_breaks = self.line_breaks
+
+        for page_num in self.data_crops:
+            for crop in self.data_crops[page_num]:
+
+                d = {}
+
+                for key in line_breaks:
+                    breaks = line_breaks[key]
+
+                    vertical_break_start = breaks[0]
+
+                    if key == 'agency':
+                        vertical_break_end = crop.width
+                    else:
+                        vertical_break_end = breaks[1]
+
+                    section_crop = crop.crop(
+                        (
+                            vertical_break_start,
+                            crop.bbox[1],
+                            vertical_break_end,
+                            crop.bbox[3]
+                        )
+                    )
+
+                    section_text = extract_text(section_crop, layout=True).upper()
+
+                    section_lines = [x.strip() for x in section_text.splitlines() if x.strip()]
+
+                    section_text = ' '.join(
+                        section_text.split()
+                    )
+
+                    if key == 'agency':
+
+                        d['agency'] = ' '.join(section_lines[0].split())
+
+                        agency_address = ' '.join(section_lines[1:])
+
+                        agency_address = ' '.join(agency_address.split())
+
+                        d['agency_address'] = agency_address
+                        continue
+
+                    d[key] = section_text
+
+                self.data.append(d)
+
+        # add public records mistakenly categorized as private
+        self.data.extend(
+            list(public_but_private.values())
+        )
+
+        self.data.sort(
+            key=lambda x: (x['agency'], x['year'])
+        )
+
+        return self
+
+    def parse_data_private(self):
+        if self.report_type != 'private':
+            return
+
+        line_breaks = self.line_breaks
+        data = []
+
+        for page_num in self.data_crops:
+
+            crops = self.data_crops[page_num]
+            for crop in crops:
+
+                d = {}
+
+                for key in line_breaks:
+                    breaks = line_breaks[key]
+
+                    vertical_break_start = breaks[0]
+
+                    if key == 'status':
+                        vertical_break_end = crop.width
+                    else:
+                        vertical_break_end = breaks[1]
+
+                    section_crop = crop.crop(
+                        (
+                            vertical_break_start,
+                            crop.bbox[1],
+                            vertical_break_end,
+                            crop.bbox[3]
+                        )
+                    )
+
+                    section_text = extract_text(section_crop, layout=True).upper()
+
+                    section_lines = [x.strip() for x in section_text.splitlines() if x.strip()]
+
+                    section_text = ' '.join(
+                        section_text.split()
+                    )
+
+                    if key == 'lobbyist_name':
+                        name = ' '.join(section_lines[0].split())
+
+                        name = name_fixes.get(name, name)
+
+                        address_lobbyist = ' '.join(
+                            section_lines[1:]
+                        )
+
+                        d['address_lobbyist'] = ' '.join(
+                            address_lobbyist.split()
+                        )
+
+                        parsed_name = parsed_names.get(name)
+
+                        if parsed_name:
+                            parsed_name['name_full'] = name
+                            d['lobbyist_name'] =parsed_name
+                            continue
+
+                        if 'TEST ' in name:
+                            d['skip'] = True
+                            continue
+
+                        try:
+                            with stats.timer('names.tag'):
+                                results = pp.tag(name)
+
+                            if results[1] != 'Person':
+                                raise Exception(f'Unparsed name: {name}')
+
+                            # labels we don't have a field for are dropped
+                            data_out = {
+                                name_key_map[x]: results[0].get(x)
+                                for x in results[0].keys() if x in name_key_map
+                            }
+
+                            parsed_names[name] = data_out
+
+                            data_out['name_full'] = name
+
+                            d['lobbyist_name'] = data_out
+
+                            continue
+
+                        except pp.RepeatedLabelError:
+                            raise Exception(f'Unparsed name: {name}')
+
+                    d[key] = section_text
+
+                if d.get('skip'):
+                    continue
+
+                self.data.append(d)
+
+        self.data.sort(
+            key=lambda x: (
+                x.get('lobbyist_name').get('name_last'),
+                x.get('lobbyist_name').get('name_first')
+            )
+        )
+
+        with open(FILEPATH_PARSED_NAMES, 'w') as outfile:
+            json.dump(
+                parsed_names,
+                outfile,
+                indent=4
+            )
+
+        print(f'Wrote {str(FILEPATH_PARSED_NAMES.resolve())}')
+
+        return self
+
+    def collect_data(self):
+        if not self.data_crops:
+            self.gather_crops()
+
+        if self.report_type == 'public':
+            self.parse_data_public()
+
+        if self.report_type == 'private':
+            self.parse_data_private()
+
+        return self
+
+    def write_data(self):
+        ''' only writing out public data at this stage '''
+        if self.report_type != 'public':
+            return
+
+        if not self.data:
+            self.collect_data()
+
+        with stats.timer('entities.resolve'):
+            entities = Entities()
+            entities.assign_public(self.data)
+            entities.write()
+
+        filepath_out = self.config['filepath_data'].resolve()
+
+        # compare as strings, the way they'll be read back from the CSV
+        rows = [{k: str(v) for k, v in x.items()} for x in self.data]
+
+        previous = None
+
+        if filepath_out.exists():
+            with open(filepath_out, 'r', encoding='utf-8', newline='') as infile:
+                previous = list(csv.DictReader(infile))
+
+        key_fields = ('year', 'lobbyist_name', 'agency')
+
+        # if the columns changed, every row would look added and removed
+        if previous and not set(key_fields) <= set(previous[0]):
+            print(f'- Columns of {filepath_out} changed, not diffing it')
+            stats.log('public.columns_changed', columns=list(previous[0]))
+            previous = None
+
+        if previous is not None:
+            with stats.timer('public.diff'):
+                self.delta = diff_records(
+                    previous,
+                    rows,
+                    key_fields=key_fields
+                )
+
+            write_public_changes(self.delta)
+
+        if rows == previous:
+            print(f'- No changes to {filepath_out}')
+            return self
+
+        with open(filepath_out, 'w', encoding='utf=8', newline='') as outfile:
+            writer = csv.DictWriter(
+                outfile,
+                fieldnames=list(self.data[0].keys())
+            )
+            writer.writeheader()
+            writer.writerows(self.data)
+
+        print(f'- Wrote {len(self.data):,} records to {filepath_out}')
+
+        return self
+
+    def records(self):
+        ''' `self.data` as compact slotted records '''
+        record_type = PDFRowPrivate if self.report_type == 'private' else PDFRowPublic
+        return [record_type.from_dict(x) for x in self.data]
+
+    def __str__(self):
+        return self.filepath
+
+
+class RegistrationIndex:
+    ''' A persistent lookup of registration number -> detail page GUID,
+        plus year and lobbyist name, rebuilt incrementally from the
+        last-name search results in `private/last-names`
+    '''
+    def __init__(self, filepath=FILEPATH_REGISTRATION_INDEX):
+        if not isinstance(filepath, Path):
+            filepath = Path(filepath)
+
+        self.filepath = filepath
+
+        # last-name file -> modification time when it was indexed
+        self.sources = {}
+
+        # registration number -> [guid, year, lobbyist name, employer]
+        self.registrations = {}
+
+        # whether anything's been indexed since the last write
+        self.updated = False
+
+        self.load()
+        self.update()
+
+    def load(self):
+        if not self.filepath.exists():
+            return self
+
+        with open(self.filepath, 'r') as infile:
+            data = json.load(infile)
+
+        self.sources = data.get('sources', {})
+        self.registrations = data.get('registrations', {})
+
+        return self
+
+    def update(self):
+        ''' index any last-name files that are new or
+            have changed since they were last indexed
+        '''
+
+        for filepath in config['private']['dir_last_names'].glob('*.json'):
+            mtime = filepath.stat().st_mtime_ns
+
+            if self.sources.get(filepath.name) == mtime:
+                continue
+
+            with open(filepath, 'r') as infile:
+                search_results = json.load(infile)
+
+            for lname in search_results:
+                for reg in search_results[lname]:
+                    self.add(reg)
+
+            self.sources[filepath.name] = mtime
+            self.updated = True
+
+        self.build_lookups()
+
+        return self
+
+    def add(self, registration):
+        ''' add a row scraped from the search results table '''
+
+        registration_guid = parse_qs(
+            urlparse(registration.get('url')).query
+        )['CN'][0]
+
+        self.registrations[registration.get('registration_number')] = [
+            registration_guid,
+            int(registration.get('year')),
+            normalize_text(registration.get('lobbyist_name')),
+            normalize_text(registration.get('employer'))
+        ]
+
+        return self
+
+    def build_lookups(self):
+        self.lookup_name = {}
+
+        for registration_number in self.registrations:
+            _, year, lobbyist_name, _ = self.registrations[registration_number]
+
+            key = (year, lobbyist_name)
+
+            if not self.lookup_name.get(key):
+                self.lookup_name[key] = []
+
+            self.lookup_name[key].append(registration_number)
+
+        return self
+
+    def get(self, registration_number):
+        ''' return the indexed record for a registration number, if any '''
+
+        if registration_number not in self.registrations:
+            return {}
+
+        guid, year, lobbyist_name, employer = self.registrations[registration_number]
+
+        return {
+            'registration_number': registration_number,
+            'registration_guid': guid,
+            'url': f'{REGISTRATION_URL}?CN={guid}',
+            'year': year,
+            'lobbyist_name': lobbyist_name,
+            'employer': employer
+        }
+
+    def find(self, year, lobbyist_name, employer=None):
+        ''' return indexed records for a lobbyist in a given year,
+            optionally narrowed to an employer -- the employer column
+            in the PDF has the address tacked on, so match on prefix
+        '''
+
+        key = (int(year), normalize_text(lobbyist_name))
+
+        records = [self.get(x) for x in self.lookup_name.get(key, [])]
+
+        if employer:
+            employer = normalize_text(employer)
+            records = [x for x in records if x['employer'] and employer.startswith(x['employer'])]
+
+        return records
+
+    def write(self):
+        with open(self.filepath, 'w') as outfile:
+            json.dump(
+                {
+                    'sources': self.sources,
+                    'registrations': self.registrations
+                },
+                outfile
+            )
+
+        self.updated = False
+
+        print(f'- Wrote {str(self.filepath)}')
+
+        return self
+
+    def __len__(self):
+        return len(self.registrations)
+
+
+class RegistrationStore:
+    ''' The scraped private lobbyist registrations, loaded once as
+        `Registration` records and indexed by GUID, registration
+        number, lobbyist, employer, year and registration date
+    '''
+    def __init__(self, registrations=[]):
+        self.registrations = [
+            x if isinstance(x, Registration) else Registration.from_dict(x)
+            for x in registrations
+        ]
+        self.build_indexes()
+
+    def build_indexes(self):
+        self.lookup_guid = {}
+        self.lookup_number = {}
+        self.lookup_lobbyist = {}
+        self.lookup_employer = {}
+        self.lookup_year = {}
+
+        indexes = (
+            (self.lookup_number, lambda x: x.get('registration_number')),
+            (self.lookup_lobbyist, lambda x: x.get('lobbyist_name').get('name_full')),
+            (self.lookup_employer, lambda x: x.get('employer_name')),
+            (self.lookup_year, lambda x: int(x.get('year')))
+        )
+
+        dated = []
+
+        for i, reg in enumerate(self.registrations):
+            self.lookup_guid[reg.get('registration_guid')] = i
+
+            for lookup, get_key in indexes:
+                key = get_key(reg)
+
+                if not lookup.get(key):
+                    lookup[key] = []
+
+                lookup[key].append(i)
+
+            if reg.get('employer_registration_date'):
+                dated.append((reg.get('employer_registration_date'), i))
+
+        # ISO dates sort as strings
+        dated.sort()
+
+        self.dates = [x[0] for x in dated]
+        self.date_positions = [x[1] for x in dated]
+
+        return self
+
+    def get(self, registration_guid):
+        ''' the registration with this GUID, or None '''
+
+        i = self.lookup_guid.get(registration_guid)
+
+        if i is None:
+            return None
+
+        return self.registrations[i]
+
+    def find(self, registration_number=None, lobbyist_name=None, employer_name=None, year=None):
+        ''' registrations matching every filter given '''
+
+        filters = (
+            (self.lookup_number, registration_number),
+            (self.lookup_lobbyist, lobbyist_name),
+            (self.lookup_employer, employer_name),
+            (self.lookup_year, None if year is None else int(year))
+        )
+
+        positions = None
+
+        for lookup, key in filters:
+            if key is None:
+                continue
+
+            matches = set(lookup.get(key, []))
+            positions = matches if positions is None else positions & matches
+
+        if positions is None:
+            return list(self.registrations)
+
+        return [self.registrations[i] for i in sorted(positions)]
+
+    def registered_between(self, start=None, end=None):
+        ''' registrations with an `employer_registration_date`
+            from `start` through `end` (ISO dates), oldest first
+        '''
+
+        lo = 0 if start is None else bisect.bisect_left(self.dates, start)
+        hi = len(self.dates) if end is None else bisect.bisect_right(self.dates, end)
+
+        return [self.registrations[i] for i in self.date_positions[lo:hi]]
+
+    def years_by_lobbyist(self):
+        ''' lobbyist name -> list of registration years '''
+        return {
+            name: [self.registrations[i].get('year') for i in self.lookup_lobbyist[name]]
+            for name in self.lookup_lobbyist
+        }
+
+    def __len__(self):
+        return len(self.registrations)
+
+    def __iter__(self):
+        return iter(self.registrations)
+
+
+NAME_SUFFIXES = {'JR', 'SR', 'II', 'III', 'IV'}
+
+# honorifics, which the public file sometimes puts
+# after the surname ("OEDEKOVEN DR. DUSTIN")
+NAME_PREFIXES = {'DR', 'MR', 'MRS', 'MS', 'MISS', 'REV', 'HON'}
+
+# credentials tacked on after a name, with the periods taken out
+NAME_CREDENTIALS = {
+    'BCBA', 'CPA', 'DDS', 'DO', 'DVM', 'EDD', 'ESQ', 'JD', 'LPC', 'MA',
+    'MD', 'NCC', 'OD', 'PE', 'PHARMD', 'PHD', 'RN'
+}
+
+# shorter surnames are too likely to be someone else
+# with a surname one letter off, e.g. "MORAN"/"MORGAN"
+SURNAME_TYPO_MIN_LENGTH = 6
+
+# short forms of given names -> the full names they're short for,
+# so "MATT" matches "MATTHEW" but "CHRIS" doesn't match "CHRISTIE"
+NAME_NICKNAMES = {
+    'ALEX': ('ALEXANDER', 'ALEXANDRA', 'ALEXIS'),
+    'ALLI': ('ALLISON', 'ALLYSON'),
+    'ALLY': ('ALLISON', 'ALLYSON'),
+    'ANDY': ('ANDREW',),
+    'BEN': ('BENJAMIN',),
+    'BETH': ('ELIZABETH', 'BETHANY'),
+    'BILL': ('WILLIAM',),
+    'BILLY': ('WILLIAM',),
+    'BOB': ('ROBERT',),
+    'BOBBY': ('ROBERT',),
+    'BRAD': ('BRADLEY',),
+    'CAM': ('CAMERON',),
+    'CHRIS': ('CHRISTOPHER', 'CHRISTINA', 'CHRISTINE'),
+    'CLINT': ('CLINTON',),
+    'CURT': ('CURTIS',),
+    'DAN': ('DANIEL',),
+    'DANNY': ('DANIEL',),
+    'DAVE': ('DAVID',),
+    'DEB': ('DEBORAH', 'DEBRA'),
+    'DEBBIE': ('DEBORAH', 'DEBRA'),
+    'DICK': ('RICHARD',),
+    'DON': ('DONALD',),
+    'DOUG': ('DOUGLAS',),
+    'ED': ('EDWARD',),
+    'FRAN': ('FRANCES',),
+    'GREG': ('GREGORY',),
+    'HERB': ('HERBERT',),
+    'JEFF': ('JEFFREY',),
+    'JEN': ('JENNIFER',),
+    'JENN': ('JENNIFER',),
+    'JERRY': ('GERALD',),
+    'JIM': ('JAMES',),
+    'JOE': ('JOSEPH',),
+    'JON': ('JONATHAN',),
+    'JOSH': ('JOSHUA',),
+    'KEN': ('KENNETH',),
+    'KIM': ('KIMBERLY',),
+    'KRIS': ('KRISTEN', 'KRISTIN', 'KRISTINA', 'KRISTOPHER'),
+    'LARRY': ('LAWRENCE',),
+    'LES': ('LESLIE',),
+    'MARV': ('MARVIN',),
+    'MATT': ('MATTHEW',),
+    'MIKE': ('MICHAEL',),
+    'MITCH': ('MITCHELL',),
+    'NATE': ('NATHAN', 'NATHANIEL'),
+    'NATHAN': ('NATHANIEL',),
+    'NICK': ('NICHOLAS',),
+    'PAT': ('PATRICK', 'PATRICIA'),
+    'RICH': ('RICHARD',),
+    'RICK': ('RICHARD',),
+    'ROB': ('ROBERT',),
+    'ROBBIE': ('ROBERT',),
+    'ROD': ('RODNEY',),
+    'RON': ('RONALD',),
+    'RONNIE': ('RONALD',),
+    'RUSS': ('RUSSELL',),
+    'SAM': ('SAMUEL', 'SAMANTHA'),
+    'STEVE': ('STEVEN', 'STEPHEN'),
+    'TED': ('THEODORE', 'EDWARD'),
+    'TIM': ('TIMOTHY',),
+    'TOM': ('THOMAS',),
+    'TOMMY': ('THOMAS',),
+    'TONY': ('ANTHONY',),
+    'WILL': ('WILLIAM',),
+    'ZAC': ('ZACHARY',),
+    'ZACH': ('ZACHARY',)
+}
+
+EMPLOYER_STOPWORDS = {
+    'THE', 'OF', 'AND', 'FOR', 'A', 'AN', 'INC', 'INCORPORATED', 'LLC', 'LLP',
+    'LTD', 'CO', 'CORP', 'CORPORATION', 'COMPANY', 'PC', 'PLLC'
+}
+
+EMPLOYER_ABBREVIATIONS = {
+    'ASSN': 'ASSOCIATION',
+    'ASSOC': 'ASSOCIATION',
+    'ASSOCIATIONS': 'ASSOCIATION',
+    'DEPT': 'DEPARTMENT',
+    'NATL': 'NATIONAL',
+    'SD': 'SOUTH DAKOTA',
+    'SO': 'SOUTH',
+    'DAK': 'DAKOTA',
+    'INTL': 'INTERNATIONAL',
+    'US': 'UNITED STATES',
+    'USA': 'UNITED STATES'
+}
+
+
+def person_tokens(name):
+    ''' "MATTHEW S. MCCAULLEY JR" -> ['MATTHEW', 'S', 'MCCAULLEY'],
+        "DR. DUSTIN OEDEKOVEN, DVM" and "OEDEKOVEN DR. DUSTIN"
+        -> ['DUSTIN', 'OEDEKOVEN']
+    '''
+
+    name = unicodedata.normalize('NFKD', name.upper())
+
+    # whatever comes after a comma is a suffix or credentials
+    name = name.split(',')[0]
+
+    # "M.D." -> "MD"
+    name = name.replace('.', '')
+
+    tokens = re.sub(r'[^A-Z ]', ' ', name).split()
+    tokens = [x for x in tokens if x not in NAME_SUFFIXES]
+
+    prefixes = [i for i, x in enumerate(tokens) if x in NAME_PREFIXES]
+
+    if prefixes and len(tokens) - len(prefixes) >= 2:
+        i = prefixes[0]
+
+        # "SURNAME DR FIRST" -> "FIRST SURNAME"
+        tokens = tokens[i + 1:] + tokens[:i]
+        tokens = [x for x in tokens if x not in NAME_PREFIXES]
+
+    while len(tokens) > 2 and tokens[-1] in NAME_CREDENTIALS:
+        tokens = tokens[:-1]
+
+    # the public file's "SURNAME FIRST M." -> "FIRST M SURNAME"
+    if len(tokens) > 2 and len(tokens[-1]) == 1 and len(tokens[0]) > 1:
+        tokens = tokens[1:] + tokens[:1]
+
+    # someone who goes by their middle name ("J. ROBERT SMITH")
+    while len(tokens) > 2 and len(tokens[0]) == 1:
+        tokens = tokens[1:]
+
+    return tokens
+
+
+def same_given_name(a, b):
+    ''' "MATT"/"MATTHEW" or "KRIS"/"KRISTIN", going by `NAME_NICKNAMES` '''
+
+    if a == b:
+        return True
+
+    full_a = set(NAME_NICKNAMES.get(a, ()))
+    full_b = set(NAME_NICKNAMES.get(b, ()))
+
+    return a in full_b or b in full_a or bool(full_a & full_b)
+
+
+def person_blocking_keys(tokens):
+    ''' surname + first initial, and first name + surname initial
+        to catch typos in the surname
+    '''
+
+    if not tokens:
+        return []
+
+    first, last = tokens[0], tokens[-1]
+
+    return [
+        f'{last} {first[0]}',
+        f'{first} {last[0]}'
+    ]
+
+
+def employer_tokens(name):
+    ''' "S.D. Retailers Assn., Inc." -> ['SOUTH', 'DAKOTA', 'RETAILERS', 'ASSOCIATION'] '''
+
+    name = name.upper().replace('&', ' AND ').replace('.', '')
+    tokens = []
+
+    for token in re.sub(r'[^A-Z0-9 ]', ' ', name).split():
+        tokens.extend(
+            EMPLOYER_ABBREVIATIONS.get(token, token).split()
+        )
+
+    significant = [x for x in tokens if x not in EMPLOYER_STOPWORDS]
+
+    return significant or tokens
+
+
+def employer_blocking_keys(tokens):
+    ''' the first and the longest significant tokens '''
+
+    if not tokens:
+        return []
+
+    return list(set([
+        tokens[0],
+        max(tokens, key=len)
+    ]))
+
+
+def person_similarity(a, b):
+    ''' names match on the same surname and a similar first name
+        ("JOSH"/"JOSHUA"), or the same first name and a surname
+        that's off by a typo (see `surname_typo`) -- but never
+        if both have middle names and they start with different letters
+    '''
+
+    tokens_a, tokens_b = a.split(), b.split()
+    first_a, last_a = tokens_a[0], tokens_a[-1]
+    first_b, last_b = tokens_b[0], tokens_b[-1]
+
+    middle_a, middle_b = tokens_a[1:-1], tokens_b[1:-1]
+
+    if middle_a and middle_b and middle_a[0][0] != middle_b[0][0]:
+        return 0.0
+
+    if last_a == last_b:
+        if first_a == first_b:
+            return 1.0
+
+        if same_given_name(first_a, first_b):
+            return 0.95
+
+        return SequenceMatcher(None, first_a, first_b).ratio()
+
+    if first_a == first_b and surname_typo(last_a, last_b):
+        return 0.95
+
+    return 0.0
+
+
+def surname_typo(a, b):
+    ''' whether two surnames differ by a doubled letter ("MCCAULEY"/"MCCAULLEY")
+        or two swapped letters ("PETERSON"/"PETESRON") -- and nothing
+        else, so "MORAN"/"MORGAN" and "JOHNSON"/"JOHNSTON" stay apart
+    '''
+
+    if min(len(a), len(b)) < SURNAME_TYPO_MIN_LENGTH:
+        return False
+
+    short, long = sorted([a, b], key=len)
+
+    if len(long) - len(short) == 1:
+        return any(
+            long[:i] + long[i + 1:] == short
+            for i in range(1, len(long))
+            if long[i] == long[i - 1]
+        )
+
+    if len(long) == len(short):
+        diffs = [i for i in range(len(long)) if long[i] != short[i]]
+
+        return (
+            len(diffs) == 2 and diffs[1] == diffs[0] + 1
+            and long[diffs[0]] == short[diffs[1]]
+            and long[diffs[1]] == short[diffs[0]]
+        )
+
+    return False
+
+
+def employer_similarity(a, b):
+    ''' employers match on the same set of significant tokens, or
+        the same number of tokens with a typo or two between them --
+        so "DAKOTA STATE UNIVERSITY" doesn't swallow "SOUTH DAKOTA STATE UNIVERSITY"
+    '''
+
+    tokens_a, tokens_b = a.split(), b.split()
+
+    if set(tokens_a) == set(tokens_b):
+        return 1.0
+
+    if len(tokens_a) != len(tokens_b):
+        return 0.0
+
+    return SequenceMatcher(None, a, b).ratio()
+
+
+class EntityResolver:
+    ''' Assigns stable IDs to the names of one kind of entity
+        (lobbyists or employers). A new name variant is only compared
+        with known variants that share a blocking key, and every
+        variant seen is remembered, so later lookups are a dict hit
+    '''
+    def __init__(self, prefix, tokenize, blocking_keys, similarity, threshold, data={}):
+        self.prefix = prefix
+        self.tokenize = tokenize
+        self.blocking_keys = blocking_keys
+        self.similarity = similarity
+        self.threshold = threshold
+
+        self.next_id = data.get('next_id', 1)
+
+        # name as it appears in the data -> ID
+        self.names = data.get('names', {})
+
+        # normalized variant -> the contexts (e.g. a year and employer)
+        # it shows up in -- two variants that share a context are
+        # different entities, so they're never merged
+        self.contexts = {}
+
+        self.build_variants()
+
+    def build_variants(self):
+        # normalized variant -> ID, and blocking key -> normalized variants
+        self.variants = {}
+        self.blocks = {}
+
+        for name in self.names:
+            self.add_variant(name, self.names[name])
+
+        return self
+
+    def normalize(self, name):
+        return ' '.join(self.tokenize(name))
+
+    def add_context(self, name, context):
+        if name:
+            self.contexts.setdefault(self.normalize(name), set()).add(context)
+
+        return self
+
+    def conflicts(self, variant_a, variant_b):
+        ''' whether two different variants show up in the same context '''
+
+        if variant_a == variant_b:
+            return False
+
+        return bool(self.contexts.get(variant_a, set()) & self.contexts.get(variant_b, set()))
+
+    def unmerge_conflicts(self):
+        ''' forget names that were matched to an entity one of its
+            other names shares a context with, so they're resolved
+            again -- the first name seen keeps the ID
+        '''
+
+        kept = {}
+        forgotten = []
+
+        for name, entity_id in self.names.items():
+            variant = self.normalize(name)
+            others = kept.setdefault(entity_id, [])
+
+            if any(self.conflicts(variant, x) for x in others):
+                forgotten.append(name)
+                continue
+
+            others.append(variant)
+
+        if forgotten:
+            for name in forgotten:
+                del self.names[name]
+
+            stats.count(f'entities.unmerged_{self.prefix}', len(forgotten))
+            self.build_variants()
+
+        return self
+
+    def add_variant(self, name, entity_id):
+        variant = self.normalize(name)
+
+        if variant in self.variants:
+            return self
+
+        self.variants[variant] = entity_id
+
+        for key in self.blocking_keys(variant.split()):
+            if not self.blocks.get(key):
+                self.blocks[key] = set()
+
+            self.blocks[key].add(variant)
+
+        return self
+
+    def resolve(self, name):
+        ''' the ID for a name, matching it to a known entity or minting a new ID '''
+
+        if not name:
+            return None
+
+        if name in self.names:
+            return self.names[name]
+
+        variant = self.normalize(name)
+        entity_id = self.variants.get(variant)
+
+        if not entity_id:
+            candidates = set()
+
+            for key in self.blocking_keys(variant.split()):
+                candidates |= self.blocks.get(key, set())
+
+            stats.count('entities.comparisons', len(candidates))
+
+            best_score = 0
+
+            for candidate in candidates:
+                if self.conflicts(variant, candidate):
+                    continue
+
+                score = self.similarity(variant, candidate)
+
+                if score >= self.threshold and score > best_score:
+                    best_score = score
+                    entity_id = self.variants[candidate]
+
+        if not entity_id:
+            entity_id = f'{self.prefix}{self.next_id:06d}'
+            self.next_id += 1
+            stats.count(f'entities.new_{self.prefix}')
+
+        self.names[name] = entity_id
+        self.add_variant(name, entity_id)
+
+        return entity_id
+
+    def to_dict(self):
+        return {
+            'next_id': self.next_id,
+            'names': self.names
+        }
+
+
+class Entities:
+    ''' The lobbyist and employer resolvers, cached
+        in `FILEPATH_ENTITIES` between runs
+    '''
+    def __init__(self, filepath=FILEPATH_ENTITIES):
+        self.filepath = filepath
+
+        data = {}
+
+        if self.filepath.exists():
+            with open(self.filepath, 'r') as infile:
+                data = json.load(infile)
+
+        self.lobbyists = EntityResolver(
+            'L',
+            person_tokens,
+            person_blocking_keys,
+            person_similarity,
+            0.9,
+            data=data.get('lobbyists', {})
+        )
+
+        # public agencies share the employer ID space
+        self.employers = EntityResolver(
+            'E',
+            employer_tokens,
+            employer_blocking_keys,
+            employer_similarity,
+            0.92,
+            data=data.get('employers', {})
+        )
+
+    def assign_private(self, registrations=[]):
+        ''' add `lobbyist_id` and `employer_id` to scraped registrations '''
+
+        for reg in registrations:
+            self.lobbyists.add_context(
+                reg.get('lobbyist_name').get('name_full'),
+                f"{reg.get('year')}|{normalize_text(reg.get('employer_name'))}"
+            )
+
+        self.lobbyists.unmerge_conflicts()
+
+        for reg in registrations:
+            reg['lobbyist_id'] = self.lobbyists.resolve(
+                reg.get('lobbyist_name').get('name_full')
+            )
+            reg['employer_id'] = self.employers.resolve(
+                reg.get('employer_name')
+            )
+
+        return registrations
+
+    def assign_public(self, records=[]):
+        ''' add `lobbyist_id` and `agency_id` to public lobbyist records '''
+
+        for record in records:
+            self.lobbyists.add_context(
+                record.get('lobbyist_name'),
+                f"{record.get('year')}|{normalize_text(record.get('agency'))}"
+            )
+
+        self.lobbyists.unmerge_conflicts()
+
+        for record in records:
+            record['lobbyist_id'] = self.lobbyists.resolve(
+                record.get('lobbyist_name')
+            )
+            record['agency_id'] = self.employers.resolve(
+                record.get('agency')
+            )
+
+        return records
+
+    def write(self):
+        with open(self.filepath, 'w') as outfile:
+            json.dump(
+                {
+                    'lobbyists': self.lobbyists.to_dict(),
+                    'employers': self.employers.to_dict()
+                },
+                outfile,
+                indent=4
+            )
+
+        print(f'- Wrote {str(self.filepath)}')
+
+        return self
+
+
+class BrowserSession:
+    ''' One headless Firefox, launched the first time it's needed and
+        shared by everything in the run that drives the search page.
+        Each page gets its own context, with images, stylesheets,
+        fonts and media blocked.
+    '''
+
+    def __init__(self, headless=BROWSER_HEADLESS, blocked_resources=BROWSER_BLOCKED_RESOURCES):
+        self.headless = headless
+        self.blocked_resources = blocked_resources
+        self.playwright = None
+        self.browser = None
+
+    def start(self):
+        if self.browser:
+            return self
+
+        with stats.timer('browser.launch'):
+            self.playwright = sync_playwright().start()
+
+            try:
+                self.browser = self.playwright.firefox.launch(headless=self.headless)
+            except Exception:
+                # otherwise the next start() trips over the old event loop
+                self.playwright.stop()
+                self.playwright = None
+                raise
+
+        stats.count('browser.launches')
+
+        return self
+
+    def route(self, route):
+        if route.request.resource_type in self.blocked_resources:
+            stats.count('browser.blocked_requests')
+            return route.abort()
+
+        return route.continue_()
+
+    def new_page(self):
+        ''' a page in a fresh context, so pages don't share cookies or view state '''
+
+        self.start()
+
+        context = self.browser.new_context(accept_downloads=True)
+        context.route('**/*', self.route)
+
+        return context.new_page()
+
+    def search(self, page, **fields):
+        ''' fill in the search form and wait for the results table '''
+
+        for selector, value in fields.items():
+            page.locator(selector).fill(value)
+
+        page.locator(SELECTOR_YEARS).select_option('0')
+
+        # the page is reused from search to search, so tag the
+        # table that's already there and wait for one without the tag
+        page.evaluate(
+            '''selector => {
+                const table = document.querySelector(selector)
+
+                if (table) {
+                    table.setAttribute('data-stale', '')
+                }
+            }''',
+            SELECTOR_TABLE
+        )
+
+        page.locator(SELECTOR_BUTTON_SEARCH).click()
+
+        page.locator(f'{SELECTOR_TABLE}:not([data-stale])').wait_for(timeout=0)
+
+        return page
+
+    def choose(self, page, selector):
+        ''' click a radio button and, if it posts the form back,
+            wait for the page it posts back to
+        '''
+
+        radio = page.locator(selector)
+
+        posts_back = radio.evaluate(
+            "x => /__doPostBack/.test(x.getAttribute('onclick') || '')"
+        )
+
+        if posts_back:
+            page.evaluate('() => { window.__stale = true }')
+
+        radio.click()
+
+        if posts_back:
+            page.wait_for_function('() => !window.__stale', timeout=0)
+            page.wait_for_load_state()
+
+        return page
+
+    def close(self):
+        if self.browser:
+            self.browser.close()
+            self.playwright.stop()
+
+        self.browser = None
+        self.playwright = None
+
+        return self
+
+    def restart(self):
+        return self.close().start()
+
+
+browser_session = None
+
+
+def get_browser_session():
+    global browser_session
+
+    if browser_session is None:
+        browser_session = BrowserSession()
+
+    return browser_session
+
+
+def close_browser_session():
+    if browser_session is not None:
+        browser_session.close()
+
+
+def download_pdfs():
+    ''' Downloads PDFs with lists of public and private lobbyists,
+        exporting both at once from separate browser contexts
+    '''
+
+    targets = [(config[x]['selector_radio'], config[x]['filepath_pdf']) for x in config]
+
+    if http_cache.mode == 'replay':
+        for pair in targets:
+            Path(pair[1]).write_bytes(
+                http_cache.replay(HTTPCache.request_key('EXPORT', pair[0]))
+            )
+
+            print(f'Replayed {pair[1]}')
+
+        return [x[1] for x in targets]
+
+    session = get_browser_session()
+    pages = []
+
+    for pair in targets:
+        page = session.new_page()
+        page.goto(SEARCH_URL, timeout=0)
+
+        session.choose(page, pair[0])
+        session.search(page)
+
+        pages.append(page)
+
+    # kick off both exports, then wait for both downloads
+    with stats.timer('browser.export_pdf'):
+        with ExitStack() as stack:
+            downloads = []
+
+            for page in pages:
+                downloads.append(
+                    stack.enter_context(page.expect_download(timeout=0))
+                )
+
+                page.locator(SELECTOR_BUTTON_PRINT).click(timeout=0)
+
+        for pair, download_info, page in zip(targets, downloads, pages):
+            download_info.value.save_as(pair[1])
+
+            http_cache.record(
+                HTTPCache.request_key('EXPORT', pair[0]),
+                Path(pair[1]).read_bytes()
+            )
+
+            print(f'Downloaded {pair[1]}')
+
+            page.context.close()
+
+    return [x[1] for x in targets]
+
+
+def pdf_content_hash(pdf):
+    ''' given an open pdfplumber PDF, a hash of its page contents,
+        leaving out the metadata and "Printed on" timestamp that
+        change with every export even when the data doesn't
+    '''
+
+    h = hashlib.sha256()
+
+    for page in PDFPage.create_pages(pdf.doc):
+        for stream in page.contents:
+            h.update(
+                RE_PDF_PRINTED_ON.sub(b'', resolve1(stream).get_data())
+            )
+
+    return h.hexdigest()
+
+
+def pdf_fingerprint(filepath):
+    ''' the size and content hash of a PDF '''
+
+    with pdfplumber.open(filepath) as pdf:
+        sha256 = pdf_content_hash(pdf)
+
+    return {
+        'size': Path(filepath).stat().st_size,
+        'sha256': sha256
+    }
+
+
+def probe_pdfs():
+    ''' compare the freshly exported PDFs with the ones
+        from the last complete run
+
+        returns a dict with `changed` (a list of lobbyist
+        types whose PDF changed) and `fingerprints`
+    '''
+
+    previous = {}
+
+    if FILEPATH_PROBE.exists():
+        with open(FILEPATH_PROBE, 'r') as infile:
+            previous = json.load(infile)
+
+    fingerprints = {}
+    changed = []
+
+    with stats.timer('probe.fingerprint'):
+        for lobbyist_type in config:
+            fingerprints[lobbyist_type] = pdf_fingerprint(
+                config[lobbyist_type]['filepath_pdf']
+            )
+
+            if previous.get(lobbyist_type, {}).get('sha256') != fingerprints[lobbyist_type]['sha256']:
+                changed.append(lobbyist_type)
+
+    stats.log(
+        'probe',
+        changed=changed,
+        **{f'{x}_sha256': fingerprints[x]['sha256'] for x in fingerprints},
+        **{f'{x}_size': fingerprints[x]['size'] for x in fingerprints}
+    )
+
+    return {
+        'changed': changed,
+        'fingerprints': fingerprints
+    }
+
+
+def write_probe(fingerprints={}):
+    with open(FILEPATH_PROBE, 'w') as outfile:
+        json.dump(
+            fingerprints,
+            outfile,
+            indent=4
+        )
+
+    print(f'- Wrote {str(FILEPATH_PROBE)}')
+
+    return FILEPATH_PROBE
+
+
+def get_detail_urls_private(last_names=[]):
+    ''' loop over a list of last names to plug into
+        the search page and scrape the data into an intermediate file in `last_names`
+    '''
+
+    random.shuffle(last_names)
+
+    dir_last_names = config['private']['dir_last_names']
+    plural = 'name' if len(last_names) == 1 else 'names'
+
+    print(f'Searching {len(last_names):,} {plural} ...')
+
+    finished = {}
+
+    replaying = http_cache.mode == 'replay'
+
+    session = get_browser_session()
+    page = None
+
+    try:
+        if not replaying:
+            page = session.new_page()
+            page.goto(SEARCH_URL, timeout=0)
+
+        for lname in last_names:
+            print(f'Searching {lname} ...')
+
+            search_start = time.perf_counter()
+
+            cache_key = HTTPCache.request_key('SEARCH', lname)
+
+            if replaying:
+                html = http_cache.replay(cache_key).decode('utf-8')
+            else:
+                session.search(page, **{SELECTOR_LAST_NAME: lname})
+
+                page.locator(SELECTOR_TABLE_ROWS).select_option('1000')
+
+                table = page.locator(SELECTOR_TABLE)
+                html = table.inner_html()
+
+                http_cache.record(cache_key, html.encode('utf-8'))
+
+            stats.record('browser.search', time.perf_counter() - search_start)
+            stats.count('browser.searches')
+
+            soup = BeautifulSoup(html, 'html.parser')
+            rows = soup.find_all('tr')[1:]
+
+            if not rows:
+                raise Exception(f'No results for {lname}')
+
+            plural = 'records' if len(rows) > 1 else 'record'
+
+            print(f'- Found {len(rows):,} {plural}')
+
+            registrations = []
+
+            for row in rows:
+                (
+                    year,
+                    reg_no,
+                    reg_status,
+                    lobbyist_name,
+                    lobbyist_city_state_zip,
+                    lobbyist_phone_email,
+                    employer,
+                    employer_address,
+                    employer_city_state_zip
+                ) = row.find_all('td')
+
+                link = reg_no.find('a').get('href')
+                url = urljoin(SEARCH_URL, link)
+
+                detail_page_deets = {
+                    'year': int(year.text),
+                    'registration_number': reg_no.text,
+                    'url': url,
+                    'registration_status': reg_status.text,
+                    'lobbyist_name': lobbyist_name.text,
+                    'lobbyist_city_state_zip': lobbyist_city_state_zip.text,
+                    'lobbyist_phone_email': lobbyist_phone_email.text,
+                    'employer': employer.text,
+                    'employer_address': employer_address.text,
+                    'employer_city_state_zip': employer_city_state_zip.text
+                }
+
+                registrations.append(detail_page_deets)
+
+            urls_collected = {lname: registrations}
+
+            finished = {
+                **finished,
+                **urls_collected
+            }
+
+            filepath_url_detail = dir_last_names / f'{lname}.json'
+
+            with open(filepath_url_detail, 'w') as outfile:
+                json.dump(
+                    urls_collected,
+                    outfile,
+                    indent=4
+                )
+
+            print(f'- Wrote {filepath_url_detail}')
+            print()
+
+            sleep(random.uniform(1, 3))
+
+        if page:
+            page.context.close()
+    except LookupError:
+        # missing from the cache, so retrying won't help
+        raise
+    except Exception as e:
+        print(e)
+        stats.count('browser.errors')
+        sleep(5)
+        print('\n😅 Ope! Rebooting ...\n')
+
+        if not replaying:
+            session.restart()
+
+        unfinished = [x for x in last_names if x not in finished.keys()]
+
+        random.shuffle(unfinished)
+        finished.update(
+            get_detail_urls_private(last_names=unfinished)
+        )
+
+    return finished
+
+
+class DirectoryPageStore:
+    ''' Registration detail pages stored as one HTML
+        file per registration GUID in a folder
+    '''
+    def __init__(self, folder):
+        self.folder = Path(folder)
+
+    def filepath(self, registration_guid):
+        return self.folder / f'{registration_guid}.html'
+
+    def guids(self):
+        return sorted([x.stem for x in self.folder.glob('*.html')])
+
+    def exists(self, registration_guid):
+        return self.filepath(registration_guid).exists()
+
+    def read(self, registration_guid):
+        with open(self.filepath(registration_guid), 'r') as infile:
+            return infile.read()
+
+    def write(self, registration_guid, html):
+        with open(self.filepath(registration_guid), 'w') as outfile:
+            outfile.write(html)
+
+        return self
+
+    def flush(self):
+        return self
+
+    def compact_if_needed(self):
+        return self
+
+    def __len__(self):
+        return len(self.guids())
+
+
+class ArchivePageStore:
+    ''' Registration detail pages packed into a single file as
+        separate gzip frames, with a JSON index of GUID -> [offset,
+        length]. Reads are random-access through a memory map.
+
+        Frames are only ever appended, so the index on disk always
+        points at complete frames even if a run dies before the
+        index is written; a refreshed page leaves its old frame
+        behind until `compact()` reclaims the space.
+    '''
+
+    # compact once this share of the archive is old frames
+    compact_threshold = 0.5
+
+    def __init__(self, filepath):
+        self.filepath = Path(filepath)
+        self.filepath_index = self.filepath.with_name(f'{self.filepath.name}.json')
+
+        # written by `compact()` before the new archive is swapped in
+        self.filepath_tmp = self.filepath.with_name(f'{self.filepath.name}.tmp')
+        self.filepath_index_compacted = self.filepath.with_name(f'{self.filepath.name}.compacted.json')
+
+        self.recover()
+
+        self.filepath.touch(exist_ok=True)
+
+        self.index = {}
+
+        if self.filepath_index.exists():
+            with open(self.filepath_index, 'r') as infile:
+                # older indexes also had a third, unused "capacity"
+                self.index = {
+                    k: v[:2] for k, v in json.load(infile).items()
+                }
+
+        self.mm = None
+        self.unflushed = 0
+
+    def recover(self):
+        ''' finish a compaction that was cut off partway '''
+
+        if not self.filepath_index_compacted.exists():
+            self.filepath_tmp.unlink(missing_ok=True)
+            return self
+
+        if self.filepath_tmp.exists():
+            self.filepath_tmp.replace(self.filepath)
+
+        self.filepath_index_compacted.replace(self.filepath_index)
+
+        return self
+
+    def map(self):
+        if self.mm is None and self.filepath.stat().st_size:
+            with open(self.filepath, 'rb') as infile:
+                self.mm = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+
+        return self.mm
+
+    def unmap(self):
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+
+        return self
+
+    def guids(self):
+        return sorted(self.index)
+
+    def exists(self, registration_guid):
+        return registration_guid in self.index
+
+    def read(self, registration_guid):
+        offset, length = self.index[registration_guid]
+        frame = self.map()[offset:offset + length]
+        return gzip.decompress(frame).decode('utf-8')
+
+    def write(self, registration_guid, html):
+        frame = gzip.compress(html.encode('utf-8'), mtime=0)
+
+        # the memory map can't see past its original size
+        self.unmap()
+
+        with open(self.filepath, 'ab') as outfile:
+            offset = outfile.tell()
+            outfile.write(frame)
+
+        self.index[registration_guid] = [offset, len(frame)]
+
+        # write the index every so often so a crash doesn't orphan much
+        self.unflushed += 1
+
+        if self.unflushed >= 50:
+            self.flush()
+
+        return self
+
+    def flush(self):
+        ''' write the index, swapping it in whole so it's never half-written '''
+
+        filepath_tmp = self.filepath_index.with_name(f'{self.filepath_index.name}.tmp')
+
+        with open(filepath_tmp, 'w') as outfile:
+            json.dump(self.index, outfile)
+            outfile.flush()
+            os.fsync(outfile.fileno())
+
+        filepath_tmp.replace(self.filepath_index)
+
+        self.unflushed = 0
+
+        return self
+
+    def garbage(self):
+        ''' bytes taken up by frames the index no longer points to '''
+        return self.filepath.stat().st_size - sum([x[1] for x in self.index.values()])
+
+    def compact_if_needed(self):
+        size = self.filepath.stat().st_size
+
+        if size and self.garbage() / size >= self.compact_threshold:
+            print(f'Compacting {str(self.filepath)} ...')
+            self.compact()
+
+        return self
+
+    def compact(self):
+        ''' rewrite the archive without the old
+            frames left behind by refreshed pages
+        '''
+
+        self.flush()
+
+        index = {}
+
+        with open(self.filepath_tmp, 'wb') as outfile:
+            for registration_guid in self.guids():
+                offset, length = self.index[registration_guid]
+                index[registration_guid] = [outfile.tell(), length]
+                outfile.write(self.map()[offset:offset + length])
+
+            outfile.flush()
+            os.fsync(outfile.fileno())
+
+        self.unmap()
+
+        # once the new index is on disk, `recover()` can
+        # finish the swap if we die before it's done
+        with open(self.filepath_index_compacted, 'w') as outfile:
+            json.dump(index, outfile)
+            outfile.flush()
+            os.fsync(outfile.fileno())
+
+        self.index = index
+        self.recover()
+
+        return self
+
+    def import_directory(self, folder):
+        ''' pack the pages from a `DirectoryPageStore` folder '''
+
+        source = DirectoryPageStore(folder)
+
+        for registration_guid in source.guids():
+            if not self.exists(registration_guid):
+                self.write(registration_guid, source.read(registration_guid))
+
+        self.flush()
+
+        return self
+
+    def __len__(self):
+        return len(self.index)
+
+
+page_store = None
+
+
+def get_page_store():
+    ''' the detail page storage backend set in the config '''
+
+    global page_store
+
+    if page_store is not None:
+        return page_store
+
+    config_private = config['private']
+
+    if config_private['page_storage'] == 'directory':
+        page_store = DirectoryPageStore(config_private['dir_pages'])
+        return page_store
+
+    page_store = ArchivePageStore(config_private['filepath_pages_archive'])
+
+    # first run with the archive: pack any pages downloaded before
+    if not len(page_store) and any(config_private['dir_pages'].glob('*.html')):
+        print(f"Packing {config_private['dir_pages']} into {config_private['filepath_pages_archive']} ...")
+        page_store.import_directory(config_private['dir_pages'])
+
+    return page_store
+
+
+@stats.timed('scrape.registration_page')
+def scrape_registration_page(registration_guid, html=None):
+    ''' scrape a registration detail page, reading it
+        from the page store unless `html` is passed in
+    '''
+
+    if html is None:
+        html = get_page_store().read(registration_guid)
+
+    soup = BeautifulSoup(html, 'html.parser')
+
+    # skip if actually a public lobbyist
+    if registration_guid in public_but_private.keys():
+        return {}
+
+    d = {
+        'url': f'{REGISTRATION_URL}?CN={registration_guid}',
+        'registration_guid': registration_guid
+    }
+
+    reg_id_block_text = soup.find(
+        'span', 
+        {'id': 'ctl00_MainContent_lblRegistrationNo'}
+    ).text
+
+    year, rest = reg_id_block_text.split('-')
+    _, registration_num = rest.split(':')
+
+    d['year'] = int(year)
+    d['registration_number'] = ' '.join(registration_num.split())
+
+    span_map = {
+        'lobbyist_name': 'ctl00_MainContent_txtLobbyistName',
+        'lobbyist_status': 'ctl00_MainContent_txtStatus',
+        'lobbyist_employment_date': 'ctl00_MainContent_txtEmploymentDate',
+        'lobbyist_phone': 'ctl00_MainContent_txtPhone',
+        'lobbyist_email': 'ctl00_MainContent_txtEmail',
+        'lobbyist_address': 'ctl00_MainContent_txtResidenceAddress',
+        'lobbyist_occupation': 'ctl00_MainContent_txtOccupation',
+        'lobbyist_type': 'ctl00_MainContent_txtType',
+        'employer_name': 'ctl00_MainContent_txtEmployerName',
+        'employer_agent_name': 'ctl00_MainContent_txtAgentName',
+        'employer_registration_date': 'ctl00_MainContent_txtRegistrationDate',
+        'employer_authorization_date': 'ctl00_MainContent_txtAuthorizationDate',
+        'employer_lobbying_subjects': 'ctl00_MainContent_txtSubject',
+        'employer_registration_status': 'ctl00_MainContent_txtRegistrationStatus',
+        'employer_address': 'ctl00_MainContent_txtEmployerAddress'
+    }
+
+    for key in span_map:
+        val = soup.find(
+            'span',
+            {'id': span_map[key]}
+        )
+
+        val_txt = ' '.join(
+            val.text.split()
+        ).upper()
+
+        if val_txt and '_date' in key:
+            val_txt = datetime.strptime(
+                val_txt,
+                '%m/%d/%Y'
+            ).date().isoformat()
+
+        if val and '_address' in key:
+            val_txt = val.get_text(
+                strip=True,
+                separator='\n'
+            ).splitlines()
+            val_txt = ' '.join(val_txt).upper()
+
+        d[key] = val_txt
+
+    lobbyist_name = ' '.join(
+        d['lobbyist_name'].split()
+    ).upper()
+
+    name_parsed = parsed_names.get(lobbyist_name)
+
+    d['lobbyist_name'] = {
+        'name_full': lobbyist_name,
+        **name_parsed
+    }
+
+    d['lobbyist_address'] = parse_address(d['lobbyist_address'])
+    d['employer_address'] = parse_address(d['employer_address'])
+
+    # apply date fixes, if any
+    if date_fixes.get(d['registration_guid']):
+        d = {
+            **d,
+            **date_fixes.get(d['registration_guid'])
+        }
+
+    table = soup.find('table')
+    rows = table.find_all('tr')[1:]
+
+    filings = []
+
+    for row in rows:
+        doc = {}
+
+        # "filing detail", the last item in the row, is always blank
+        filing_type, filing_date, document_number, _ = row.find_all('td')
+
+        doc['filing_type'] = ' '.join(
+            filing_type.text.split()
+        )
+
+        if filing_date:
+            doc['filing_date'] = datetime.strptime(
+                filing_date.text.strip(),
+                '%m/%d/%Y'
+            ).date().isoformat()
+
+        doc['filing_number'] = ' '.join(
+            document_number.text.split()
+        )
+
+        doc_link = document_number.find('a')
+
+        if doc_link:
+            document_url = urljoin(
+                FILING_BASE_URL,
+                Path(doc_link.get('href')).name
+            )
+
+            doc['filing_url'] = document_url
+
+            document_url_parsed = urlparse(document_url)
+            doc_id = parse_qs(document_url_parsed.query)['id'][0]
+
+            doc['filing_guid'] = doc_id
+
+        filings.append(doc)
+
+    d['filings'] = filings
+
+    return d
+
+
+class FormCatalog:
+    ''' Every disclosure form we've downloaded, keyed by filing GUID,
+        with its size, sha256, when it was downloaded and the
+        registration it came from.
+
+        Loaded once per run and checked against the forms folder
+        in one pass, so forms that went missing or were cut off
+        mid-download get fetched again.
+    '''
+
+    def __init__(self, filepath=None, folder=None):
+        self.filepath = Path(filepath or config['private']['filepath_forms_catalog'])
+        self.folder = Path(folder or config['private']['dir_forms'])
+
+        self.data = {}
+        self.updated = False
+
+        if self.filepath.exists():
+            with open(self.filepath, 'r') as infile:
+                self.data = json.load(infile)
+
+        # what we already had before this run, including forms
+        # that get downloaded again because they're missing or cut off
+        self.known = set(self.data)
+
+        self.verify()
+
+        self.known.update(self.data)
+
+    @staticmethod
+    def is_complete(body):
+        ''' whether a PDF looks whole: a header up front and an end-of-file marker at the end '''
+        return body[:5] == b'%PDF-' and b'%%EOF' in body[-1024:]
+
+    def filepath_form(self, filing_guid):
+        return self.folder / f'{filing_guid}.pdf'
+
+    def add(self, filing_guid, body=None, registration_guid=None, filing_url=None, downloaded=None):
+        ''' catalog a form, writing `body` to the forms folder if it's passed in '''
+
+        filepath = self.filepath_form(filing_guid)
+
+        if body is not None:
+            filepath.write_bytes(body)
+
+        entry = self.data.get(filing_guid, {})
+
+        self.data[filing_guid] = {
+            'size': filepath.stat().st_size,
+            'sha256': hash_file(filepath),
+            'downloaded': downloaded or datetime.now().isoformat(timespec='seconds'),
+            'registration_guid': registration_guid or entry.get('registration_guid'),
+            'filing_url': filing_url or entry.get('filing_url')
+        }
+
+        self.updated = True
+
+        return self.data[filing_guid]
+
+    def verify(self):
+        ''' one pass over the forms folder: drop entries whose PDF
+            is gone or isn't the size we recorded, and catalog any
+            complete PDFs that aren't in the catalog yet
+        '''
+
+        self.folder.mkdir(exist_ok=True)
+
+        sizes = {}
+
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                if entry.name.endswith('.pdf'):
+                    sizes[entry.name[:-4]] = entry.stat()
+
+        for filing_guid in list(self.data):
+            stat = sizes.get(filing_guid)
+
+            if not stat or stat.st_size != self.data[filing_guid]['size']:
+                del self.data[filing_guid]
+                self.updated = True
+                stats.count('forms.invalid')
+
+        for filing_guid in sizes:
+            if filing_guid in self.data:
+                continue
+
+            filepath = self.filepath_form(filing_guid)
+
+            with open(filepath, 'rb') as infile:
+                head = infile.read(5)
+                infile.seek(max(sizes[filing_guid].st_size - 1024, 0))
+                tail = infile.read()
+
+            if not self.is_complete(head + tail):
+                stats.count('forms.invalid')
+                continue
+
+            self.add(
+                filing_guid,
+                downloaded=datetime.fromtimestamp(sizes[filing_guid].st_mtime).isoformat(timespec='seconds')
+            )
+
+        return self
+
+    def missing(self, filings=[]):
+        ''' GUIDs of filings that link to a form we don't have '''
+        return sorted(
+            set([x.get('filing_guid') for x in filings if x.get('filing_guid')]) - set(self.data)
+        )
+
+    def new(self):
+        ''' GUIDs of forms cataloged since this run started '''
+        return set(self.data) - self.known
+
+    def write(self):
+        if not self.updated:
+            return self.filepath
+
+        with open(self.filepath, 'w') as outfile:
+            json.dump(
+                dict(sorted(self.data.items())),
+                outfile,
+                indent=4
+            )
+
+        self.updated = False
+
+        print(f'- Wrote {str(self.filepath)}')
+
+        return self.filepath
+
+    def __len__(self):
+        return len(self.data)
+
+
+def download_forms(filings={}, catalog=None):
+    ''' download the disclosure forms in `filings`, a dict of
+        filing GUID -> filing, that aren't in the catalog yet
+
+        returns a list of the GUIDs downloaded
+    '''
+
+    if catalog is None:
+        catalog = FormCatalog()
+
+    # fill in where forms that were already on disk came from
+    for filing_guid in catalog.data:
+        entry = catalog.data[filing_guid]
+
+        if not entry.get('registration_guid') and filing_guid in filings:
+            entry['registration_guid'] = filings[filing_guid].get('registration_guid')
+            entry['filing_url'] = filings[filing_guid].get('filing_url')
+            catalog.updated = True
+
+    missing = catalog.missing(filings.values())
+    downloaded = []
+
+    plural = 'form' if len(missing) == 1 else 'forms'
+    print(f'Downloading {len(missing):,} disclosure {plural} ...')
+
+    for filing_guid in missing:
+        filing = filings[filing_guid]
+
+        with stats.timer('http.fetch_filing'):
+            body = http_get(
+                filing['filing_url'],
+                backoff_factor=0.2
+            )
+
+        sleep(random.uniform(1, 3))
+
+        # leave it out of the catalog so it gets tried again next time
+        if not catalog.is_complete(body):
+            stats.count('forms.incomplete')
+            print(f'- Incomplete PDF for {filing_guid}, skipping')
+            continue
+
+        catalog.add(
+            filing_guid,
+            body=body,
+            registration_guid=filing.get('registration_guid'),
+            filing_url=filing.get('filing_url')
+        )
+
+        stats.count('http.filings_downloaded')
+        downloaded.append(filing_guid)
+
+        print(f'- Wrote {str(catalog.filepath_form(filing_guid))}')
+
+        # don't lose track of what's downloaded if the run dies
+        if len(downloaded) % 50 == 0:
+            catalog.write()
+
+    catalog.write()
+
+    return downloaded
+
+
+def scrape_private_data():
+    data_out = []
+
+    # filing GUID -> filing, plus who filed it
+    filings = {}
+
+    store = get_page_store()
+
+    for registration_guid in store.guids():
+
+        scraped_data = scrape_registration_page(
+            registration_guid,
+            html=store.read(registration_guid)
+        )
+
+        # skip if this is actually a public lobbyist record
+        if not scraped_data:
+            continue
+
+        for filing in scraped_data.get('filings'):
+            if filing.get('filing_guid'):
+                filings[filing['filing_guid']] = {
+                    **filing,
+                    'registration_guid': registration_guid,
+                    'lobbyist_name': scraped_data.get('lobbyist_name').get('name_full'),
+                    'employer_name': scraped_data.get('employer_name')
                 }
 
-                filepath_url_detail = dir_last_names / f'{lname}.json'
+        data_out.append(scraped_data)
+
+    catalog = FormCatalog()
+
+    with stats.timer('stage.download_forms'):
+        download_forms(filings, catalog=catalog)
+
+    # anything the catalog didn't have at the start of the run
+    new_filings = [filings[x] for x in sorted(catalog.new()) if x in filings]
+
+    with stats.timer('entities.resolve'):
+        entities = Entities()
+        entities.assign_private(data_out)
+        entities.write()
+
+    # sort by `employer_registration_date`, the most consistent date for a registration record
+    data_out.sort(
+        key=lambda x: (
+            x['year'],
+            x['employer_registration_date']
+        ),
+        reverse=True
+    )
+
+    with stats.timer('changes.record'):
+        change_log = ChangeLog()
+        changes = change_log.record(data_out)
+        change_log.write()
+
+    stats.count('changes.recorded', len(changes))
+
+    # every registration, not just the ones in the change log --
+    # unchanged ones are skipped, and this catches up on any
+    # changes a failed run logged but never got to here
+    with stats.timer('aggregates.update'):
+        aggregates = Aggregates()
+        guids = set([x['registration_guid'] for x in data_out])
+
+        aggregates.update(
+            data_out,
+            removed=[x for x in aggregates.contributions if x not in guids]
+        )
+
+        aggregates.write()
+
+    write_private_data(data_out)
+
+    return {
+        'scraped_data': data_out,
+        'new_filings': new_filings
+    }
+
+
+def write_private_data(data=[]):
+    ''' write the scraped registrations out as one shard per year,
+        skipping shards whose contents haven't changed, then the
+        combined file if `write_combined` is set
+
+        returns a list of the years that were rewritten
+    '''
+
+    config_private = config['private']
+    config_private['dir_shards'].mkdir(exist_ok=True)
+
+    manifest = load_shards_manifest()
+
+    by_year = {}
+
+    for reg in data:
+        year = str(reg.get('year'))
+
+        if not by_year.get(year):
+            by_year[year] = []
+
+        by_year[year].append(reg)
+
+    changed_years = []
+
+    for year in by_year:
+        shard = json.dumps(by_year[year], indent=4)
+        shard_hash = hashlib.sha256(shard.encode('utf-8')).hexdigest()
+
+        filename = f'south-dakota-lobbyists-private-{year}.json'
+        filepath = config_private['dir_shards'] / filename
+
+        if manifest.get(year, {}).get('sha256') == shard_hash and filepath.exists():
+            continue
+
+        with open(filepath, 'w') as outfile:
+            outfile.write(shard)
+
+        manifest[year] = {
+            'filename': filename,
+            'sha256': shard_hash,
+            'count': len(by_year[year])
+        }
+
+        changed_years.append(year)
+
+        print(f'- Wrote {str(filepath)}')
+
+    # drop shards for years that disappeared
+    for year in [x for x in manifest if x not in by_year]:
+        (config_private['dir_shards'] / manifest[year]['filename']).unlink(missing_ok=True)
+        del manifest[year]
+        changed_years.append(year)
+
+    with open(config_private['filepath_shards_manifest'], 'w') as outfile:
+        json.dump(
+            dict(sorted(manifest.items())),
+            outfile,
+            indent=4
+        )
+
+    stats.count('shards.written', len(changed_years))
+
+    fpath = config_private['filepath_data'].resolve()
+
+    if config_private['write_combined'] and (changed_years or not fpath.exists()):
+        with open(fpath, 'w') as outfile:
+            json.dump(
+                data,
+                outfile,
+                indent=4
+            )
+
+        print(f'Wrote {str(fpath)}')
+
+    return changed_years
+
+
+class ChangeLog:
+    ''' An append-only log of what changed in each registration
+        between scrapes. The first time a registration is seen
+        the whole record is logged; after that, only the fields
+        that changed, plus any filings added or removed.
+
+        Replaying the log rebuilds a registration as of any date.
+    '''
+
+    def __init__(self, filepath=FILEPATH_CHANGE_LOG):
+        self.filepath = Path(filepath)
+
+        # every event in the log, oldest first
+        self.events = []
+
+        # events recorded this run that haven't been written yet
+        self.pending = []
+
+        # registration_guid -> latest known state
+        self.current = {}
+
+        self.load()
+
+    @staticmethod
+    def filing_key(filing):
+        return filing.get('filing_guid') or filing.get('filing_number')
+
+    @classmethod
+    def apply(cls, state, event):
+        ''' apply one event to a registration's state, returning the new state '''
+
+        if event['type'] == 'created':
+            return json.loads(json.dumps(event['record']))
+
+        if event['type'] == 'removed' or state is None:
+            return None
+
+        state = {**state}
+
+        for key, (_, new) in event.get('changes', {}).items():
+            state[key] = new
+
+        for key in event.get('unset', []):
+            state.pop(key, None)
+
+        removed = set(event.get('filings_removed', []))
+
+        if removed or event.get('filings_added'):
+            filings = [x for x in state.get('filings', []) if cls.filing_key(x) not in removed]
+            state['filings'] = filings + event.get('filings_added', [])
+
+        return state
+
+    def load(self):
+        if not self.filepath.exists():
+            return self
+
+        with open(self.filepath, 'r') as infile:
+            for line in infile:
+                if not line.strip():
+                    continue
+
+                event = json.loads(line)
+                self.events.append(event)
+
+                guid = event['registration_guid']
+                state = self.apply(self.current.get(guid), event)
+
+                if state is None:
+                    self.current.pop(guid, None)
+                else:
+                    self.current[guid] = state
+
+        return self
+
+    def diff(self, old, new):
+        ''' the field-level changes from one version of a registration to the next '''
+
+        event = {}
+
+        changes = {}
+        unset = []
+
+        for key in new:
+            if key == 'filings':
+                continue
+
+            if key not in old or old[key] != new[key]:
+                changes[key] = [old.get(key), new[key]]
+
+        for key in old:
+            if key != 'filings' and key not in new:
+                unset.append(key)
+
+        old_filings = {self.filing_key(x): x for x in old.get('filings', [])}
+        new_filings = {self.filing_key(x): x for x in new.get('filings', [])}
+
+        filings_added = [new_filings[x] for x in new_filings if old_filings.get(x) != new_filings[x]]
+        filings_removed = [x for x in old_filings if old_filings[x] != new_filings.get(x)]
+
+        if changes:
+            event['changes'] = changes
+
+        if unset:
+            event['unset'] = unset
+
+        if filings_added:
+            event['filings_added'] = filings_added
+
+        if filings_removed:
+            event['filings_removed'] = filings_removed
+
+        return event
+
+    def add(self, event):
+        self.events.append(event)
+        self.pending.append(event)
+
+        guid = event['registration_guid']
+        state = self.apply(self.current.get(guid), event)
+
+        if state is None:
+            self.current.pop(guid, None)
+        else:
+            self.current[guid] = state
+
+        return event
+
+    def record(self, registrations=[], date=None):
+        ''' compare a full scrape of registrations with the latest
+            known state of each one and log whatever changed
+
+            returns a list of the events logged
+        '''
+
+        date = date or NOW.isoformat(timespec='seconds')
+
+        events = []
+        seen = set()
+
+        for reg in registrations:
+            if isinstance(reg, Record):
+                reg = reg.to_dict()
+
+            # round-trip so the comparison sees what we'd read back
+            reg = json.loads(json.dumps(reg))
+
+            guid = reg['registration_guid']
+            seen.add(guid)
+
+            previous = self.current.get(guid)
+
+            if previous is None:
+                events.append(self.add({
+                    'registration_guid': guid,
+                    'date': date,
+                    'type': 'created',
+                    'record': reg
+                }))
+                continue
+
+            delta = self.diff(previous, reg)
+
+            if delta:
+                events.append(self.add({
+                    'registration_guid': guid,
+                    'date': date,
+                    'type': 'changed',
+                    **delta
+                }))
+
+        for guid in [x for x in self.current if x not in seen]:
+            events.append(self.add({
+                'registration_guid': guid,
+                'date': date,
+                'type': 'removed'
+            }))
+
+        return events
+
+    def write(self):
+        ''' append the events recorded this run to the log '''
+
+        if not self.pending:
+            return self.filepath
+
+        with open(self.filepath, 'a') as outfile:
+            for event in self.pending:
+                outfile.write(json.dumps(event) + '\n')
+
+        print(f'- Wrote {len(self.pending):,} changes to {str(self.filepath)}')
+
+        self.pending = []
+
+        return self.filepath
+
+    def as_of(self, registration_guid, date):
+        ''' rebuild a registration as it stood on `date`, an ISO
+            date or datetime string -- None if it didn't exist yet
+        '''
+
+        # a bare date includes everything logged that day
+        if len(date) == 10:
+            date = f'{date}T23:59:59'
+
+        state = None
+
+        for event in self.events:
+            if event['date'] > date:
+                break
+
+            if event['registration_guid'] == registration_guid:
+                state = self.apply(state, event)
+
+        return state
+
+    def last_changed(self):
+        ''' registration_guid -> date of its most recent change '''
+        return {
+            x['registration_guid']: x['date']
+            for x in self.events
+            if x['type'] == 'changed'
+        }
+
+    def history(self, registration_guid):
+        ''' every event logged for one registration, oldest first '''
+        return [x for x in self.events if x['registration_guid'] == registration_guid]
+
+    def changes_between(self, start=None, end=None, types=('changed', 'created', 'removed')):
+        ''' events logged between two ISO dates, inclusive '''
+
+        if end and len(end) == 10:
+            end = f'{end}T23:59:59'
+
+        return [
+            x for x in self.events
+            if x['type'] in types
+            and (not start or x['date'] >= start)
+            and (not end or x['date'] <= end)
+        ]
+
+    def __len__(self):
+        return len(self.events)
+
+
+class Aggregates:
+    ''' Counts and date ranges per employer and year, per lobbyist
+        and year and per filing type and year, plus overall totals.
+
+        Each registration's contribution to the counts is kept, so
+        when a registration changes, its old contribution comes off
+        and the new one goes on, without a pass over everything else.
+        The results are written out as small tables in `DIR_SUMMARY`.
+    '''
+
+    tables = ('employers', 'lobbyists', 'filing_types')
+
+    def __init__(self, filepath=FILEPATH_AGGREGATES, folder=DIR_SUMMARY):
+        self.filepath = Path(filepath)
+        self.folder = Path(folder)
+
+        # registration_guid -> what it adds to the counts
+        self.contributions = {}
+
+        # table -> cell key -> counts
+        self.cells = {x: {} for x in self.tables}
+
+        self.totals = {
+            'registrations': 0,
+            'registrations_without_filings': 0,
+            'filings': 0,
+            'registration_dates': {}
+        }
+
+        self.updated = False
+
+        if self.filepath.exists():
+            with open(self.filepath, 'r') as infile:
+                d = json.load(infile)
+
+            self.contributions = d['contributions']
+            self.cells = d['cells']
+            self.totals = d['totals']
+
+    @staticmethod
+    def contribution(reg):
+        if isinstance(reg, Record):
+            reg = reg.to_dict()
+
+        lobbyist_name = reg.get('lobbyist_name').get('name_full')
+
+        return {
+            'year': str(reg.get('year')),
+            'lobbyist': reg.get('lobbyist_id') or lobbyist_name,
+            'lobbyist_name': lobbyist_name,
+            'employer': reg.get('employer_id') or reg.get('employer_name'),
+            'employer_name': reg.get('employer_name'),
+            'date': reg.get('employer_registration_date') or None,
+            'filings': [
+                [x.get('filing_type'), x.get('filing_date')]
+                for x in reg.get('filings', [])
+            ]
+        }
+
+    @staticmethod
+    def tally(counts, key, sign):
+        ''' add `sign` to a count in a dict of counts, dropping it at zero '''
+
+        if key is None:
+            return
+
+        counts[key] = counts.get(key, 0) + sign
+
+        if not counts[key]:
+            del counts[key]
+
+    def cell(self, table, key, **fields):
+        cells = self.cells[table]
+
+        if key not in cells:
+            cells[key] = {
+                **fields,
+                'registrations': 0,
+                'filings': 0,
+                'members': {},
+                'dates': {}
+            }
+
+        cells[key].update(fields)
+
+        return cells[key]
+
+    def apply(self, c, sign):
+        ''' add (sign=1) or take away (sign=-1) one registration's contribution '''
+
+        year = c['year']
+        filing_count = len(c['filings'])
+
+        employer = self.cell(
+            'employers',
+            f"{c['employer']}|{year}",
+            employer=c['employer'],
+            employer_name=c['employer_name'],
+            year=year
+        )
+
+        lobbyist = self.cell(
+            'lobbyists',
+            f"{c['lobbyist']}|{year}",
+            lobbyist=c['lobbyist'],
+            lobbyist_name=c['lobbyist_name'],
+            year=year
+        )
+
+        touched = [
+            ('employers', f"{c['employer']}|{year}"),
+            ('lobbyists', f"{c['lobbyist']}|{year}")
+        ]
+
+        for cell, member in ((employer, c['lobbyist']), (lobbyist, c['employer'])):
+            cell['registrations'] += sign
+            cell['filings'] += sign * filing_count
+            self.tally(cell['members'], member, sign)
+            self.tally(cell['dates'], c['date'], sign)
+
+        for filing_type, filing_date in c['filings']:
+            key = f'{filing_type}|{year}'
+
+            cell = self.cell(
+                'filing_types',
+                key,
+                filing_type=filing_type,
+                year=year
+            )
+
+            cell['filings'] += sign
+            self.tally(cell['dates'], filing_date, sign)
+
+            touched.append(('filing_types', key))
+
+        self.totals['registrations'] += sign
+        self.totals['filings'] += sign * filing_count
+
+        if not filing_count:
+            self.totals['registrations_without_filings'] += sign
+
+        self.tally(self.totals['registration_dates'], c['date'], sign)
+
+        # drop cells with nothing left in them
+        for table, key in touched:
+            cell = self.cells[table].get(key)
+
+            if cell and not cell['registrations'] and not cell['filings']:
+                del self.cells[table][key]
+
+        self.updated = True
+
+        return self
+
+    def update(self, registrations=[], removed=[]):
+        ''' fold in new or changed registrations and drop removed ones '''
+
+        for reg in registrations:
+            c = self.contribution(reg)
+            guid = reg.get('registration_guid')
+            previous = self.contributions.get(guid)
+
+            if previous == c:
+                continue
+
+            if previous:
+                self.apply(previous, -1)
+
+            self.apply(c, 1)
+            self.contributions[guid] = c
+
+        for guid in removed:
+            if guid in self.contributions:
+                self.apply(self.contributions.pop(guid), -1)
+
+        return self
+
+    def date_range(self, start=None, end=None):
+        ''' the earliest and latest registration dates from `start` through `end` '''
+
+        dates = [
+            x for x in self.totals['registration_dates']
+            if (not start or x >= start) and (not end or x <= end)
+        ]
+
+        if not dates:
+            return None, None
+
+        return min(dates), max(dates)
+
+    def rows(self, table):
+        ''' one summary row per cell, with counts and first/last dates '''
+
+        rows = []
+
+        for cell in self.cells[table].values():
+            row = {x: cell[x] for x in cell if x not in ('members', 'dates', 'registrations', 'filings', 'employer', 'lobbyist')}
+
+            if table == 'employers':
+                row = {'employer_id': cell['employer'], **row, 'registrations': cell['registrations'], 'lobbyists': len(cell['members'])}
+            elif table == 'lobbyists':
+                row = {'lobbyist_id': cell['lobbyist'], **row, 'registrations': cell['registrations'], 'employers': len(cell['members'])}
+
+            row['filings'] = cell['filings']
+            row['first_date'] = min(cell['dates']) if cell['dates'] else ''
+            row['last_date'] = max(cell['dates']) if cell['dates'] else ''
+
+            rows.append(row)
+
+        rows.sort(key=lambda x: (x['year'], str(list(x.values())[0])))
+
+        return rows
+
+    def write(self):
+        if not self.updated and self.filepath.exists():
+            return self.filepath
+
+        with open(self.filepath, 'w') as outfile:
+            json.dump(
+                {
+                    'contributions': self.contributions,
+                    'cells': self.cells,
+                    'totals': self.totals
+                },
+                outfile,
+                separators=(',', ':')
+            )
+
+        self.folder.mkdir(exist_ok=True)
+
+        for table in self.tables:
+            rows = self.rows(table)
+            filepath = self.folder / f"{table.replace('_', '-')}-by-year.csv"
+
+            with open(filepath, 'w', encoding='utf-8', newline='') as outfile:
+                if rows:
+                    writer = csv.DictWriter(
+                        outfile,
+                        fieldnames=list(rows[0].keys())
+                    )
+                    writer.writeheader()
+                    writer.writerows(rows)
+
+            print(f'- Wrote {str(filepath)}')
+
+        filepath_totals = self.folder / 'totals.json'
+
+        with open(filepath_totals, 'w') as outfile:
+            json.dump(
+                {
+                    'registrations': self.totals['registrations'],
+                    'registrations_without_filings': self.totals['registrations_without_filings'],
+                    'filings': self.totals['filings']
+                },
+                outfile,
+                indent=4
+            )
+
+        print(f'- Wrote {str(filepath_totals)}')
+
+        self.updated = False
+
+        return self.filepath
+
+
+def hash_file(filepath, chunk_size=1024 * 1024):
+    ''' sha256 of a file's contents, read in chunks '''
+
+    h = hashlib.sha256()
+
+    with open(filepath, 'rb') as infile:
+        for chunk in iter(lambda: infile.read(chunk_size), b''):
+            h.update(chunk)
+
+    return h.hexdigest()
+
+
+def clean_form_key(label):
+    ''' "Lobbyist Name:" -> "lobbyist_name" '''
+    return '_'.join(re.sub(r'[^a-z0-9 ]', ' ', label.lower()).split())
+
+
+def parse_amount(text):
+    ''' "$1,234.50" -> 1234.5, or None if it isn't an amount '''
+
+    match = re.fullmatch(
+        r'\(?\$?\s*(-?[\d,]*\.?\d+)\)?',
+        ' '.join(str(text).split())
+    )
+
+    if not match:
+        return None
+
+    amount = float(match.group(1).replace(',', ''))
+
+    if str(text).strip().startswith('('):
+        amount = -amount
+
+    return amount
+
+
+def parse_form_table(table):
+    ''' turn a table pulled from a disclosure form into a list of
+        dicts keyed on its header row, with parsed amounts
+    '''
+
+    rows = [
+        [' '.join(str(cell or '').split()) for cell in row]
+        for row in table
+    ]
+
+    rows = [x for x in rows if any(x)]
+
+    if len(rows) < 2:
+        return []
+
+    header = [clean_form_key(x) or f'column_{i}' for i, x in enumerate(rows[0])]
+    records = []
+
+    for row in rows[1:]:
+        record = dict(zip(header, row))
+
+        for key in header:
+            if 'amount' in key or 'total' in key or 'cost' in key:
+                amount = parse_amount(record.get(key, ''))
+
+                if amount is not None:
+                    record[key] = amount
+
+        records.append(record)
+
+    return records
+
+
+def parse_disclosure_form(filepath):
+    ''' pull the filer, reporting period and itemized expense
+        tables out of a lobbyist disclosure form PDF
+    '''
+
+    if not isinstance(filepath, Path):
+        filepath = Path(filepath)
+
+    d = {
+        'filing_guid': filepath.stem,
+        'fields': {},
+        'period_start': None,
+        'period_end': None,
+        'expenses': []
+    }
+
+    lines = []
+
+    with pdfplumber.open(filepath) as pdf:
+        d['page_count'] = len(pdf.pages)
+
+        for page in pdf.pages:
+            text = page.extract_text() or ''
+            lines.extend(
+                [' '.join(x.split()) for x in text.splitlines() if x.strip()]
+            )
+
+            for table in page.extract_tables():
+                d['expenses'].extend(
+                    parse_form_table(table)
+                )
+
+            # let go of the parsed page objects as we go
+            page.close()
+
+    # "Label: value" lines on the form
+    for line in lines:
+        label, sep, value = line.partition(':')
+
+        if not sep or not value.strip() or len(label) > 60:
+            continue
+
+        key = clean_form_key(label)
+
+        if key and key not in d['fields']:
+            d['fields'][key] = value.strip().upper()
+
+    text = '\n'.join(lines)
+
+    period = re.search(
+        r'(\d{1,2}/\d{1,2}/\d{4})\s*(?:-|TO|THROUGH|THRU)\s*(\d{1,2}/\d{1,2}/\d{4})',
+        text.upper()
+    )
+
+    if period:
+        d['period_start'], d['period_end'] = [
+            datetime.strptime(x, '%m/%d/%Y').date().isoformat()
+            for x in period.groups()
+        ]
+
+    d['filer'] = {
+        key: d['fields'][key] for key in d['fields']
+        if 'lobbyist' in key or 'employer' in key or 'filer' in key
+    }
+
+    d['expense_total'] = sum(
+        [x.get('amount') for x in d['expenses'] if isinstance(x.get('amount'), float)]
+    )
+
+    # many of the older forms are scans with no text layer
+    d['has_text'] = bool(lines)
+    d['text'] = text
+
+    return d
+
+
+def parse_disclosure_form_cached(args):
+    ''' process pool worker: parse one form and write the
+        result to the cache, returning only the cache path
+        so results don't pile up in the parent process
+    '''
+
+    filepath, file_hash = args
+
+    filepath_cache = config['private']['dir_forms_parsed'] / f'{file_hash}.json'
+
+    try:
+        d = parse_disclosure_form(filepath)
+        d['sha256'] = file_hash
+    except Exception as e:
+        # cache the failure too, so a broken
+        # form isn't retried every run
+        d = {
+            'filing_guid': Path(filepath).stem,
+            'sha256': file_hash,
+            'error': str(e)
+        }
+
+    with open(filepath_cache, 'w') as outfile:
+        json.dump(d, outfile)
+
+    return str(filepath_cache)
+
+
+def get_form_hashes(filepaths=[]):
+    ''' hashes of each form PDF, reusing the stored
+        hash when a file's size and mtime haven't changed
+    '''
+
+    filepath_hashes = config['private']['dir_forms_parsed'] / 'hashes.json'
+
+    known = {}
+
+    if filepath_hashes.exists():
+        with open(filepath_hashes, 'r') as infile:
+            known = json.load(infile)
+
+    hashes = {}
+
+    for filepath in filepaths:
+        file_stat = filepath.stat()
+        signature = [file_stat.st_size, file_stat.st_mtime_ns]
+
+        stored = known.get(filepath.name)
+
+        if stored and stored[:2] == signature:
+            hashes[filepath.name] = stored
+            continue
+
+        hashes[filepath.name] = [*signature, hash_file(filepath)]
+
+    with open(filepath_hashes, 'w') as outfile:
+        json.dump(hashes, outfile)
+
+    return {x: hashes[x][2] for x in hashes}
+
+
+def parse_disclosure_forms(workers=None, chunksize=8):
+    ''' parse every downloaded disclosure form across a process
+        pool, skipping forms whose contents were already parsed,
+        then stream the results out to a JSON lines file
+    '''
+
+    dir_parsed = config['private']['dir_forms_parsed']
+    dir_parsed.mkdir(exist_ok=True)
+
+    filepaths = sorted(config['private']['dir_forms'].glob('*.pdf'))
+
+    with stats.timer('forms.hash'):
+        hashes = get_form_hashes(filepaths)
+
+    # forms with identical contents only get parsed once
+    to_parse = {
+        hashes[x.name]: str(x) for x in filepaths
+        if not (dir_parsed / f'{hashes[x.name]}.json').exists()
+    }
+
+    to_parse = [(to_parse[x], x) for x in to_parse]
+
+    plural = 'form' if len(to_parse) == 1 else 'forms'
+    print(f'Parsing {len(to_parse):,} disclosure {plural} ...')
+
+    if to_parse:
+        # recycle workers every so often to keep pdfminer's memory in check
+        with stats.timer('forms.parse'), ProcessPoolExecutor(
+            max_workers=workers,
+            max_tasks_per_child=100
+        ) as pool:
+            for _ in pool.map(parse_disclosure_form_cached, to_parse, chunksize=chunksize):
+                stats.count('forms.parsed')
+
+    filepath_out = config['private']['filepath_forms_data']
+
+    # one cached record at a time, minus the full text
+    with open(filepath_out, 'w') as outfile:
+        for filepath in filepaths:
+            with open(dir_parsed / f'{hashes[filepath.name]}.json', 'r') as infile:
+                d = json.load(infile)
+
+            d['filing_guid'] = filepath.stem
+            d.pop('text', None)
+
+            outfile.write(json.dumps(d) + '\n')
+
+    print(f'- Wrote {str(filepath_out)}')
+
+    return filepath_out
+
+
+class SearchIndex:
+    ''' A SQLite FTS5 full-text index over lobbying subjects, employer
+        and lobbyist names, and the text of downloaded disclosure forms,
+        updated incrementally from a hash of what gets indexed
+    '''
+    def __init__(self, filepath=FILEPATH_SEARCH_INDEX):
+        self.filepath = filepath
+        self.db = sqlite3.connect(filepath)
+
+        self.db.executescript('''
+            CREATE TABLE IF NOT EXISTS documents (
+                rowid INTEGER PRIMARY KEY,
+                doc_id TEXT UNIQUE,
+                doc_type TEXT,
+                content_hash TEXT
+            );
+
+            CREATE VIRTUAL TABLE IF NOT EXISTS search USING fts5(
+                doc_id UNINDEXED,
+                doc_type UNINDEXED,
+                title,
+                lobbyist_name,
+                employer_name,
+                subjects,
+                body,
+                tokenize = 'porter unicode61'
+            );
+        ''')
+
+        self.hashes = dict(
+            self.db.execute('SELECT doc_id, content_hash FROM documents')
+        )
+
+    def upsert(self, doc_id, doc_type, content_hash, fields):
+        ''' add or replace a document, returning False if it
+            was already indexed with the same content
+        '''
+
+        if self.hashes.get(doc_id) == content_hash:
+            return False
+
+        row = self.db.execute(
+            'SELECT rowid FROM documents WHERE doc_id = ?',
+            (doc_id,)
+        ).fetchone()
+
+        if row:
+            self.db.execute('DELETE FROM search WHERE rowid = ?', row)
+            self.db.execute('DELETE FROM documents WHERE rowid = ?', row)
+
+        cursor = self.db.execute(
+            'INSERT INTO documents (doc_id, doc_type, content_hash) VALUES (?, ?, ?)',
+            (doc_id, doc_type, content_hash)
+        )
+
+        self.db.execute(
+            '''INSERT INTO search (rowid, doc_id, doc_type, title, lobbyist_name, employer_name, subjects, body)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+            (
+                cursor.lastrowid,
+                doc_id,
+                doc_type,
+                fields.get('title', ''),
+                fields.get('lobbyist_name', ''),
+                fields.get('employer_name', ''),
+                fields.get('subjects', ''),
+                fields.get('body', '')
+            )
+        )
+
+        self.hashes[doc_id] = content_hash
+
+        return True
+
+    def update_registrations(self, registrations=[]):
+        ''' index any registrations that are new or changed '''
+
+        updated = 0
+
+        for reg in registrations:
+            fields = {
+                'title': f"{reg.get('year')} {reg.get('registration_number')}",
+                'lobbyist_name': reg.get('lobbyist_name').get('name_full'),
+                'employer_name': reg.get('employer_name'),
+                'subjects': reg.get('employer_lobbying_subjects'),
+                'body': ' '.join([x.get('filing_type', '') for x in reg.get('filings')])
+            }
+
+            content_hash = hashlib.sha256(
+                json.dumps(fields, sort_keys=True).encode('utf-8')
+            ).hexdigest()
+
+            updated += self.upsert(
+                reg.get('registration_guid'),
+                'registration',
+                content_hash,
+                fields
+            )
+
+        self.db.commit()
+
+        return updated
+
+    def update_forms(self, registrations=[]):
+        ''' index the text of any parsed disclosure forms that
+            are new or changed, tagged with the lobbyist and
+            employer of the registration they were filed under
+        '''
+
+        filings = {}
+
+        for reg in registrations:
+            for filing in reg.get('filings'):
+                if filing.get('filing_guid'):
+                    filings[filing.get('filing_guid')] = (reg, filing)
+
+        filepath_hashes = config['private']['dir_forms_parsed'] / 'hashes.json'
+
+        if not filepath_hashes.exists():
+            return 0
+
+        with open(filepath_hashes, 'r') as infile:
+            form_hashes = json.load(infile)
+
+        updated = 0
+
+        for filename in form_hashes:
+            filing_guid = Path(filename).stem
+            form_hash = form_hashes[filename][2]
+
+            reg, filing = filings.get(filing_guid, ({}, {}))
+
+            fields = {
+                'title': f"{filing.get('filing_number', '')} {filing.get('filing_type', '')}".strip(),
+                'lobbyist_name': reg.get('lobbyist_name', {}).get('name_full', ''),
+                'employer_name': reg.get('employer_name', ''),
+                'subjects': reg.get('employer_lobbying_subjects', '')
+            }
+
+            # the form's contents plus the registration details it's tagged with
+            content_hash = hashlib.sha256(
+                (form_hash + json.dumps(fields, sort_keys=True)).encode('utf-8')
+            ).hexdigest()
+
+            if self.hashes.get(filing_guid) == content_hash:
+                continue
+
+            filepath_parsed = config['private']['dir_forms_parsed'] / f'{form_hash}.json'
+
+            if not filepath_parsed.exists():
+                continue
+
+            with open(filepath_parsed, 'r') as infile:
+                form = json.load(infile)
+
+            fields['body'] = form.get('text', '')
+
+            updated += self.upsert(
+                filing_guid,
+                'filing',
+                content_hash,
+                fields
+            )
+
+        self.db.commit()
+
+        return updated
+
+    def search(self, query, limit=20):
+        ''' ranked hits for an FTS5 query, best first '''
+
+        rows = self.db.execute(
+            '''SELECT
+                   doc_id,
+                   doc_type,
+                   title,
+                   lobbyist_name,
+                   employer_name,
+                   snippet(search, -1, '[', ']', '...', 12),
+                   bm25(search)
+               FROM search
+               WHERE search MATCH ?
+               ORDER BY bm25(search)
+               LIMIT ?''',
+            (query, limit)
+        )
+
+        keys = ['doc_id', 'doc_type', 'title', 'lobbyist_name', 'employer_name', 'snippet', 'rank']
+
+        return [dict(zip(keys, x)) for x in rows]
+
+    def close(self):
+        self.db.close()
+
+
+def update_search_index(registrations=[]):
+    ''' add new or changed registrations and forms to the search index '''
+
+    index = SearchIndex()
+
+    updated_registrations = index.update_registrations(registrations)
+    updated_forms = index.update_forms(registrations)
+
+    index.close()
+
+    stats.count('search_index.registrations', updated_registrations)
+    stats.count('search_index.forms', updated_forms)
+
+    print(f'- Indexed {updated_registrations:,} registrations and {updated_forms:,} forms in {FILEPATH_SEARCH_INDEX}')
+
+    return FILEPATH_SEARCH_INDEX
+
+
+def build_readme(aggregates=None):
+
+    file_in, file_out = Path('readme.template'), Path('README.md')
+
+    with open(file_in, 'r') as infile:
+        tmpl = infile.read()
+
+    if aggregates is None:
+        aggregates = Aggregates()
+
+    # nothing counted yet, so build the counts from the data
+    if not aggregates.contributions:
+        aggregates.update(load_private_data())
+        aggregates.write()
+
+    totals = aggregates.totals
+
+    # leave out registration dates with typos in the year
+    registrations_min_date, registrations_max_date = aggregates.date_range(
+        start='2012-01-01',
+        end=f'{THIS_YEAR}-12-31'
+    )
+
+    date_range_private = f'{registrations_min_date} to {registrations_max_date}'
+
+    with open(config['public']['filepath_data'], 'r') as infile:
+        data_public = list(csv.DictReader(infile))
+
+    years = set([x.get('year') for x in data_public])
+    date_range_public = f'{min(years)} to {max(years)}'
+
+    to_replace = (
+        ('{% UPDATED %}', NOW.strftime('%B %-d, %Y')),
+        ('{% COUNT_PRIVATE_REGISTRATIONS %}', f"{totals['registrations']:,}"),
+        ('{% COUNT_PRIVATE_REGISTRATION_NO_FILINGS %}', f"{totals['registrations_without_filings']:,}"),
+        ('{% COUNT_PRIVATE_FILINGS %}', f"{totals['filings']:,}"),
+        ('{% DATE_RANGE_PRIVATE %}', date_range_private),
+        ('{% COUNT_PUBLIC_REGISTRATIONS %}', f'{len(data_public):,}'),
+        ('{% DATE_RANGE_PUBLIC %}', date_range_public),
+    )
+
+    for pair in to_replace:
+        tmpl = tmpl.replace(*pair)
+
+    with open(file_out, 'w') as outfile:
+        outfile.write(tmpl)
+
+    print(f'- Wrote {str(file_out)}')
+
+    return file_out
+
+
+def download_detail_pages(urls=[], overwrite=False):
+    ''' given a list of URLs for registration
+        detail pages, download each page that
+        hasn't already been downloaded, unless overwrite=True
+
+        return a list of downloaded registration URLs
+
+        (to download everything found by previous searches,
+        pass the URLs in `RegistrationIndex`)
+    '''
+
+    new_downloads = []
+    urls = list(set(urls))
+
+    store = get_page_store()
+
+    def fetch_pages():
+        pages = [x for x in urls if x not in new_downloads]
+
+        for url in pages:
+            parsed_url = urlparse(url)
+            registration_id = parse_qs(parsed_url.query)['CN'][0]
+
+            if store.exists(registration_id) and not overwrite:
+                continue
+
+            try:
+                with stats.timer('http.fetch_page'):
+                    html = http_get(url).decode('utf-8')
+
+                stats.count('http.pages_downloaded')
+                sleep(random.uniform(1, 3))
+
+                store.write(registration_id, html)
+
+                print(f'- Wrote {registration_id}')
+
+                new_downloads.append(url)
+            except LookupError:
+                raise
+            except:
+                stats.count('http.errors')
+                print('\n😅 Ope! Rebooting ...\n')
+                sleep(10)
+                fetch_pages()
+
+    fetch_pages()
+
+    store.flush()
+    store.compact_if_needed()
+
+    return new_downloads
+
+
+def vet_results_private(scraped_data=[], pdf_data=[]):
+    ''' compare `pdf_data`, which is canon, with `scraped_data`
+
+    The list of lobbyist names, and the years they've lobbied, should match
+
+    returns True if it doesn't throw
+    '''
+
+    if not isinstance(scraped_data, RegistrationStore):
+        scraped_data = RegistrationStore(scraped_data)
+
+    lookup_scraped = scraped_data.years_by_lobbyist()
+
+    lookup_pdf = {}
+    for record in pdf_data:
+        name_full = record.get('lobbyist_name').get('name_full')
+        if not lookup_pdf.get(name_full):
+            lookup_pdf[name_full] = []
+
+        lookup_pdf[name_full].append(record.get('year'))
+
+    mismatches = []
+
+    # make sure all the registration records are present
+    for name in lookup_pdf:
+        skip_names = [
+            # variously listed as public lobbyists
+            'ANN BOLMAN',
+            'TIFFANY SANDERSON',
+
+            # throws a problem sometimes
+            'ROB L MONSON'
+        ]
+
+        if name in skip_names:
+            continue
+
+        pdf_years = ', '.join(
+            sorted(
+                [str(x) for x in lookup_pdf[name]]
+            )
+        )
+        scraped_years = ', '.join(
+            sorted(
+                [str(x) for x in lookup_scraped.get(name, [])]
+            )
+        )
+
+        if pdf_years != scraped_years:
+            mismatches.append({
+                'name': name,
+                'pdf_years': pdf_years,
+                'scraped_years': scraped_years
+            })
+
+    if mismatches:
+        print(f'Mismatches: {len(mismatches)}')
+
+    for name in mismatches:
+        print('-'*10)
+        print(f"{name.get('name')}")
+        print(f"PDF: {name.get('pdf_years')}")
+        print(f"Scraped: {name.get('scraped_years')}")
+
+    return True
+
+
+def normalize_text(text):
+    ''' collapse whitespace and uppercase a string for matching '''
+    return ' '.join(str(text).split()).upper()
+
+
+def load_pdf_snapshot():
+    ''' load the private PDF data parsed on the previous run '''
+
+    filepath = config['private']['filepath_pdf_snapshot']
+
+    if not filepath.exists():
+        return []
+
+    with open(filepath, 'r') as infile:
+        return [PDFRowPrivate.from_dict(x) for x in json.load(infile)]
+
+
+def snapshot_pdf_data(pdf_data=[], previous_pdf_data=[], unresolved=[]):
+    ''' the private PDF rows to save for the next run -- registrations
+        in `unresolved`, which we couldn't find detail pages for, keep
+        their rows from the previous snapshot, so the next run sees
+        them as changed and tries again
+    '''
+
+    keys = set(pdf_registration_key(x) for x in unresolved)
 
-                with open(filepath_url_detail, 'w') as outfile:
-                    json.dump(
-                        urls_collected,
-                        outfile,
-                        indent=4
-                    )
+    return [
+        x for x in pdf_data if pdf_registration_key(x) not in keys
+    ] + [
+        x for x in previous_pdf_data if pdf_registration_key(x) in keys
+    ]
 
-                print(f'- Wrote {filepath_url_detail}')
-                print()
 
-                time.sleep(random.uniform(1, 3))
+def write_pdf_snapshot(pdf_data=[]):
+    ''' save the parsed private PDF data for the next run to diff against '''
 
-            browser.close()
-    except Exception as e:
-        print(e)
-        time.sleep(5)
-        print('\n😅 Ope! Rebooting ...\n')
+    filepath = config['private']['filepath_pdf_snapshot']
 
-        unfinished = [x for x in last_names if x not in finished.keys()]
+    with open(filepath, 'w') as outfile:
+        json.dump(
+            [x.to_dict() if isinstance(x, Record) else x for x in pdf_data],
+            outfile,
+            indent=4
+        )
 
-        random.shuffle(unfinished)
-        get_detail_urls_private(last_names=unfinished)
+    print(f'- Wrote {str(filepath)}')
 
-    return finished
+    return filepath
 
 
-def scrape_registration_page(html_filepath):
+def pdf_registration_key(record):
+    ''' (year, lobbyist, employer) for a private PDF row '''
 
-    if not isinstance(html_filepath, Path):
-        html_filepath = Path(html_filepath)
+    return (
+        int(record.get('year')),
+        record.get('lobbyist_name').get('name_full'),
+        record.get('employer')
+    )
 
-    with open(html_filepath, 'r') as infile:
-        html = infile.read()
 
-    soup = BeautifulSoup(html, 'html.parser')
-    registration_guid = html_filepath.stem
+def group_pdf_registrations(pdf_data=[]):
+    ''' group private PDF rows by (year, lobbyist, employer), collecting
+        the fields that flip when a registration changes -- the status and
+        the expense report flags, which flip when a new filing lands
+    '''
 
-    # skip if actually a public lobbyist
-    if registration_guid in public_but_private.keys():
-        return {}
+    grouped = {}
 
-    d = {
-        'url': f'https://sosenterprise.sd.gov/BusinessServices/Lobbyist/LobbyistRegistrationDetail.aspx?CN={registration_guid}',
-        'registration_guid': registration_guid
+    for record in pdf_data:
+        key = pdf_registration_key(record)
+
+        if not grouped.get(key):
+            grouped[key] = {
+                'record': record,
+                'states': []
+            }
+
+        grouped[key]['states'].append((
+            record.get('status'),
+            record.get('expense_report_lobbyist'),
+            record.get('expense_report_employer')
+        ))
+
+    for key in grouped:
+        grouped[key]['states'].sort()
+
+    return grouped
+
+
+def plan_rescrape(pdf_data=[], previous_pdf_data=[], index=None):
+    ''' diff the current private PDF data against the previous run's
+        snapshot to find registrations that were added or changed
+
+        returns a dict with the changed PDF records, the detail page
+        URLs already in the registration index for some of them and
+        the last names we still need to search for the rest
+    '''
+
+    if index is None:
+        index = RegistrationIndex()
+
+    current = group_pdf_registrations(pdf_data)
+    previous = group_pdf_registrations(previous_pdf_data)
+
+    changed = [
+        current[key]['record'] for key in current
+        if current[key]['states'] != previous.get(key, {}).get('states')
+    ]
+
+    urls = set()
+    last_names = set()
+
+    for record in changed:
+        name = record.get('lobbyist_name')
+
+        matches = index.find(
+            year=record.get('year'),
+            lobbyist_name=name.get('name_full'),
+            employer=record.get('employer')
+        )
+
+        if len(matches) == 1:
+            urls.add(matches[0]['url'])
+            continue
+
+        last_names.add(name.get('name_last'))
+
+    return {
+        'changed': changed,
+        'urls': sorted(urls),
+        'last_names': sorted(last_names)
     }
 
-    reg_id_block_text = soup.find(
-        'span', 
-        {'id': 'ctl00_MainContent_lblRegistrationNo'}
-    ).text
 
-    year, rest = reg_id_block_text.split('-')
-    _, registration_num = rest.split(':')
+def diff_records(previous=[], current=[], key_fields=()):
+    ''' rows added and removed between two lists of dicts,
+        matched on `key_fields` through a hash index, so it
+        runs in linear time -- rows that share a key are
+        matched up one for one
 
-    d['year'] = int(year)
-    d['registration_number'] = ' '.join(registration_num.split())
+        keys are compared after `normalize_text`, so text that
+        only wrapped differently in the PDF isn't a change
+    '''
 
-    span_map = {
-        'lobbyist_name': 'ctl00_MainContent_txtLobbyistName',
-        'lobbyist_status': 'ctl00_MainContent_txtStatus',
-        'lobbyist_employment_date': 'ctl00_MainContent_txtEmploymentDate',
-        'lobbyist_phone': 'ctl00_MainContent_txtPhone',
-        'lobbyist_email': 'ctl00_MainContent_txtEmail',
-        'lobbyist_address': 'ctl00_MainContent_txtResidenceAddress',
-        'lobbyist_occupation': 'ctl00_MainContent_txtOccupation',
-        'lobbyist_type': 'ctl00_MainContent_txtType',
-        'employer_name': 'ctl00_MainContent_txtEmployerName',
-        'employer_agent_name': 'ctl00_MainContent_txtAgentName',
-        'employer_registration_date': 'ctl00_MainContent_txtRegistrationDate',
-        'employer_authorization_date': 'ctl00_MainContent_txtAuthorizationDate',
-        'employer_lobbying_subjects': 'ctl00_MainContent_txtSubject',
-        'employer_registration_status': 'ctl00_MainContent_txtRegistrationStatus',
-        'employer_address': 'ctl00_MainContent_txtEmployerAddress'
+    def get_key(row):
+        return tuple(normalize_text(row.get(x) or '') for x in key_fields)
+
+    index = {}
+
+    for row in previous:
+        key = get_key(row)
+
+        if key not in index:
+            index[key] = []
+
+        index[key].append(row)
+
+    added = []
+
+    for row in current:
+        key = get_key(row)
+
+        if index.get(key):
+            index[key].pop()
+        else:
+            added.append(row)
+
+    removed = [row for rows in index.values() for row in rows]
+
+    return {
+        'added': added,
+        'removed': removed
     }
 
-    for key in span_map:
-        val = soup.find(
-            'span',
-            {'id': span_map[key]}
-        )
 
-        val_txt = ' '.join(
-            val.text.split()
-        ).upper()
+def write_public_changes(delta={}):
+    ''' append the rows added to and removed from the public data to the changes file '''
 
-        if val_txt and '_date' in key:
-            val_txt = datetime.strptime(
-                val_txt,
-                '%m/%d/%Y'
-            ).date().isoformat()
+    filepath = config['public']['filepath_changes']
+    date = NOW.isoformat(timespec='seconds')
 
-        if val and '_address' in key:
-            val_txt = val.get_text(
-                strip=True,
-                separator='\n'
-            ).splitlines()
-            val_txt = ' '.join(val_txt).upper()
+    if not delta.get('added') and not delta.get('removed'):
+        return filepath
 
-        d[key] = val_txt
+    count = 0
 
-    lobbyist_name = ' '.join(
-        d['lobbyist_name'].split()
-    ).upper()
+    with open(filepath, 'a') as outfile:
+        for change in ('added', 'removed'):
+            for row in delta.get(change, []):
+                outfile.write(json.dumps({
+                    'date': date,
+                    'change': change,
+                    **row
+                }) + '\n')
 
-    name_parsed = parsed_names.get(lobbyist_name)
+                count += 1
 
-    d['lobbyist_name'] = {
-        'name_full': lobbyist_name,
-        **name_parsed
+    stats.count('public.changes', count)
+
+    if count:
+        print(f'- Wrote {count:,} changes to {str(filepath)}')
+
+    return filepath
+
+
+def rss_item_public(row, change='added'):
+    ''' build an RSS item for a public lobbyist row that was added or removed '''
+
+    verb = 'registration' if change == 'added' else 'registration removed'
+    key = '|'.join([change, row.get('year'), row.get('lobbyist_name'), row.get('agency')])
+
+    return {
+        'title': f'Public lobbyist {verb}: {row.get("lobbyist_name")} for {row.get("agency")} ({row.get("year")})',
+        'link': SEARCH_URL,
+        'pub_date': utils.format_datetime(NOW),
+        'guid': f'public-{hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]}'
     }
 
-    try:
-        parsed_address_lobbyist = normalize_address_record(
-            d['lobbyist_address']
-        )
-        d['lobbyist_address'] = {
-            'address_full': d['lobbyist_address'],
-            **parsed_address_lobbyist
-        }
-    except (
-        UnParseableAddressError, 
-        AddressNormalizationError
-    ):
-        d['lobbyist_address'] = {
-            'address_full': d['lobbyist_address']
+
+def rss_item_registration(rec):
+    ''' build an RSS item for a new registration record '''
+    return {
+        'title': f'Lobbyist registration: {rec.get("lobbyist_name").get("name_full")} ({rec.get("lobbyist_status")}) for {rec.get("employer_name")} ({rec.get("employer_registration_status")})',
+        'link': rec.get('url'),
+        'description': rec.get('employer_lobbying_subjects'),
+        'pub_date': utils.format_datetime(
+            datetime.fromisoformat(
+                rec.get('employer_registration_date')
+            )
+        ),
+        'guid': rec.get('registration_guid')
+    }
+
+
+def rss_item_filing(filing):
+    ''' build an RSS item for a new disclosure filing '''
+    return {
+        'title': f'Lobbyist filing {filing.get("filing_number")}: {filing.get("filing_type")} filed by {filing.get("lobbyist_name")} for {filing.get("employer_name")}',
+        'link': filing.get('filing_url'),
+        'pub_date': utils.format_datetime(
+            datetime.fromisoformat(
+                filing.get('filing_date')
+            )
+        ),
+        'guid': filing.get('filing_guid')
+    }
+
+
+def load_rss_items():
+    ''' load the stored feed items, seeding the store from
+        the published feed the first time around
+    '''
+
+    if FILEPATH_RSS_ITEMS.exists():
+        with open(FILEPATH_RSS_ITEMS, 'r') as infile:
+            return json.load(infile)
+
+    if not FILEPATH_RSS.exists():
+        return []
+
+    items = []
+
+    for el in ET.parse(FILEPATH_RSS).getroot().iter('item'):
+        item = {
+            'title': el.findtext('title'),
+            'link': el.findtext('link'),
+            'description': el.findtext('description'),
+            'pub_date': el.findtext('pubDate'),
+            'guid': el.findtext('guid')
         }
 
-    try:
-        parsed_address_employer = normalize_address_record(
-            d['employer_address']
+        items.append(
+            {k: v for k, v in item.items() if v and v != 'None'}
         )
-        d['employer_address'] = {
-            'address_full': d['employer_address'],
-            **parsed_address_employer
-        }
-    except (
-        UnParseableAddressError, 
-        AddressNormalizationError
-    ):
-        d['employer_address'] = {
-            'address_full': d['employer_address']
-        }
 
-    # apply date fixes, if any
-    if date_fixes.get(d['registration_guid']):
-        d = {
-            **d,
-            **date_fixes.get(d['registration_guid'])
-        }
+    return items
+
+
+def merge_rss_items(items=[], history=[], max_items=RSS_MAX_ITEMS):
+    ''' put new items, deduplicated by `guid`, ahead of the
+        stored history and keep only the `max_items` most recent
+    '''
+
+    seen = set(x.get('guid') for x in history)
+    new_items = []
+
+    for item in items:
+        if item.get('guid') in seen:
+            continue
+
+        seen.add(item.get('guid'))
+        new_items.append(item)
+
+    merged = new_items + history
+
+    return {
+        'new_items': new_items,
+        'items': merged[:max_items]
+    }
+
+
+def write_rss_items(outfile, items=[]):
+    ''' stream `<item>` elements into an open file '''
+
+    xml = XMLGenerator(
+        outfile,
+        encoding='utf-8',
+        short_empty_elements=True
+    )
+
+    tags = (
+        ('title', 'title'),
+        ('link', 'link'),
+        ('description', 'description'),
+        ('pub_date', 'pubDate')
+    )
+
+    for item in items:
+        xml.ignorableWhitespace('\n    ')
+        xml.startElement('item', {})
+
+        for key, tag in tags:
+            if not item.get(key):
+                continue
+
+            xml.ignorableWhitespace('\n      ')
+            xml.startElement(tag, {})
+            xml.characters(str(item.get(key)))
+            xml.endElement(tag)
+
+        xml.ignorableWhitespace('\n      ')
+        xml.startElement('guid', {'isPermaLink': 'false'})
+        xml.characters(str(item.get('guid')))
+        xml.endElement('guid')
+
+        xml.ignorableWhitespace('\n    ')
+        xml.endElement('item')
+
+    xml.ignorableWhitespace('\n')
+
+
+def build_rss(items=[]):
+    ''' merge new items into the stored feed items and
+        write the most recent ones out to the feed
+    '''
+
+    merged = merge_rss_items(
+        items=items,
+        history=load_rss_items()
+    )
+
+    with open(FILEPATH_RSS_ITEMS, 'w') as outfile:
+        json.dump(
+            merged['items'],
+            outfile,
+            indent=4
+        )
+
+    with open('rss.template', 'r') as infile:
+        tmpl = infile.read()
+
+    head, tail = tmpl.split('{% ITEMS %}')
+
+    head = head.replace(
+        '{% BUILD_DATE %}',
+        utils.format_datetime(NOW)
+    )
+
+    with open(FILEPATH_RSS, 'w', encoding='utf-8') as outfile:
+        outfile.write(head)
+        write_rss_items(outfile, merged['items'])
+        outfile.write(tail)
+
+    print(f"- Wrote {FILEPATH_RSS} ({len(merged['new_items']):,} new items)")
+
+    return merged['new_items']
+
+
+class RefreshSchedule:
+    ''' Decides which detail pages are due to be re-downloaded.
+
+        Each registration gets a tier from `REFRESH_TIERS` based on
+        its year, its status and how recently it changed, and the
+        next-due time for each page is kept in `FILEPATH_REFRESH_SCHEDULE`.
+    '''
+
+    def __init__(self, filepath=FILEPATH_REFRESH_SCHEDULE):
+        self.filepath = Path(filepath)
+
+        # registration_guid -> {'tier', 'last_fetched', 'next_due'}
+        self.data = {}
+
+        if self.filepath.exists():
+            with open(self.filepath, 'r') as infile:
+                self.data = json.load(infile)
+
+    @staticmethod
+    def is_closed(reg):
+        statuses = ' '.join([
+            reg.get('employer_registration_status') or '',
+            reg.get('lobbyist_status') or ''
+        ])
+
+        return any(x in statuses for x in CLOSED_STATUSES)
+
+    def tier(self, reg, last_changed=None, now=None):
+        ''' the refresh tier for one registration '''
+
+        now = now or NOW
+        year = int(reg.get('year'))
+        closed = self.is_closed(reg)
+
+        changed_recently = bool(last_changed) and (
+            now - datetime.fromisoformat(last_changed)
+        ).days <= REFRESH_RECENT_CHANGE_DAYS
+
+        if year >= THIS_YEAR and not closed:
+            return 'daily'
+
+        if year >= FIRST_YEAR_DOWNLOAD or changed_recently:
+            return 'weekly'
+
+        if year >= THIS_YEAR - 4:
+            return 'monthly'
+
+        if not closed:
+            return 'yearly'
+
+        return 'never'
+
+    def next_due(self, tier, last_fetched):
+        days = REFRESH_TIERS[tier]
+
+        if days is None or not last_fetched:
+            return None
+
+        return (
+            datetime.fromisoformat(last_fetched) + timedelta(days=days)
+        ).isoformat(timespec='seconds')
+
+    def due(self, guids=[], budget=None, now=None):
+        ''' the guids that are due for a refresh, most urgent
+            and most overdue first, capped at `budget`
+        '''
+
+        now = (now or NOW).isoformat(timespec='seconds')
+        tier_rank = {x: i for i, x in enumerate(REFRESH_TIERS)}
+
+        due = []
+
+        for guid in guids:
+            entry = self.data.get(guid) or {}
+
+            # never fetched on a schedule, so it's overdue -- ranked by
+            # its tier, and after every tier if it doesn't have one yet
+            if not entry.get('last_fetched'):
+                tier = entry.get('tier')
+
+                if tier and REFRESH_TIERS[tier] is None:
+                    continue
+
+                due.append((tier_rank.get(tier, len(tier_rank)), '', guid))
+                continue
+
+            if entry.get('next_due') and entry['next_due'] <= now:
+                due.append((tier_rank[entry['tier']], entry['next_due'], guid))
+
+        due.sort()
+
+        if budget is not None:
+            due = due[:budget]
+
+        return [x[-1] for x in due]
+
+    def unscheduled(self, guids=[]):
+        ''' the guids that haven't been given a tier yet '''
+        return set(x for x in guids if not self.data.get(x, {}).get('tier'))
+
+    def mark_fetched(self, guids=[], now=None):
+        now = (now or NOW).isoformat(timespec='seconds')
+
+        for guid in guids:
+            entry = self.data.setdefault(guid, {'tier': 'daily'})
+            entry['last_fetched'] = now
+            entry['next_due'] = self.next_due(entry['tier'], now)
+
+        return self
+
+    def reschedule(self, registrations=[], last_changed={}, now=None):
+        ''' reassign tiers after a scrape, since statuses and
+            change history may have moved a registration
+        '''
+
+        for reg in registrations:
+            guid = reg.get('registration_guid')
+            entry = self.data.setdefault(guid, {})
+
+            entry['tier'] = self.tier(
+                reg,
+                last_changed=last_changed.get(guid),
+                now=now
+            )
+
+            entry['next_due'] = self.next_due(
+                entry['tier'],
+                entry.get('last_fetched')
+            )
+
+        return self
+
+    def tier_counts(self):
+        counts = {x: 0 for x in REFRESH_TIERS}
+
+        for entry in self.data.values():
+            if entry.get('tier') in counts:
+                counts[entry['tier']] += 1
+
+        return counts
+
+    def write(self):
+        with open(self.filepath, 'w') as outfile:
+            json.dump(
+                dict(sorted(self.data.items())),
+                outfile,
+                indent=4
+            )
+
+        print(f'- Wrote {str(self.filepath)}')
+
+        return self.filepath
+
+
+def refresh_detail_pages(budget=None, refresh_all=False):
+    ''' re-download the detail pages that are due for a refresh,
+        up to `budget` pages (default: `refresh_budget` in the config),
+        or every page if `refresh_all` is True
+    '''
+
+    if budget is None:
+        budget = config['private']['refresh_budget']
 
-    table = soup.find('table')
-    rows = table.find_all('tr')[1:]
+    schedule = RefreshSchedule()
+    guids = get_page_store().guids()
 
-    filings = []
+    if refresh_all:
+        due = list(guids)
+    else:
+        unscheduled = schedule.unscheduled(guids)
 
-    for row in rows:
-        doc = {}
+        # give pages downloaded before the schedule existed a tier
+        if unscheduled:
+            schedule.reschedule(
+                [x for x in load_private_data() if x.get('registration_guid') in unscheduled],
+                last_changed=ChangeLog().last_changed()
+            )
 
-        # "filing detail", the last item in the row, is always blank
-        filing_type, filing_date, document_number, _ = row.find_all('td')
+        due = schedule.due(guids, budget=budget)
 
-        doc['filing_type'] = ' '.join(
-            filing_type.text.split()
-        )
+    print(f'- {len(due):,} of {len(guids):,} detail pages due for a refresh\n')
 
-        if filing_date:
-            doc['filing_date'] = datetime.strptime(
-                filing_date.text.strip(),
-                '%m/%d/%Y'
-            ).date().isoformat()
+    stats.count('refresh.due', len(due))
 
-        doc['filing_number'] = ' '.join(
-            document_number.text.split()
+    if not due:
+        stats.finish()
+        return {}
+
+    urls = [f'{REGISTRATION_URL}?CN={x}' for x in due]
+
+    with stats.timer('stage.download_detail_pages'):
+        new_registration_pages = download_detail_pages(
+            urls=urls,
+            overwrite=True
         )
 
-        doc_link = document_number.find('a')
+    schedule.mark_fetched(
+        [parse_qs(urlparse(x).query)['CN'][0] for x in new_registration_pages]
+    )
 
-        if doc_link:
-            document_url = urljoin(
-                'https://sosenterprise.sd.gov/BusinessServices/Business/',
-                Path(doc_link.get('href')).name
-            )
+    with stats.timer('stage.scrape_private_data'):
+        scraped = scrape_private_data()
 
-            doc['filing_url'] = document_url
+    schedule.reschedule(
+        scraped.get('scraped_data'),
+        last_changed=ChangeLog().last_changed()
+    )
+    schedule.write()
 
-            document_url_parsed = urlparse(document_url)
-            doc_id = parse_qs(document_url_parsed.query)['id'][0]
+    stats.log('refresh.tiers', **schedule.tier_counts())
 
-            doc['filing_guid'] = doc_id
+    with stats.timer('stage.parse_disclosure_forms'):
+        parse_disclosure_forms()
 
-            # download the filing if it doesn't
-            # exist locally
-            filepath_filing = config['private']['dir_forms'] / f'{doc_id}.pdf'
+    with stats.timer('stage.update_search_index'):
+        update_search_index(scraped.get('scraped_data'))
 
-            if not filepath_filing.exists():
-                s = Session()
+    # add anything new to the RSS feed
+    rss_items = []
 
-                retries = Retry(
-                    total=5,
-                    backoff_factor=0.2
-                )
+    for filing in scraped.get('new_filings'):
+        rss_items.append(
+            rss_item_filing(filing)
+        )
 
-                s.mount('https://', HTTPAdapter(max_retries=retries))
+    build_rss(items=rss_items)
+    build_readme()
 
-                with s.get(
-                    document_url,
-                    headers=REQ_HEADERS,
-                    stream=True
-                ) as r, open(filepath_filing, 'wb') as fd:
+    stats.finish()
 
-                    r.raise_for_status()
+    return scraped
 
-                    for chunk in r.iter_content():
-                        fd.write(chunk)
 
-                time.sleep(random.uniform(1, 3))
+def run(force=False, keep_browser=False):
+    ''' the daily pipeline: export the PDFs, search for anything
+        new or changed, then download and scrape the detail pages
 
-                print(f'- Wrote {str(filepath_filing)}')
+        if neither PDF changed since the last complete run,
+        stop there unless `force` is True
 
-                doc['new'] = True
+        the browser is closed once it's no longer needed,
+        unless `keep_browser` is True
+    '''
 
-        filings.append(doc)
+    with stats.timer('stage.download_pdfs'):
+        download_pdfs()
 
-    d['filings'] = filings
+    probe = probe_pdfs()
 
-    return d
+    if not probe['changed'] and not force:
+        print('\nNeither PDF changed since the last run, nothing to do\n')
 
+        if not keep_browser:
+            close_browser_session()
 
-def scrape_private_data():
-    data_out = []
-    new_filings = []
+        stats.finish()
+        return {}
 
-    for html_file in config['private']['dir_pages'].glob('*.html'):
+    print('\nProcessing public lobbyist file ...')
+    with stats.timer('stage.parse_pdf_public'):
+        public_lobbyists = ResultsPDF(
+            config['public']['filepath_pdf']
+        )
+        public_lobbyists.write_data()
 
-        scraped_data = scrape_registration_page(html_file)
+    print('\nProcessing private lobbyist file ...')
+    # the private rows are kept around for the rest of
+    # the run, so hold on to them as compact records
+    with stats.timer('stage.parse_pdf_private'):
+        private_rows = ResultsPDF(
+            config['private']['filepath_pdf']
+        ).records()
+
+    print(f'- Parsed {len(private_rows):,} records\n')
+
+    previous_pdf_data = load_pdf_snapshot()
+    registration_index = RegistrationIndex()
+
+    if not previous_pdf_data:
+        # no snapshot to diff against, so treat every
+        # registration from `FIRST_YEAR_DOWNLOAD` onward as changed
+        private_pdf_data = [x for x in private_rows if int(x['year']) >= FIRST_YEAR_DOWNLOAD]
+    else:
+        private_pdf_data = private_rows
+
+    # only search for registrations that were added or changed
+    # since the last run's PDF and aren't already in the index
+    plan = plan_rescrape(
+        pdf_data=private_pdf_data,
+        previous_pdf_data=previous_pdf_data,
+        index=registration_index
+    )
 
-        # skip if this is actually a public lobbyist record
-        if not scraped_data:
-            continue
+    print(f"- {len(plan['changed']):,} new or changed registrations, {len(plan['urls']):,} with known URLs\n")
 
-        lobbyist_name = scraped_data.get('lobbyist_name').get('name_full')
-        employer_name = scraped_data.get('employer_name')
+    lnames_to_search = plan['last_names']
+    urls_known = plan['urls']
 
-        for filing in scraped_data.get('filings'):
-            if filing.get('new'):
-                new_filings.append({
-                    **filing,
-                    **{
-                        'lobbyist_name': lobbyist_name,
-                        'employer_name': employer_name
-                    }
-                })
-                del filing['new']
+    finished = {}
 
-        data_out.append(scraped_data)
+    stats.count('plan.changed_registrations', len(plan['changed']))
+    stats.count('plan.known_urls', len(urls_known))
+    stats.count('plan.last_names', len(lnames_to_search))
 
-    # sort by `employer_registration_date`, the most consistent date for a registration record
-    data_out.sort(
-        key=lambda x: (
-            x['year'],
-            x['employer_registration_date']
-        ),
-        reverse=True
-    )
+    if lnames_to_search:
+        with stats.timer('stage.search_last_names'):
+            finished = get_detail_urls_private(
+                last_names=lnames_to_search
+            )
 
-    fpath = config['private']['filepath_data'].resolve()
+    # that's it for the browser
+    if not keep_browser:
+        close_browser_session()
 
-    with open(fpath, 'w') as outfile:
-        json.dump(
-            data_out,
-            outfile,
-            indent=4
+    # collect the URLs of registration detail pages
+    # for `FIRST_YEAR_DOWNLOAD` onward
+    urls = []
+    
+    for name in finished:
+        urls.extend(
+            [x.get('url') for x in finished[name] if x.get('year') >= FIRST_YEAR_DOWNLOAD]
         )
 
-    print(f'Wrote {str(fpath)}')
+    # pick up the new search results
+    registration_index.update()
 
-    return {
-        'scraped_data': data_out,
-        'new_filings': new_filings
-    }
+    if registration_index.updated:
+        registration_index.write()
 
+    # plus the search results for the registrations that changed,
+    # whatever year they're from -- any we still can't find keep
+    # their old rows in the snapshot, so the next run tries again
+    urls_changed = set()
+    unresolved = []
 
-def build_readme():
+    for record in plan['changed']:
+        lookup = {
+            'year': record.get('year'),
+            'lobbyist_name': record.get('lobbyist_name').get('name_full')
+        }
 
-    file_in, file_out = Path('readme.template'), Path('README.md')
+        # the PDF can cut off or wrap a long employer name, so fall
+        # back on every registration for the lobbyist that year
+        matches = registration_index.find(
+            employer=record.get('employer'),
+            **lookup
+        ) or registration_index.find(**lookup)
 
-    with open(file_in, 'r') as infile:
-        tmpl = infile.read()
+        if not matches:
+            unresolved.append(record)
 
-    with open(config['private']['filepath_data'], 'r') as infile:
-        data_private = json.load(infile)
+        urls_changed.update(x['url'] for x in matches)
 
-    zero_filings = []
-    filings_count = 0
-    employer_registration_dates = []
+    urls_changed = sorted(urls_changed - set(urls_known))
+    urls.extend(urls_changed)
 
-    for reg in data_private:
+    stats.count('plan.unresolved_registrations', len(unresolved))
 
-        empl_date = datetime.fromisoformat(
-            reg['employer_registration_date']
-        ).date()
+    with stats.timer('stage.download_detail_pages'):
+        # this function returns a list of URLs for registration pages downloaded this time around
+        new_registration_pages = download_detail_pages(urls=urls)
+        new_registration_guids = [parse_qs(urlparse(x).query)['CN'][0] for x in new_registration_pages]
 
-        if empl_date.year > 2011 and empl_date.year <= THIS_YEAR:
-            employer_registration_dates.append(empl_date)
+        # refresh the pages we already had for registrations that changed
+        refreshed_pages = download_detail_pages(
+            urls=urls_known + [x for x in urls_changed if x not in new_registration_pages],
+            overwrite=True
+        )
 
-        reg_no = reg.get('registration_number')
-        filings = reg.get('filings')
+    # scrape the private lobbyist data
+    with stats.timer('stage.scrape_private_data'):
+        scraped = scrape_private_data()
 
-        if not filings:
-            zero_filings.append(reg)
-            continue
+    store = RegistrationStore(scraped.get('scraped_data'))
 
-        filings_count += len(reg.get('filings'))
+    # pages downloaded here count as refreshed
+    schedule = RefreshSchedule()
+    schedule.mark_fetched(
+        new_registration_guids + [parse_qs(urlparse(x).query)['CN'][0] for x in refreshed_pages]
+    )
+    schedule.reschedule(
+        scraped.get('scraped_data'),
+        last_changed=ChangeLog().last_changed()
+    )
+    schedule.write()
 
-    registrations_min_date = min(employer_registration_dates)
-    registrations_max_date = max(employer_registration_dates)
+    with stats.timer('stage.parse_disclosure_forms'):
+        parse_disclosure_forms()
 
-    date_range_private = f'{registrations_min_date.isoformat()} to {registrations_max_date.isoformat()}'
+    with stats.timer('stage.update_search_index'):
+        update_search_index(scraped.get('scraped_data'))
 
-    with open(config['public']['filepath_data'], 'r') as infile:
-        data_public = list(csv.DictReader(infile))
+    # add anything new to the RSS feed
+    rss_items = []
 
-    years = set([x.get('year') for x in data_public])
-    date_range_public = f'{min(years)} to {max(years)}'
+    for change in ('added', 'removed'):
+        for row in public_lobbyists.delta.get(change, []):
+            rss_items.append(
+                rss_item_public(row, change=change)
+            )
 
-    to_replace = (
-        ('{% UPDATED %}', NOW.strftime('%B %-d, %Y')),
-        ('{% COUNT_PRIVATE_REGISTRATIONS %}', f'{len(data_private):,}'),
-        ('{% COUNT_PRIVATE_REGISTRATION_NO_FILINGS %}', f'{len(zero_filings):,}'),
-        ('{% COUNT_PRIVATE_FILINGS %}', f'{filings_count:,}'),
-        ('{% DATE_RANGE_PRIVATE %}', date_range_private),
-        ('{% COUNT_PUBLIC_REGISTRATIONS %}', f'{len(data_public):,}'),
-        ('{% DATE_RANGE_PUBLIC %}', date_range_public),
-    )
+    new_registrations = [store.get(x) for x in new_registration_guids if store.get(x)]
 
-    for pair in to_replace:
-        tmpl = tmpl.replace(*pair)
+    for rec in new_registrations:
+        rss_items.append(
+            rss_item_registration(rec)
+        )
 
-    with open(file_out, 'w') as outfile:
-        outfile.write(tmpl)
+    for filing in scraped.get('new_filings'):
+        rss_items.append(
+            rss_item_filing(filing)
+        )
 
-    print(f'- Wrote {str(file_out)}')
+    build_rss(items=rss_items)
+    build_readme()
 
-    return file_out
+    # verify that every record in the PDF is present in
+    # the scraped data
+    vet_results_private(
+        pdf_data=private_rows,
+        scraped_data=store
+    )
 
+    write_pdf_snapshot(
+        snapshot_pdf_data(
+            pdf_data=private_rows,
+            previous_pdf_data=previous_pdf_data,
+            unresolved=unresolved
+        )
+    )
 
-def download_detail_pages(urls=[], overwrite=False):
-    ''' given a list of URLs for registration
-        detail pages, download each page that
-        hasn't already been downloaded, unless overwrite=True
+    # only once everything above has finished, so a
+    # failed run gets retried in full the next time
+    write_probe(probe['fingerprints'])
 
-        return a list of downloaded registration URLs
-    '''
+    stats.finish()
 
-    '''
-    # to read from local files instead ...
-    urls = []
+    return scraped
 
-    for d in config['private']['dir_last_names'].glob('*.json'):
-        with open(d, 'r') as infile:
-            registration_data = json.load(infile)
-        for x in registration_data:
-            urls.extend(
-                [x.get('url') for x in registration_data[x]]
-            )
+
+class Watcher:
+    ''' Runs the pipeline over and over in one process, so the
+        browser, the name parser's model and the lookup files
+        stay loaded between checks.
+
+        Each check runs `run()`, which stops early if the PDFs
+        haven't changed, then refreshes whichever detail pages are
+        due, so the RSS feed picks up new filings as soon as a
+        check finds them. Health and metrics are served on
+        http://127.0.0.1:`port`/health and /metrics.
     '''
 
-    new_downloads = []
-    urls = list(set(urls))
+    def __init__(self, interval=WATCH_INTERVAL, jitter=WATCH_JITTER, port=WATCH_PORT, refresh_budget=WATCH_REFRESH_BUDGET):
+        self.interval = interval
+        self.jitter = jitter
+        self.port = port
+        self.refresh_budget = refresh_budget
+
+        self.stopping = threading.Event()
+        self.server = None
+
+        self.status = {
+            'started': datetime.now().isoformat(timespec='seconds'),
+            'state': 'starting',
+            'checks': 0,
+            'errors': 0,
+            'browser_restarts': 0,
+            'last_check': None,
+            'last_success': None,
+            'last_error': None,
+            'last_check_seconds': None,
+            'next_check': None
+        }
 
-    def fetch_pages():
-        pages = [x for x in urls if x not in new_downloads]
+        # counters and timers from the most recent check
+        self.last_counters = {}
+        self.last_timers = {}
 
-        for url in pages:
-            parsed_url = urlparse(url)
-            registration_id = parse_qs(parsed_url.query)['CN'][0]
+    def next_delay(self):
+        ''' seconds until the next check, give or take `jitter` '''
+        return self.interval * (1 + random.uniform(-self.jitter, self.jitter))
 
-            detail_page_filepath = (config['private']['dir_pages'] / f'{registration_id}.html').resolve()
+    def check_browser(self):
+        ''' relaunch the browser if it died since the last check '''
 
-            if detail_page_filepath.exists() and not overwrite:
-                continue
+        session = browser_session
 
-            try:
-                s = Session()
+        if session and session.browser and not session.browser.is_connected():
+            print('\n😅 Browser went away, restarting ...\n')
+            session.restart()
+            self.status['browser_restarts'] += 1
 
-                retries = Retry(
-                    total=5,
-                    backoff_factor=0.5
-                )
+    def check(self):
+        ''' one pass of the pipeline '''
 
-                s.mount('https://', HTTPAdapter(max_retries=retries))
+        refresh_clock()
 
-                req = s.get(
-                    url,
-                    headers=REQ_HEADERS
-                )
+        self.status['state'] = 'checking'
+        self.status['last_check'] = NOW.isoformat(timespec='seconds')
 
-                req.raise_for_status()
-                time.sleep(random.uniform(1, 3))
+        start = time.perf_counter()
 
-                with open(detail_page_filepath, 'w') as outfile:
-                    outfile.write(req.text)
+        try:
+            self.check_browser()
 
-                print(f'- Wrote {detail_page_filepath}')
+            stats.reset()
+            run(keep_browser=True)
 
-                new_downloads.append(url)
-            except:
-                print('\n😅 Ope! Rebooting ...\n')
-                time.sleep(10)
-                fetch_pages()
+            counters = {**stats.counters}
+            timers = {x: {**y} for x, y in stats.timers.items()}
 
-    fetch_pages()
+            stats.reset()
+            refresh_detail_pages(budget=self.refresh_budget)
 
-    return new_downloads
+            for name, count in stats.counters.items():
+                counters[name] = counters.get(name, 0) + count
 
+            # both halves time some of the same stages
+            for name, timer in stats.timers.items():
+                if name not in timers:
+                    timers[name] = {**timer}
+                    continue
 
-def vet_results_private(scraped_data=[], pdf_data=[]):
-    ''' compare `pdf_data`, which is canon, with `scraped_data`
+                timers[name]['calls'] += timer['calls']
+                timers[name]['seconds'] += timer['seconds']
+                timers[name]['max'] = max(timers[name]['max'], timer['max'])
 
-    The list of lobbyist names, and the years they've lobbied, should match
+            self.last_counters = counters
+            self.last_timers = timers
 
-    returns True if it doesn't throw
-    '''
+            self.status['last_success'] = datetime.now().isoformat(timespec='seconds')
+            self.status['state'] = 'ok'
+        except Exception as e:
+            traceback.print_exc()
 
-    lookup_scraped = {}
-    for record in scraped_data:
-        name_full = record.get('lobbyist_name').get('name_full')
-        if not lookup_scraped.get(name_full):
-            lookup_scraped[name_full] = []
+            self.status['errors'] += 1
+            self.status['last_error'] = f'{datetime.now().isoformat(timespec="seconds")} {e!r}'
+            self.status['state'] = 'error'
 
-        lookup_scraped[name_full].append(record.get('year'))
+            # start the next check with a fresh browser
+            if browser_session and browser_session.browser:
+                browser_session.restart()
+                self.status['browser_restarts'] += 1
 
-    lookup_pdf = {}
-    for record in pdf_data:
-        name_full = record.get('lobbyist_name').get('name_full')
-        if not lookup_pdf.get(name_full):
-            lookup_pdf[name_full] = []
+        self.status['checks'] += 1
+        self.status['last_check_seconds'] = round(time.perf_counter() - start, 3)
 
-        lookup_pdf[name_full].append(record.get('year'))
+        return self
 
-    mismatches = []
+    def metrics(self):
+        ''' the status and the last check's counters, in the Prometheus text format '''
 
-    # make sure all the registration records are present
-    for name in lookup_pdf:
-        skip_names = [
-            # variously listed as public lobbyists
-            'ANN BOLMAN',
-            'TIFFANY SANDERSON',
+        lines = []
 
-            # throws a problem sometimes
-            'ROB L MONSON'
-        ]
+        for key in ('checks', 'errors', 'browser_restarts', 'last_check_seconds'):
+            lines.append(f'sd_lobbyists_watch_{key} {self.status[key] or 0}')
 
-        if name in skip_names:
-            continue
+        lines.append(f"sd_lobbyists_watch_up {int(self.status['state'] != 'error')}")
 
-        pdf_years = ', '.join(
-            sorted(
-                [str(x) for x in lookup_pdf[name]]
-            )
-        )
-        scraped_years = ', '.join(
-            sorted(
-                [str(x) for x in lookup_scraped[name]]
-            )
-        )
+        for name in sorted(self.last_counters):
+            metric = re.sub(r'\W', '_', name)
+            lines.append(f'sd_lobbyists_{metric}_total {self.last_counters[name]}')
 
-        if pdf_years != scraped_years:
-            mismatches.append({
-                'name': name,
-                'pdf_years': pdf_years,
-                'scraped_years': scraped_years
-            })
+        for name in sorted(self.last_timers):
+            metric = re.sub(r'\W', '_', name)
+            lines.append(f"sd_lobbyists_{metric}_seconds {self.last_timers[name]['seconds']:.3f}")
 
-    if mismatches:
-        print(f'Mismatches: {len(mismatches)}')
+        return '\n'.join(lines) + '\n'
 
-    for name in mismatches:
-        print('-'*10)
-        print(f"{name.get('name')}")
-        print(f"PDF: {name.get('pdf_years')}")
-        print(f"Scraped: {name.get('scraped_years')}")
+    def serve(self):
+        ''' answer /health and /metrics from a background thread '''
 
-    return True
+        watcher = self
 
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/health':
+                    code = 503 if watcher.status['state'] == 'error' else 200
+                    body = json.dumps(watcher.status, indent=4).encode('utf-8')
+                    content_type = 'application/json'
+                elif self.path == '/metrics':
+                    code = 200
+                    body = watcher.metrics().encode('utf-8')
+                    content_type = 'text/plain; version=0.0.4'
+                else:
+                    code, body, content_type = 404, b'Not found\n', 'text/plain'
 
-def build_rss(items=[]):
-    if not items:
-        return
+                self.send_response(code)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
 
-    with open('rss.template', 'r') as infile:
-        tmpl = infile.read()
+            def log_message(self, format, *args):
+                pass
 
-    build_date = utils.format_datetime(NOW)
-    item_str = ''
+        self.server = ThreadingHTTPServer(('127.0.0.1', self.port), Handler)
 
-    for item in items:
-        item_str += f'''
-    <item>
-      <title>{item.get('title')}</title>
-      <link>{item.get('link')}</link>
-      <description>{item.get('description')}</description>
-      <pubDate>{item.get('pub_date')}</pubDate>
-      <guid isPermaLink="false">{item.get('guid')}</guid>
-    </item>
-        '''
+        threading.Thread(
+            target=self.server.serve_forever,
+            daemon=True
+        ).start()
 
-    rpl = (
-        ('{% BUILD_DATE %}', build_date),
-        ('{% ITEMS %}', item_str)
-    )
+        print(f'Serving health and metrics on http://127.0.0.1:{self.server.server_address[1]}')
 
-    for pair in rpl:
-        tmpl = tmpl.replace(*pair)
+        return self.server
 
-    with open(FILEPATH_RSS, 'w') as outfile:
-        outfile.write(tmpl)
+    def watch(self, checks=None):
+        ''' check on a schedule until stopped, or `checks` times '''
 
-    print(f'- Wrote {FILEPATH_RSS}')
+        if self.port is not None:
+            self.serve()
 
+        try:
+            while not self.stopping.is_set():
+                self.check()
 
-def refresh_detail_pages():
+                if checks is not None and self.status['checks'] >= checks:
+                    break
 
-    html_filepaths = [x for x in config['private']['dir_pages'].glob('*.html')]
+                delay = self.next_delay()
 
-    urls = [f'{REGISTRATION_URL}?CN={x.stem}' for x in html_filepaths]
+                self.status['state'] = 'waiting' if self.status['state'] == 'ok' else self.status['state']
+                self.status['next_check'] = datetime.fromtimestamp(time.time() + delay).isoformat(timespec='seconds')
 
-    new_registration_pages = download_detail_pages(
-        urls=urls,
-        overwrite=True
-    )
+                print(f'\nNext check in {delay / 60:.1f} minutes\n')
 
-    scraped = scrape_private_data()
+                self.stopping.wait(delay)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
 
-    # rebuild RSS feed if there's anything new
-    rss_items = []
+        return self
 
-    for filing in scraped.get('new_filings'):
-        rss_items.append({
-            'title': f'Lobbyist filing {filing.get("filing_number")}: {filing.get("filing_type")} filed by {filing.get("lobbyist_name").replace('&', '&#x26;')} for {filing.get("employer_name").replace('&', '&#x26;')}',
-            'link': filing.get('filing_url'),
-            'pub_date': utils.format_datetime(
-                datetime.fromisoformat(
-                    filing.get('filing_date')
-                )
-            ),
-            'guid': filing.get('filing_guid')
-        })
+    def stop(self):
+        self.stopping.set()
 
-    build_rss(items=rss_items)
-    build_readme()
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
 
-    return scraped
+        close_browser_session()
+
+        return self
 
 
 if __name__ == '__main__':
 
-    # refresh_detail_pages()
-
-    download_pdfs()
+    parser = argparse.ArgumentParser(
+        description='Scrape South Dakota lobbyist data'
+    )
 
-    print('\nProcessing public lobbyist file ...')
-    public_lobbyists = ResultsPDF(
-        config['public']['filepath_pdf']
+    parser.add_argument(
+        '--cache',
+        choices=('off', 'record', 'replay'),
+        default=HTTP_CACHE_MODE,
+        help='record responses from the SoS site, or replay them offline (default: $SD_LOBBYISTS_HTTP_CACHE or off)'
     )
-    public_lobbyists.write_data()
 
-    print('\nProcessing private lobbyist file ...')
-    private_lobbyists = ResultsPDF(
-        config['private']['filepath_pdf']
+    subparsers = parser.add_subparsers(dest='command')
+
+    parser_run = subparsers.add_parser(
+        'run',
+        help='run the daily pipeline (the default)'
     )
+    parser_run.add_argument('--force', action='store_true', help='run every stage even if the PDFs haven\'t changed')
 
-    print(f'- Parsed {len(private_lobbyists.data):,} records\n')
+    parser_refresh = subparsers.add_parser(
+        'refresh',
+        help='re-download and re-scrape the detail pages that are due'
+    )
+    parser_refresh.add_argument('--budget', type=int, help='most pages to download this run')
+    parser_refresh.add_argument('--all', action='store_true', help='re-download every stored page')
 
-    # only re-download last name search results from `FIRST_YEAR_DOWNLOAD` onward
-    lnames_to_search = list(
-        set(
-            [x.get('lobbyist_name')['name_last'] for x in private_lobbyists.data if int(x['year']) >= FIRST_YEAR_DOWNLOAD]
-        )
+    parser_watch = subparsers.add_parser(
+        'watch',
+        help='keep running, checking for changes on a schedule'
     )
+    parser_watch.add_argument('--interval', type=int, default=WATCH_INTERVAL, help='seconds between checks')
+    parser_watch.add_argument('--jitter', type=float, default=WATCH_JITTER, help='fraction of the interval to randomly add or take away')
+    parser_watch.add_argument('--port', type=int, default=WATCH_PORT, help='port for /health and /metrics')
+    parser_watch.add_argument('--budget', type=int, default=WATCH_REFRESH_BUDGET, help='most detail pages to refresh per check')
+    parser_watch.add_argument('--checks', type=int, help='stop after this many checks')
+
+    parser_search = subparsers.add_parser(
+        'search',
+        help='full-text search of registrations and disclosure forms'
+    )
+    parser_search.add_argument('query', help='an SQLite FTS5 query, e.g. \'"sales tax" OR ethanol\'')
+    parser_search.add_argument('--limit', type=int, default=20)
 
-    finished = get_detail_urls_private(
-        last_names=lnames_to_search
+    parser_changes = subparsers.add_parser(
+        'changes',
+        help='list registration changes logged between two dates'
     )
+    parser_changes.add_argument('--start', help='ISO date, e.g. 2025-01-01')
+    parser_changes.add_argument('--end', help='ISO date, e.g. 2025-12-31')
+    parser_changes.add_argument('--guid', help='show one registration as of --end instead')
 
-    # collect the URLs of registration detail pages
-    # for `FIRST_YEAR_DOWNLOAD` onward
-    urls = []
-    
-    for name in finished:
-        urls.extend(
-            [x.get('url') for x in finished[name] if x.get('year') >= FIRST_YEAR_DOWNLOAD]
-        )
+    args = parser.parse_args()
 
-    # this function returns a list of URLs for registration pages downloaded this time around
-    new_registration_pages = download_detail_pages(urls=urls)
-    new_registration_guids = [parse_qs(urlparse(x).query)['CN'][0] for x in new_registration_pages]
+    http_cache.mode = args.cache
 
-    # scrape the private lobbyist data
-    scraped = scrape_private_data()
+    if http_cache.mode == 'replay' and args.command not in ('search', 'changes'):
+        os.chdir(replay_workdir())
 
-    # rebuild RSS feed if there's anything new
-    rss_items = []
+    if args.command == 'search':
+        index = SearchIndex()
 
-    new_registrations = [x for x in scraped.get('scraped_data') if x.get('registration_guid') in new_registration_guids]
+        for hit in index.search(args.query, limit=args.limit):
+            print(f"{hit['doc_type']:<12} {hit['title']:<30} {hit['lobbyist_name']} / {hit['employer_name']}")
+            print(f"    {hit['snippet']}")
+            print(f"    {hit['doc_id']}")
 
-    for rec in new_registrations:
-        rss_items.append({
-            'title': f'Lobbyist registration: {rec.get("lobbyist_name").get("name_full").replace('&', '&#x26;')} ({rec.get("lobbyist_status")}) for {rec.get("employer_name").replace('&', '&#x26;')} ({rec.get("employer_registration_status")})',
-            'link': rec.get('url'),
-            'description': rec.get('employer_lobbying_subjects').replace('&', '&#x26;'),
-            'pub_date': utils.format_datetime(
-                datetime.fromisoformat(
-                    rec.get('employer_registration_date')
-                )
-            ),
-            'guid': rec.get('registration_guid')
-        })
+        index.close()
 
-    for filing in scraped.get('new_filings'):
-        rss_items.append({
-            'title': f'Lobbyist filing {filing.get("filing_number")}: {filing.get("filing_type")} filed by {filing.get("lobbyist_name").replace('&', '&#x26;')} for {filing.get("employer_name").replace('&', '&#x26;')}',
-            'link': filing.get('filing_url'),
-            'pub_date': utils.format_datetime(
-                datetime.fromisoformat(
-                    filing.get('filing_date')
-                )
-            ),
-            'guid': filing.get('filing_guid')
-        })
+    elif args.command == 'changes':
+        change_log = ChangeLog()
 
-    build_rss(items=rss_items)
-    build_readme()
+        if args.guid:
+            print(json.dumps(
+                change_log.as_of(args.guid, args.end or NOW.isoformat(timespec='seconds')),
+                indent=4
+            ))
+        else:
+            for event in change_log.changes_between(start=args.start, end=args.end):
+                if event['type'] != 'changed':
+                    print(f"{event['date']} {event['registration_guid']} {event['type']}")
+                    continue
 
-    # verify that every record in the PDF is present in
-    # the scraped data
-    vet_results_private(
-        pdf_data=private_lobbyists.data,
-        scraped_data=scraped.get('scraped_data')
-    )
\ No newline at end of file
+                for key, (old, new) in event.get('changes', {}).items():
+                    print(f"{event['date']} {event['registration_guid']} {key}: {old!r} -> {new!r}")
+
+                for filing in event.get('filings_added', []):
+                    print(f"{event['date']} {event['registration_guid']} filing added: {filing.get('filing_type')} {filing.get('filing_number')}")
+
+                for key in event.get('filings_removed', []):
+                    print(f"{event['date']} {event['registration_guid']} filing removed: {key}")
+
+    elif args.command == 'watch':
+        Watcher(
+            interval=args.interval,
+            jitter=args.jitter,
+            port=args.port,
+            refresh_budget=args.budget
+        ).watch(checks=args.checks)
+
+    elif args.command == 'refresh':
+        refresh_detail_pages(
+            budget=args.budget,
+            refresh_all=args.all
+        )
+
+    else:
+        run(force=getattr(args, 'force', False))
\ No newline at end of file
@@ -0,0 +1,446 @@
+''' A stand-in for the lobbyist search on the Secretary of State's
+    site, serving the synthetic registrations from `benchmark.py`,
+    for running `watch` end to end without hitting the live site
+
+    usage: python standin.py --checks 3
+
+    starts the stand-in on a free port, points `download.py` at it
+    through $SD_LOBBYISTS_SITE_URL and runs `Watcher(...).watch(checks=N)`
+    in a scratch directory. After each check, one registration gets a
+    new filing and a new registration shows up, so the next check has
+    something to find
+
+    add `--serve --port 8000` to only run the stand-in, e.g. to point
+    `SD_LOBBYISTS_SITE_URL=http://127.0.0.1:8000 python download.py` at it
+'''
+
+from pathlib import Path
+from datetime import date, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+import argparse
+import html
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+
+from benchmark import (
+    REPO_DIR,
+    FIRST_NAMES,
+    EMPLOYERS,
+    FILING_TYPES,
+    make_registrations,
+    write_pdf,
+    write_pdf_private,
+    write_pdf_public,
+    pdf_text,
+    detail_page_html,
+    setup_workdir
+)
+
+
+PATH_SEARCH = '/BusinessServices/Lobbyist/LobbyistSearch.aspx'
+PATH_REGISTRATION = '/BusinessServices/Lobbyist/LobbyistRegistrationDetail.aspx'
+PATH_FILING = '/BusinessServices/Business/DocumentImage.aspx'
+
+# form field names, as ASP.NET renders them
+FIELD_SEARCH_BY = 'ctl00$MainContent$SearchBy'
+FIELD_LAST_NAME = 'ctl00$MainContent$txtLastName'
+FIELD_YEARS = 'ctl00$MainContent$slctYears'
+FIELD_BUTTON_SEARCH = 'ctl00$MainContent$SearchButton'
+FIELD_BUTTON_PRINT = 'ctl00$MainContent$PrintButton'
+
+SEARCH_PAGE = '''<!DOCTYPE html>
+<html>
+<head>
+<title>Lobbyist Search</title>
+<script>
+function __doPostBack(eventTarget, eventArgument) {{
+    var form = document.forms['aspnetForm'];
+    form.__EVENTTARGET.value = eventTarget;
+    form.__EVENTARGUMENT.value = eventArgument;
+    form.submit();
+}}
+</script>
+</head>
+<body>
+<form id="aspnetForm" name="aspnetForm" method="post" action="LobbyistSearch.aspx">
+<input type="hidden" name="__EVENTTARGET" value="">
+<input type="hidden" name="__EVENTARGUMENT" value="">
+{radios}
+<input type="text" id="ctl00_MainContent_txtLastName" name="{field_last_name}" value="{last_name}">
+<select id="ctl00_MainContent_slctYears" name="{field_years}">
+{years}
+</select>
+<input type="submit" id="ctl00_MainContent_SearchButton" name="{field_search}" value="Search">
+<input type="submit" id="ctl00_MainContent_PrintButton" name="{field_print}" value="Print">
+{results}
+</form>
+</body>
+</html>
+'''
+
+
+class StandInSite:
+    ''' The synthetic registrations, and the pages the
+        site would build from them
+    '''
+    def __init__(self, registrations, seed=0):
+        self.registrations = registrations
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.folder = Path(tempfile.mkdtemp(prefix='sd-lobbyists-standin-'))
+
+    def find(self, lobbyist_type, last_name='', year='0'):
+        ''' the registrations a search would turn up '''
+
+        with self.lock:
+            registrations = list(self.registrations)
+
+        if last_name:
+            registrations = [x for x in registrations if x['name_last'] == last_name.strip().upper()]
+
+        if year and year != '0':
+            registrations = [x for x in registrations if str(x['year']) == year]
+
+        return registrations
+
+    def search_page(self, lobbyist_type='private', last_name='', year='0', show_results=False):
+        radios = ''
+
+        for choice in ('public', 'private'):
+            control = f'ctl00$MainContent$chkSearchBy{choice.title()}'
+            checked = ' checked' if choice == lobbyist_type else ''
+
+            radios += (
+                f'<input type="radio" id="ctl00_MainContent_chkSearchBy{choice.title()}" '
+                f'name="{FIELD_SEARCH_BY}" value="{choice}"{checked} '
+                f'''onclick="javascript:setTimeout('__doPostBack(\\'{control}\\',\\'\\')', 0)">\n'''
+            )
+
+        years = ['0'] + sorted(set(str(x['year']) for x in self.registrations), reverse=True)
+
+        options = '\n'.join(
+            f'<option value="{x}"{" selected" if x == year else ""}>{"All" if x == "0" else x}</option>'
+            for x in years
+        )
+
+        results = ''
+
+        if show_results:
+            results = self.results_table(self.find(lobbyist_type, last_name, year))
+
+        return SEARCH_PAGE.format(
+            radios=radios,
+            field_last_name=FIELD_LAST_NAME,
+            last_name=html.escape(last_name),
+            field_years=FIELD_YEARS,
+            years=options,
+            field_search=FIELD_BUTTON_SEARCH,
+            field_print=FIELD_BUTTON_PRINT,
+            results=results
+        )
+
+    def results_table(self, registrations):
+        rows = ''
+
+        for reg in registrations:
+            cells = [
+                str(reg['year']),
+                f'<a href="LobbyistRegistrationDetail.aspx?CN={reg["registration_guid"]}">{reg["registration_number"]}</a>',
+                'Active',
+                reg['name_full'],
+                reg['city'],
+                f"{reg['phone']} {reg['email']}",
+                reg['employer'],
+                reg['employer_address'],
+                reg['employer_city']
+            ]
+
+            rows += '<tr>' + ''.join(f'<td>{x}</td>' for x in cells) + '</tr>\n'
+
+        headers = [
+            'Year', 'Registration Number', 'Status', 'Lobbyist', 'City/State/Zip',
+            'Phone/Email', 'Employer', 'Employer Address', 'Employer City/State/Zip'
+        ]
+
+        return f'''
+<select name="DataTables_Table_0_length">
+<option value="10">10</option>
+<option value="100">100</option>
+<option value="1000">1000</option>
+</select>
+<table id="DataTables_Table_0">
+<thead><tr>{''.join(f'<th>{x}</th>' for x in headers)}</tr></thead>
+<tbody>
+{rows}</tbody>
+</table>
+'''
+
+    def export(self, lobbyist_type):
+        ''' the PDF the Print button exports '''
+
+        filepath = self.folder / f'{lobbyist_type}.pdf'
+        registrations = self.find(lobbyist_type)
+
+        if lobbyist_type == 'public':
+            write_pdf_public(filepath, registrations)
+        else:
+            write_pdf_private(filepath, registrations)
+
+        return filepath.read_bytes()
+
+    def detail_page(self, registration_guid):
+        for reg in self.find('private'):
+            if reg['registration_guid'] == registration_guid:
+                return detail_page_html(reg)
+
+        return None
+
+    def filing(self, filing_guid):
+        for reg in self.find('private'):
+            for filing in reg['filings']:
+                if filing['filing_guid'] == filing_guid:
+                    filepath = self.folder / f'{filing_guid}.pdf'
+                    write_pdf(filepath, [pdf_text(72, 72, filing['filing_number'])])
+
+                    return filepath.read_bytes()
+
+        return None
+
+    def guid(self):
+        return ''.join(str(self.rng.randint(0, 9)) for _ in range(48))
+
+    def change(self, today=None):
+        ''' file a report for one current registration, flipping its
+            expense report flag the way the real PDF does, and add
+            a new registration for someone who's already registered
+        '''
+
+        today = today or date.today()
+
+        with self.lock:
+            latest = max(x['year'] for x in self.registrations)
+            current = [x for x in self.registrations if x['year'] == latest]
+
+            reg = self.rng.choice(current)
+            reg['filings'].append({
+                'filing_type': self.rng.choice(FILING_TYPES),
+                'filing_date': today,
+                'filing_number': f'LE{self.rng.randint(100000, 999999)}',
+                'filing_guid': self.guid()
+            })
+            reg['expense_report_lobbyist'] = 'No' if reg['expense_report_lobbyist'] == 'Yes' else 'Yes'
+
+            template = self.rng.choice(current)
+            first = self.rng.choice(FIRST_NAMES)
+            number = len(self.registrations) + 1
+
+            self.registrations.append({
+                **template,
+                'registration_guid': self.guid(),
+                'registration_number': f'L{number:05d}',
+                'name_first': first,
+                'name_full': f"{first} {template['name_last']}",
+                'email': f"{first}.{template['name_last']}@example.com".lower(),
+                'employer': self.rng.choice(EMPLOYERS),
+                'registration_date': today - timedelta(days=1),
+                'filings': []
+            })
+
+        return reg
+
+    def serve(self, port=0):
+        ''' serve the stand-in from a background thread '''
+
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def respond(self, body, content_type='text/html; charset=utf-8', code=200, headers={}):
+                if body is None:
+                    code, body, content_type = 404, 'Not found\n', 'text/plain'
+
+                if isinstance(body, str):
+                    body = body.encode('utf-8')
+
+                self.send_response(code)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+
+                for key, value in headers.items():
+                    self.send_header(key, value)
+
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+
+                if url.path == PATH_SEARCH:
+                    return self.respond(site.search_page())
+
+                if url.path == PATH_REGISTRATION:
+                    return self.respond(site.detail_page(query.get('CN', [''])[0]))
+
+                if url.path == PATH_FILING:
+                    return self.respond(site.filing(query.get('id', [''])[0]), content_type='application/pdf')
+
+                return self.respond(None)
+
+            def do_POST(self):
+                if urlparse(self.path).path != PATH_SEARCH:
+                    return self.respond(None)
+
+                length = int(self.headers.get('Content-Length', 0))
+                form = parse_qs(self.rfile.read(length).decode('utf-8'), keep_blank_values=True)
+
+                lobbyist_type = form.get(FIELD_SEARCH_BY, ['private'])[0]
+                last_name = form.get(FIELD_LAST_NAME, [''])[0]
+                year = form.get(FIELD_YEARS, ['0'])[0]
+
+                if FIELD_BUTTON_PRINT in form:
+                    return self.respond(
+                        site.export(lobbyist_type),
+                        content_type='application/pdf',
+                        headers={'Content-Disposition': f'attachment; filename="search-results-{lobbyist_type}.pdf"'}
+                    )
+
+                return self.respond(
+                    site.search_page(
+                        lobbyist_type=lobbyist_type,
+                        last_name=last_name,
+                        year=year,
+                        show_results=FIELD_BUTTON_SEARCH in form
+                    )
+                )
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+
+        threading.Thread(
+            target=server.serve_forever,
+            daemon=True
+        ).start()
+
+        return server
+
+    def close(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+
+    parser.add_argument(
+        '--checks',
+        type=int,
+        default=3,
+        help='number of checks to run'
+    )
+
+    parser.add_argument(
+        '--size',
+        type=int,
+        default=200,
+        help='number of synthetic registrations to start with'
+    )
+
+    parser.add_argument(
+        '--interval',
+        type=int,
+        default=1,
+        help='seconds between checks'
+    )
+
+    parser.add_argument(
+        '--port',
+        type=int,
+        default=0,
+        help='port for the stand-in (default: any free port)'
+    )
+
+    parser.add_argument(
+        '--serve',
+        action='store_true',
+        help='only run the stand-in, until interrupted'
+    )
+
+    parser.add_argument(
+        '--keep',
+        action='store_true',
+        help="don't delete the scratch directory afterward"
+    )
+
+    args = parser.parse_args()
+
+    site = StandInSite(make_registrations(args.size, seed=args.size))
+    server = site.serve(port=args.port)
+    site_url = f'http://127.0.0.1:{server.server_address[1]}'
+
+    print(f'Serving the stand-in on {site_url}{PATH_SEARCH}')
+
+    if args.serve:
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.shutdown()
+            site.close()
+
+        return None
+
+    # `download` reads the site URL, its config and its caches
+    # relative to the working directory when it's imported
+    os.environ['SD_LOBBYISTS_SITE_URL'] = site_url
+
+    workdir = setup_workdir()
+    cwd = os.getcwd()
+
+    os.chdir(workdir)
+    sys.path.insert(0, str(REPO_DIR))
+
+    import download
+
+    class StandInWatcher(download.Watcher):
+        def check(self):
+            super().check()
+            site.change()
+            return self
+
+    watcher = StandInWatcher(
+        interval=args.interval,
+        jitter=0,
+        port=0
+    )
+
+    try:
+        watcher.watch(checks=args.checks)
+    finally:
+        os.chdir(cwd)
+        server.shutdown()
+        site.close()
+
+        if args.keep:
+            print(f'\nLeft the scratch directory at {workdir}')
+        else:
+            shutil.rmtree(workdir)
+
+    print(json.dumps(watcher.status, indent=4))
+    print(watcher.metrics())
+
+    if watcher.status['errors']:
+        sys.exit(1)
+
+    return watcher
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,256 @@
+''' Tests for `download.py`, run from the repo root with
+    `python -m unittest discover tests` (or `python -m pytest tests`)
+
+    `download` reads its config and caches relative to the working
+    directory when it's imported, so everything runs in a scratch
+    directory set up by `benchmark.setup_workdir`
+'''
+
+from pathlib import Path
+from unittest import mock
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import unittest
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+import benchmark
+
+WORKDIR = benchmark.setup_workdir()
+CWD = os.getcwd()
+
+os.chdir(WORKDIR)
+
+import download
+
+
+def tearDownModule():
+    os.chdir(CWD)
+    shutil.rmtree(WORKDIR)
+
+
+class TestRecords(unittest.TestCase):
+
+    def test_from_dict_drops_unknown_keys(self):
+        name = download.LobbyistName.from_dict({
+            None: 'MRS.',
+            'name_first': 'JANE',
+            'name_last': 'DOE'
+        })
+
+        self.assertEqual(name.to_dict(), {'name_first': 'JANE', 'name_last': 'DOE'})
+
+    def test_prefixed_name_in_private_pdf(self):
+        reg = benchmark.make_registrations(1)[0]
+        reg['name_full'] = 'MRS. JANE DOE'
+
+        filepath = download.config['private']['filepath_pdf']
+        benchmark.write_pdf_private(filepath, [reg])
+
+        rows = download.ResultsPDF(filepath).records()
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(
+            rows[0].lobbyist_name.to_dict(),
+            {
+                'name_prefix': 'MRS.',
+                'name_first': 'JANE',
+                'name_last': 'DOE',
+                'name_full': 'MRS. JANE DOE'
+            }
+        )
+
+    def test_layout_cache_ignores_printed_on(self):
+        filepath = download.config['private']['filepath_pdf']
+        regs = benchmark.make_registrations(3)
+
+        benchmark.write_pdf_private(filepath, regs)
+        download.ResultsPDF(filepath)
+
+        with open(download.FILEPATH_PDF_LAYOUTS, 'r') as infile:
+            layouts = json.load(infile)
+
+        # same rows, exported again with a different timestamp
+        # (same length, so the xref offsets still line up)
+        with open(filepath, 'rb') as infile:
+            pdf = infile.read()
+
+        with open(filepath, 'wb') as outfile:
+            outfile.write(re.sub(
+                rb'Printed on [^)]*',
+                lambda x: re.sub(rb'[0-9]', b'1', x.group()),
+                pdf
+            ))
+
+        with mock.patch.object(download.ResultsPDF, 'infer_column_breaks') as infer:
+            download.ResultsPDF(filepath)
+
+        infer.assert_not_called()
+
+        self.assertEqual(list(layouts), ['private'])
+
+
+class TestRunStats(unittest.TestCase):
+
+    def test_run_log_rotates(self):
+        with tempfile.TemporaryDirectory() as folder:
+            filepath = Path(folder) / 'run-log.jsonl'
+
+            for _ in range(3):
+                download.RunStats().count('pages').write_report(filepath, max_bytes=100)
+
+            self.assertTrue(filepath.with_name('run-log.jsonl.1').exists())
+            self.assertLess(filepath.stat().st_size, 100)
+
+
+class TestArchivePageStore(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = Path(tempfile.mkdtemp())
+        self.filepath = self.folder / 'pages.gz'
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_write_compact_reopen(self):
+        store = download.ArchivePageStore(self.filepath)
+        store.write('A', '<html>a</html>')
+        store.write('B', '<html>b</html>')
+        store.write('A', '<html>a, refreshed</html>')
+        store.compact()
+
+        self.assertEqual(store.garbage(), 0)
+
+        store = download.ArchivePageStore(self.filepath)
+
+        self.assertTrue(all(len(x) == 2 for x in store.index.values()))
+        self.assertEqual(store.read('A'), '<html>a, refreshed</html>')
+        self.assertEqual(store.read('B'), '<html>b</html>')
+
+    def test_old_index_with_capacity(self):
+        store = download.ArchivePageStore(self.filepath)
+        store.write('A', '<html>a</html>')
+
+        with open(store.filepath_index, 'w') as outfile:
+            json.dump({x: y + [y[1]] for x, y in store.index.items()}, outfile)
+
+        store = download.ArchivePageStore(self.filepath)
+
+        self.assertEqual(store.read('A'), '<html>a</html>')
+        self.assertEqual(list(store.index.values()), [[0, store.filepath.stat().st_size]])
+
+
+class TestPublicChanges(unittest.TestCase):
+
+    KEY_FIELDS = ('year', 'lobbyist_name', 'agency')
+
+    def test_empty_delta_writes_nothing(self):
+        filepath = download.config['public']['filepath_changes']
+        filepath.unlink(missing_ok=True)
+
+        download.write_public_changes({'added': [], 'removed': []})
+
+        self.assertFalse(filepath.exists())
+
+    def test_rewrapped_text_is_not_a_change(self):
+        previous = [{'year': '2024', 'lobbyist_name': 'JANE  DOE', 'agency': 'BOARD OF\nREGENTS'}]
+        current = [{'year': '2024', 'lobbyist_name': 'Jane Doe', 'agency': 'BOARD OF REGENTS', 'lobbyist_id': 'L000001'}]
+
+        delta = download.diff_records(previous, current, key_fields=self.KEY_FIELDS)
+
+        self.assertEqual(delta, {'added': [], 'removed': []})
+
+
+class TestPrivateData(unittest.TestCase):
+
+    def test_shards_without_combined_file(self):
+        filepath = download.config['private']['filepath_data']
+        filepath.unlink(missing_ok=True)
+
+        data = [
+            {'year': 2024, 'registration_number': '1'},
+            {'year': 2023, 'registration_number': '2'}
+        ]
+
+        self.assertEqual(sorted(download.write_private_data(data)), ['2023', '2024'])
+        self.assertEqual(download.write_private_data(data), [])
+        self.assertFalse(filepath.exists())
+
+        self.assertEqual(download.load_private_data(), data)
+        self.assertEqual(download.load_private_data(years=[2023]), data[1:])
+
+
+class TestEntities(unittest.TestCase):
+
+    # both on the public list for the Board of Regents the same years
+    MORAN_MORGAN = [
+        {'year': '2016', 'lobbyist_name': 'JIM MORGAN', 'agency': 'BOARD OF REGENTS'},
+        {'year': '2017', 'lobbyist_name': 'JIM MORAN', 'agency': 'BOARD OF REGENTS'},
+        {'year': '2017', 'lobbyist_name': 'JIM MORGAN', 'agency': 'BOARD OF REGENTS'},
+        {'year': '2018', 'lobbyist_name': 'JIM MORAN', 'agency': 'BOARD OF REGENTS'},
+        {'year': '2018', 'lobbyist_name': 'JIM MORGAN', 'agency': 'BOARD OF REGENTS'}
+    ]
+
+    def entities(self):
+        download.FILEPATH_ENTITIES.unlink(missing_ok=True)
+        return download.Entities()
+
+    def test_moran_morgan(self):
+        records = self.entities().assign_public([dict(x) for x in self.MORAN_MORGAN])
+        ids = {x['lobbyist_name']: x['lobbyist_id'] for x in records}
+
+        self.assertNotEqual(ids['JIM MORAN'], ids['JIM MORGAN'])
+
+    def test_same_context_never_merges(self):
+        records = self.entities().assign_public([
+            {'year': '2017', 'lobbyist_name': 'MATT SMITH', 'agency': 'BOARD OF REGENTS'},
+            {'year': '2017', 'lobbyist_name': 'MATTHEW SMITH', 'agency': 'BOARD OF REGENTS'},
+            {'year': '2018', 'lobbyist_name': 'MATTHEW SMITH', 'agency': 'ATTORNEY GENERAL'},
+        ])
+
+        self.assertNotEqual(records[0]['lobbyist_id'], records[1]['lobbyist_id'])
+        self.assertEqual(records[1]['lobbyist_id'], records[2]['lobbyist_id'])
+
+    def test_cached_merge_is_undone(self):
+        entities = self.entities()
+        entities.lobbyists.names = {'JIM MORAN': 'L000001', 'JIM MORGAN': 'L000001'}
+        entities.lobbyists.next_id = 2
+        entities.lobbyists.build_variants()
+
+        records = entities.assign_public([dict(x) for x in self.MORAN_MORGAN])
+        ids = {x['lobbyist_name']: x['lobbyist_id'] for x in records}
+
+        self.assertEqual(ids['JIM MORAN'], 'L000001')
+        self.assertNotEqual(ids['JIM MORGAN'], 'L000001')
+
+    def test_honorifics_and_credentials(self):
+        records = self.entities().assign_public([
+            {'year': '2017', 'lobbyist_name': 'OEDEKOVEN DR. DUSTIN', 'agency': 'ANIMAL INDUSTRY BOARD'},
+            {'year': '2018', 'lobbyist_name': 'DR. DUSTIN OEDEKOVEN', 'agency': 'ANIMAL INDUSTRY BOARD'},
+            {'year': '2019', 'lobbyist_name': 'DUSTIN OEDEKOVEN', 'agency': 'ANIMAL INDUSTRY BOARD'},
+            {'year': '2020', 'lobbyist_name': 'DUSTIN OEDEKOVEN, DVM', 'agency': 'ANIMAL INDUSTRY BOARD'}
+        ])
+
+        self.assertEqual(len({x['lobbyist_id'] for x in records}), 1)
+
+    def test_person_tokens(self):
+        self.assertEqual(download.person_tokens('DUSTIN OEDEKOVEN, DVM'), ['DUSTIN', 'OEDEKOVEN'])
+        self.assertEqual(download.person_tokens('ELIZABETH ATCHISON M.D.'), ['ELIZABETH', 'ATCHISON'])
+        self.assertEqual(download.person_tokens('HANSON JOHN T.'), ['JOHN', 'T', 'HANSON'])
+        self.assertEqual(download.person_tokens('MATTHEW S. MCCAULLEY JR'), ['MATTHEW', 'S', 'MCCAULLEY'])
+
+    def test_surname_typo(self):
+        self.assertTrue(download.surname_typo('MCCAULEY', 'MCCAULLEY'))
+        self.assertTrue(download.surname_typo('PETERSON', 'PETESRON'))
+        self.assertFalse(download.surname_typo('MORAN', 'MORGAN'))
+        self.assertFalse(download.surname_typo('JOHNSON', 'JOHNSTON'))
+        self.assertFalse(download.surname_typo('HANSEN', 'HANSON'))
+
+
+if __name__ == '__main__':
+    unittest.main()